@@ -1,5 +1,5 @@
 # flask_app.py - Agent IA Ben Tech Marketing - VERSION FINALE AVEC AUTHENTIFICATION
-from flask import Flask, jsonify, request, render_template, session, redirect, url_for, send_from_directory
+from flask import Flask, jsonify, request, render_template, session, redirect, url_for, send_from_directory, Response, stream_with_context
 import os
 import sys
 import json
@@ -59,6 +59,7 @@ os.environ['GOOGLE_SHEET_NAME'] = GOOGLE_SHEET_NAME
 
 MODULES_STATUS = {
     'ia': False,
+    'chat_ia': False,
     'publier': False,
     'google_sheets_db': False,
     'plateformes.facebook': False
@@ -66,11 +67,20 @@ MODULES_STATUS = {
 
 try:
     from modules.ia import generer_contenu, get_statistiques_globales, audit_complet_performance
+    from modules.cache_reponses import cache_reponses
     MODULES_STATUS['ia'] = True
     print("✅ Module IA chargé")
 except ImportError as e:
     print(f"❌ Erreur chargement module IA: {e}")
 
+# Chargé séparément : le chat ne dépend pas des autres fonctions du module IA
+try:
+    from modules.ia import chat_ia_analyse, chat_ia_analyse_stream, generer_recommandations_proactives
+    MODULES_STATUS['chat_ia'] = True
+    print("✅ Chat IA chargé")
+except ImportError as e:
+    print(f"❌ Erreur chargement chat IA: {e}")
+
 try:
     from modules.publier import (
         demarrer_automatisation_complete, 
@@ -86,11 +96,15 @@ except ImportError as e:
     print(f"⚠️ Module Publication non disponible: {e}")
 
 try:
-    from modules.google_sheets_db import gsheets_db, lire_historique_gsheets
+    from modules.post_store import (
+        post_store, lire_historique_posts, get_info_stockage,
+        exporter_historique_excel, EXCEL_FILE, debut_fenetre_recente
+    )
+    from modules.archive_posts import archiver_posts
     MODULES_STATUS['google_sheets_db'] = True
-    print("✅ Module Google Sheets chargé")
+    print(f"✅ Stockage des posts chargé ({post_store.libelle})")
 except ImportError as e:
-    print(f"⚠️ Module Google Sheets non disponible: {e}")
+    print(f"⚠️ Stockage des posts non disponible: {e}")
 
 try:
     from modules.plateformes.facebook import test_connexion_facebook
@@ -310,6 +324,12 @@ def planifier_generations():
     schedule.every().day.at("14:00").do(generer_contenu_automatique)
     schedule.every().day.at("19:00").do(generer_contenu_automatique)
     
+    # Archivage nocturne des anciens posts hors de Google Sheets
+    if MODULES_STATUS['google_sheets_db']:
+        schedule.every().day.at("03:00").do(archiver_posts)
+        # Export Excel du journal local (les écritures ne réécrivent plus le classeur)
+        schedule.every().hour.do(exporter_historique_excel)
+    
     print("⏰ Planification configurée: 9h, 14h, 19h tous les jours")
     
     # Boucle d'exécution du schedule
@@ -541,7 +561,10 @@ def dashboard():
     # Récupérer les posts récents
     if MODULES_STATUS['google_sheets_db']:
         try:
-            df = lire_historique_gsheets()
+            # Fenêtre récente (partitions des derniers mois), historique complet à défaut
+            df = lire_historique_posts(date_debut=debut_fenetre_recente())
+            if df.empty:
+                df = lire_historique_posts()
             if not df.empty:
                 posts_recent = df.tail(5).to_dict('records')
         except:
@@ -662,11 +685,19 @@ def api_status():
     sheets_status = {'status': 'non_configured'}
     if MODULES_STATUS['google_sheets_db']:
         try:
-            info = gsheets_db.get_sheet_info()
+            info = get_info_stockage()
             sheets_status = info
         except:
             sheets_status = {'status': 'error'}
     
+    # Cache sémantique des réponses aux commentaires
+    caches_status = {}
+    if MODULES_STATUS['ia']:
+        try:
+            caches_status['reponses_commentaires'] = cache_reponses.statistiques()
+        except:
+            caches_status['reponses_commentaires'] = {'status': 'error'}
+    
     return jsonify({
         'success': True,
         'system': {
@@ -687,6 +718,7 @@ def api_status():
             'openai': 'configured' if OPENAI_API_KEY else 'not_configured',
             'unsplash': 'configured' if UNSPLASH_API_KEY else 'not_configured'
         },
+        'caches': caches_status,
         'timestamp': datetime.datetime.now().isoformat()
     })
 
@@ -836,7 +868,7 @@ def api_posts():
     """Récupérer les posts"""
     try:
         if MODULES_STATUS['google_sheets_db']:
-            df = lire_historique_gsheets()
+            df = lire_historique_posts()
             if not df.empty:
                 posts = df.to_dict('records')
                 return jsonify({
@@ -923,6 +955,60 @@ def api_comments_process():
             'message': f'Erreur: {str(e)}'
         }), 500
 
+@app.route('/api/chat/analyze', methods=['POST'])
+def api_chat_analyze():
+    """Analyse IA du chat : flux SSE si le client l'accepte, sinon réponse JSON complète"""
+    if not MODULES_STATUS['chat_ia']:
+        return jsonify({'success': False, 'message': 'Chat IA non disponible'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    question = str(data.get('question', '')).strip()
+    contexte = str(data.get('contexte', ''))
+    if not question:
+        return jsonify({'success': False, 'message': 'Question manquante'}), 400
+    
+    if 'text/event-stream' not in request.headers.get('Accept', ''):
+        try:
+            return jsonify({
+                'success': True,
+                'analysis': chat_ia_analyse(question, contexte),
+                'recommendations': generer_recommandations_proactives()
+            })
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'message': f'Erreur: {str(e)}'
+            }), 500
+    
+    def evenements():
+        # Un événement par fragment généré, puis les recommandations
+        for fragment in chat_ia_analyse_stream(question, contexte):
+            yield f"data: {json.dumps({'delta': fragment}, ensure_ascii=False)}\n\n"
+        try:
+            recommandations = generer_recommandations_proactives()
+        except Exception as e:
+            print(f"⚠️ Recommandations indisponibles: {e}")
+            recommandations = []
+        yield f"event: fin\ndata: {json.dumps({'recommendations': recommandations}, ensure_ascii=False)}\n\n"
+    
+    return Response(stream_with_context(evenements()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/export/excel')
+def api_export_excel():
+    """Exporte l'historique local vers Excel et renvoie le fichier"""
+    if not MODULES_STATUS['google_sheets_db']:
+        return jsonify({'success': False, 'message': 'Stockage des posts non disponible'}), 503
+    
+    try:
+        exporter_historique_excel()
+        return send_from_directory(os.getcwd(), EXCEL_FILE, as_attachment=True)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Erreur: {str(e)}'
+        }), 500
+
 @app.route('/api/config')
 def api_config():
     """Afficher la configuration"""
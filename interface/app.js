@@ -708,6 +708,9 @@ async function sendChatMessage(message) {
     }
     
     try {
+        const streamed = await streamChatResponse(message);
+        if (streamed) return;
+        
         const result = await callAPI('/api/chat/analyze', 'POST', {
             question: message,
             contexte: "dashboard"
@@ -724,6 +727,89 @@ async function sendChatMessage(message) {
     }
 }
 
+// Réponse du chat en streaming (SSE) : le texte s'affiche au fil de la génération
+// Retourne false si le streaming n'est pas disponible (repli sur la réponse JSON)
+async function streamChatResponse(message) {
+    const chatMessages = document.getElementById('chatMessages');
+    if (!chatMessages || !checkSession() || !window.ReadableStream || !window.TextDecoder) return false;
+    
+    const response = await fetch('/api/chat/analyze', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'Authorization': localStorage.getItem('auth_token') || ''
+        },
+        body: JSON.stringify({ question: message, contexte: "dashboard" })
+    });
+    
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!response.ok || !response.body || !contentType.includes('text/event-stream')) return false;
+    
+    const now = new Date();
+    const time = now.getHours().toString().padStart(2, '0') + ':' + 
+                 now.getMinutes().toString().padStart(2, '0');
+    
+    chatMessages.insertAdjacentHTML('beforeend', `
+        <div class="message bot">
+            <div class="message-avatar">
+                <svg width="20" height="20" viewBox="0 0 24 24" fill="#3498db">
+                    <path d="M12 12c2.21 0 4-1.79 4-4s-1.79-4-4-4-4 1.79-4 4 1.79 4 4 4zm0 2c-2.67 0-8 1.34-8 4v2h16v-2c0-2.66-5.33-4-8-4z"/>
+                </svg>
+            </div>
+            <div class="message-content">
+                <div class="message-text">
+                    <strong>🔍 Analyse IA:</strong><br>
+                    <span class="stream-text" style="white-space: pre-wrap;"></span>
+                    <span class="stream-recommendations"></span>
+                </div>
+                <div class="message-time">${time}</div>
+            </div>
+        </div>
+    `);
+    const messageEl = chatMessages.lastElementChild;
+    const textEl = messageEl.querySelector('.stream-text');
+    const recommendationsEl = messageEl.querySelector('.stream-recommendations');
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Les événements SSE sont séparés par une ligne vide
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) !== -1) {
+            const event = buffer.slice(0, separator);
+            buffer = buffer.slice(separator + 2);
+            
+            let type = 'message';
+            let data = '';
+            event.split('\n').forEach(line => {
+                if (line.startsWith('event:')) type = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (!data) continue;
+            
+            const payload = JSON.parse(data);
+            if (type === 'fin') {
+                const recommendations = payload.recommendations || [];
+                if (recommendations.length > 0) {
+                    recommendationsEl.innerHTML = `<br><br><strong>💡 Recommandations:</strong><br>${recommendations.map(r => `• ${r.titre || r}`).join('<br>')}`;
+                }
+            } else if (payload.delta) {
+                textEl.textContent += payload.delta;
+            }
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }
+    }
+    
+    return true;
+}
+
 // Ajouter un message utilisateur
 function addUserMessage(text) {
     const chatMessages = document.getElementById('chatMessages');
@@ -0,0 +1,160 @@
+# modules/archive_posts.py - Archive colonnaire des anciens posts
+"""
+Archivage des posts anciens hors du stockage principal.
+
+- Les posts plus vieux que ARCHIVE_AGE_JOURS sont déplacés dans un fichier
+  Feather puis supprimés du stockage des posts (post_store.py), qui reste
+  petit et rapide
+- Archive compressée (ARCHIVE_COMPRESSION=zstd par défaut, ou lz4) : les
+  longues colonnes texte des anciens posts occupent peu de place ; les
+  lectures sont projetées, seules les colonnes demandées sont décompressées
+  (ARCHIVE_COMPRESSION=uncompressed : lecture mappée en mémoire sans copie)
+- L'archive n'est fusionnée à l'historique que pour les lectures complètes
+  (lire_historique(historique_complet=True))
+- Un seul processus archive à la fois (verrou fichier non bloquant), au plus
+  une fois toutes les ARCHIVE_INTERVALLE_HEURES heures : les autres workers
+  gunicorn passent leur tour
+
+Nécessite pyarrow ; sans lui, l'archivage est désactivé.
+"""
+
+import os
+import time
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from modules.journal_posts import VerrouFichier
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow non installé - archivage des anciens posts désactivé")
+
+# Configuration
+ARCHIVE_PATH = os.environ.get('ARCHIVE_POSTS_PATH', 'archive_posts.feather')
+ARCHIVE_AGE_JOURS = int(os.environ.get('ARCHIVE_AGE_JOURS', 365))
+ARCHIVE_COMPRESSION = os.environ.get('ARCHIVE_COMPRESSION', 'zstd')
+ARCHIVE_INTERVALLE_HEURES = float(os.environ.get('ARCHIVE_INTERVALLE_HEURES', 12))
+
+# Colonnes numériques conservées comme telles dans l'archive
+COLONNES_NUMERIQUES = [
+    "reaction_positive", "reaction_negative",
+    "taux_conversion_estime", "score_performance_final"
+]
+
+def archive_disponible() -> bool:
+    return PYARROW_AVAILABLE and os.path.exists(ARCHIVE_PATH)
+
+def _normaliser(df: pd.DataFrame) -> pd.DataFrame:
+    """Types homogènes par colonne (requis par le format colonnaire)"""
+    df = df.copy()
+    for col in df.columns:
+        if col in COLONNES_NUMERIQUES:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        else:
+            df[col] = df[col].fillna("").astype(str)
+    return df.reset_index(drop=True)
+
+def lire_archive(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Lit l'archive (lecture projetée et mappée en mémoire)"""
+    if not archive_disponible():
+        return pd.DataFrame(columns=columns or [])
+
+    try:
+        schema = pa.ipc.open_file(pa.memory_map(ARCHIVE_PATH)).schema
+        colonnes = [col for col in columns if col in schema.names] if columns else None
+        df = feather.read_table(ARCHIVE_PATH, columns=colonnes, memory_map=True).to_pandas()
+        if columns:
+            for col in columns:
+                if col not in df.columns:
+                    df[col] = ""
+            df = df[columns]
+        return df
+    except Exception as e:
+        print(f"❌ Erreur lecture archive: {e}")
+        return pd.DataFrame(columns=columns or [])
+
+def fusionner_archive(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Ajoute les posts archivés avant l'historique vivant"""
+    archive = lire_archive(columns or list(df.columns))
+    if archive.empty:
+        return df
+    if df.empty:
+        return archive
+    return pd.concat([archive, df], ignore_index=True)
+
+def _ecrire_archive(df: pd.DataFrame):
+    """Écrit l'archive de façon atomique (fichier temporaire puis remplacement)"""
+    temporaire = ARCHIVE_PATH + ".tmp"
+    table = pa.Table.from_pandas(_normaliser(df), preserve_index=False)
+    feather.write_feather(table, temporaire, compression=ARCHIVE_COMPRESSION)
+    os.replace(temporaire, ARCHIVE_PATH)
+
+def _archivage_recent() -> bool:
+    """True si un archivage a eu lieu il y a moins de ARCHIVE_INTERVALLE_HEURES heures"""
+    try:
+        return time.time() - os.path.getmtime(ARCHIVE_PATH + ".derniere") < ARCHIVE_INTERVALLE_HEURES * 3600
+    except OSError:
+        return False
+
+def _marquer_archivage():
+    with open(ARCHIVE_PATH + ".derniere", 'w') as f:
+        f.write(datetime.now().isoformat())
+
+def archiver_posts(age_jours: int = ARCHIVE_AGE_JOURS) -> int:
+    """Déplace les posts plus anciens que age_jours du stockage des posts vers l'archive
+
+    Returns:
+        Nombre de posts archivés
+    """
+    if not PYARROW_AVAILABLE:
+        return 0
+
+    try:
+        with VerrouFichier(ARCHIVE_PATH + ".lock", bloquant=False):
+            if _archivage_recent():
+                print("📦 Archivage déjà effectué récemment")
+                return 0
+            return _archiver(age_jours)
+    except BlockingIOError:
+        print("📦 Archivage déjà en cours dans un autre processus")
+        return 0
+
+def _archiver(age_jours: int) -> int:
+    """Archivage proprement dit (appelé sous le verrou d'archivage)"""
+    from modules.post_store import post_store, supprimer_posts_par_cle
+
+    try:
+        limite = datetime.now() - timedelta(days=age_jours)
+        # Lecture cohérente : la source de vérité, pas une réplique
+        df = post_store.lire_historique(coherent=True, date_fin=limite)
+        if df.empty or "id_post" not in df.columns:
+            print("📦 Aucun post à archiver")
+            _marquer_archivage()
+            return 0
+
+        # Les posts sans clé ne peuvent pas être supprimés de façon sûre
+        df = df[df["id_post"].astype(str).str.strip() != ""]
+        if df.empty:
+            _marquer_archivage()
+            return 0
+
+        # 1. Écrire l'archive (sans doublons si un archivage précédent a été interrompu)
+        existante = lire_archive() if os.path.exists(ARCHIVE_PATH) else pd.DataFrame()
+        if not existante.empty and "id_post" in existante.columns:
+            existante = existante[~existante["id_post"].astype(str).isin(df["id_post"].astype(str))]
+        _ecrire_archive(pd.concat([existante, df], ignore_index=True))
+
+        # 2. Puis seulement supprimer du stockage
+        supprimes = supprimer_posts_par_cle(df["id_post"].astype(str).tolist())
+        _marquer_archivage()
+        print(f"📦 {supprimes} posts de plus de {age_jours} jours archivés dans {ARCHIVE_PATH}")
+        return supprimes
+
+    except Exception as e:
+        print(f"❌ Erreur archivage: {e}")
+        return 0
@@ -1,21 +1,29 @@
 import threading
 import time
-import pandas as pd
 from modules.plateformes.facebook import traiter_commentaires, envoyer_message_prive
+from modules.post_store import post_store, store_local
 
 CHECK_INTERVAL = 10  # secondes
-EXCEL_FILE = "historique_posts.xlsx"
+
+def lire_post_ids():
+    """post_id des posts publiés, lus dans le stockage des posts (journal local en secours)"""
+    try:
+        df = post_store.lire_historique(columns=["post_id"])
+    except Exception as e:
+        print(f"[Auto] Erreur {post_store.libelle}, lecture du journal local: {e}")
+        df = store_local.lire_historique(columns=["post_id"])
+    if "post_id" not in df.columns:
+        return []
+    post_ids = df["post_id"].astype(str).str.strip()
+    return list(dict.fromkeys(post_ids[post_ids != ""]))
 
 def auto_check_comments():
     while True:
         try:
-            df = pd.read_excel(EXCEL_FILE)
-            for _, row in df.iterrows():
-                post_id = row.get("post_id")
-                if post_id:
-                    interactions = traiter_commentaires(post_id)
-                    if interactions:
-                        print(f"[Auto] Réponses envoyées pour post {post_id} : {len(interactions)}")
+            for post_id in lire_post_ids():
+                interactions = traiter_commentaires(post_id)
+                if interactions:
+                    print(f"[Auto] Réponses envoyées pour post {post_id} : {len(interactions)}")
         except Exception as e:
             print(f"[Auto] Erreur auto_check_comments: {e}")
 
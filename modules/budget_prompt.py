@@ -0,0 +1,151 @@
+# modules/budget_prompt.py - Construction des prompts sous budget de tokens
+"""
+Taille des prompts bornée par type d'appel.
+
+- Estimation locale du nombre de tokens (sans tokenizer ni appel réseau)
+- Budget par type d'appel (BUDGETS_TOKENS, surchargeable par
+  PROMPT_BUDGET_<TYPE>, ex. PROMPT_BUDGET_ANALYSE=3000)
+- Enregistrements encodés en CSV compact (en-tête unique, cellules tronquées)
+  et ajoutés par ordre de priorité tant que le budget le permet
+- Tokens de chaque prompt comptabilisés par type d'appel (estimation, et
+  consommation réelle quand l'API la renvoie)
+"""
+
+import io
+import os
+import re
+import csv
+import math
+import threading
+from typing import Dict, List, Any, Optional
+
+# Budgets par défaut (tokens du prompt complet)
+BUDGETS_TOKENS = {
+    "analyse": 2500,
+    "chat": 1800,
+}
+BUDGET_DEFAUT = 2000
+LONGUEUR_MAX_CELLULE = int(os.environ.get('PROMPT_LONGUEUR_MAX_CELLULE', 120))
+MARQUEUR_DONNEES = "{donnees}"
+
+# Un mot ~ 1 token par tranche de 4 caractères, chaque signe isolé ~ 1 token
+_MOTS_ET_SIGNES = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+def estimer_tokens(texte: str) -> int:
+    """Nombre de tokens estimé localement (légèrement pessimiste pour le français)"""
+    return sum(math.ceil(len(morceau) / 4) for morceau in _MOTS_ET_SIGNES.findall(str(texte)))
+
+def budget_tokens(type_appel: str) -> int:
+    """Budget du type d'appel (variable PROMPT_BUDGET_<TYPE> prioritaire)"""
+    valeur = os.environ.get(f"PROMPT_BUDGET_{type_appel.upper()}")
+    try:
+        return int(valeur) if valeur else BUDGETS_TOKENS.get(type_appel, BUDGET_DEFAUT)
+    except ValueError:
+        return BUDGETS_TOKENS.get(type_appel, BUDGET_DEFAUT)
+
+def _cellule(valeur: Any) -> str:
+    """Valeur compacte : entiers sans décimale, texte sur une ligne et tronqué"""
+    if valeur is None or (isinstance(valeur, float) and math.isnan(valeur)):
+        return ""
+    if isinstance(valeur, float):
+        return str(int(valeur)) if valeur.is_integer() else f"{valeur:.2f}".rstrip("0")
+    texte = " ".join(str(valeur).split())
+    if len(texte) > LONGUEUR_MAX_CELLULE:
+        texte = texte[:LONGUEUR_MAX_CELLULE - 1] + "…"
+    return texte
+
+def _ligne_csv(valeurs: List[str]) -> str:
+    tampon = io.StringIO()
+    csv.writer(tampon, lineterminator="\n").writerow(valeurs)
+    return tampon.getvalue()
+
+def encoder_records(records: List[Dict[str, Any]], colonnes: List[str], budget: int) -> Dict[str, Any]:
+    """Encode les enregistrements en CSV dans la limite du budget
+
+    Args:
+        records: enregistrements, du plus prioritaire au moins prioritaire
+        colonnes: colonnes à encoder (en-tête du CSV)
+        budget: tokens disponibles pour les données
+
+    Returns:
+        {"texte": CSV, "lignes": lignes gardées, "total": lignes disponibles}
+    """
+    texte = _ligne_csv(colonnes)
+    tokens = estimer_tokens(texte)
+    gardees = 0
+    for record in records:
+        ligne = _ligne_csv([_cellule(record.get(col)) for col in colonnes])
+        cout = estimer_tokens(ligne)
+        if tokens + cout > budget:
+            break
+        texte += ligne
+        tokens += cout
+        gardees += 1
+
+    if gardees < len(records):
+        texte += f"(+{len(records) - gardees} lignes plus anciennes non incluses)\n"
+    return {"texte": texte.rstrip("\n"), "lignes": gardees, "total": len(records)}
+
+class ComptabilitePrompts:
+    """Tokens envoyés par type d'appel"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _entree(self, type_appel: str) -> Dict[str, Any]:
+        return self._stats.setdefault(type_appel, {
+            "appels": 0, "tokens_estimes": 0, "dernier_prompt": 0,
+            "tokens_reels": 0, "appels_mesures": 0
+        })
+
+    def enregistrer(self, type_appel: str, tokens: int):
+        with self._lock:
+            entree = self._entree(type_appel)
+            entree["appels"] += 1
+            entree["tokens_estimes"] += tokens
+            entree["dernier_prompt"] = tokens
+
+    def enregistrer_usage(self, type_appel: str, usage: Optional[Dict[str, Any]]):
+        """Consommation réelle renvoyée par l'API (champ "usage" de la réponse)"""
+        if not usage or "prompt_tokens" not in usage:
+            return
+        with self._lock:
+            entree = self._entree(type_appel)
+            entree["tokens_reels"] += int(usage["prompt_tokens"])
+            entree["appels_mesures"] += 1
+        print(f"🧮 Prompt {type_appel}: {usage['prompt_tokens']} tokens facturés")
+
+    def statistiques(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                type_appel: {
+                    **entree,
+                    "tokens_moyens": round(entree["tokens_estimes"] / entree["appels"]) if entree["appels"] else 0,
+                    "budget": budget_tokens(type_appel)
+                }
+                for type_appel, entree in self._stats.items()
+            }
+
+# Instance globale
+comptabilite_prompts = ComptabilitePrompts()
+
+def construire_prompt(type_appel: str, gabarit: str, records: List[Dict[str, Any]],
+                      colonnes: List[str]) -> str:
+    """Prompt final : gabarit dont MARQUEUR_DONNEES est remplacé par les
+    enregistrements encodés dans le budget restant du type d'appel
+    (sans colonnes, le gabarit est seulement comptabilisé)"""
+    budget = budget_tokens(type_appel)
+    donnees = {"lignes": 0, "total": len(records)}
+    if colonnes:
+        fixe = estimer_tokens(gabarit.replace(MARQUEUR_DONNEES, "", 1))
+        donnees = encoder_records(records, colonnes, budget - fixe)
+        prompt = gabarit.replace(MARQUEUR_DONNEES, donnees["texte"], 1)
+    else:
+        prompt = gabarit
+
+    tokens = estimer_tokens(prompt)
+    comptabilite_prompts.enregistrer(type_appel, tokens)
+    print(f"🧮 Prompt {type_appel}: ~{tokens} tokens (budget {budget}, "
+          f"{donnees['lignes']}/{donnees['total']} lignes)")
+    return prompt
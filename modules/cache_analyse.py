@@ -0,0 +1,108 @@
+# modules/cache_analyse.py - Cache persistant de l'analyse stratégique IA
+"""
+Mémorisation du résultat de analyse_ia_avance entre les générations.
+
+- Chaque enregistrement échantillonné est réduit à une empreinte (sha1 du JSON trié)
+- L'analyse est réutilisée si l'échantillon est identique ou presque
+  (similarité de Jaccard des empreintes >= ANALYSE_CACHE_SIMILARITE) et si
+  elle a moins de ANALYSE_CACHE_MAX_AGE_HEURES
+- Le cache survit aux redémarrages (fichier JSON, écriture atomique)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Any, Optional
+
+# Configuration
+ANALYSE_CACHE_PATH = os.environ.get('ANALYSE_CACHE_PATH', 'cache_analyse_ia.json')
+ANALYSE_CACHE_MAX_AGE_HEURES = float(os.environ.get('ANALYSE_CACHE_MAX_AGE_HEURES', 24))
+ANALYSE_CACHE_SIMILARITE = float(os.environ.get('ANALYSE_CACHE_SIMILARITE', 0.9))
+
+def empreintes_records(records: List[Dict[str, Any]]) -> List[str]:
+    """Empreinte stable de chaque enregistrement"""
+    return [
+        hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+        for record in records
+    ]
+
+def similarite(a: List[str], b: List[str]) -> float:
+    """Similarité de Jaccard entre deux ensembles d'empreintes"""
+    ensemble_a, ensemble_b = set(a), set(b)
+    if not ensemble_a and not ensemble_b:
+        return 1.0
+    return len(ensemble_a & ensemble_b) / len(ensemble_a | ensemble_b)
+
+class CacheAnalyse:
+    """Dernière analyse calculée, avec les empreintes de l'échantillon analysé"""
+
+    def __init__(self, chemin: str = ANALYSE_CACHE_PATH,
+                 max_age_heures: float = ANALYSE_CACHE_MAX_AGE_HEURES,
+                 seuil_similarite: float = ANALYSE_CACHE_SIMILARITE):
+        self.chemin = chemin
+        self.max_age = max_age_heures * 3600
+        self.seuil_similarite = seuil_similarite
+        self._lock = threading.Lock()
+        self._entree: Optional[Dict[str, Any]] = None
+        self._charge = False
+        self.hits = 0
+        self.misses = 0
+
+    def _charger(self):
+        if self._charge:
+            return
+        self._charge = True
+        try:
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                self._entree = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Cache d'analyse illisible, ignoré: {e}")
+
+    def obtenir(self, records: List[Dict[str, Any]]) -> Optional[str]:
+        """Analyse en cache pour cet échantillon, ou None si absente, périmée ou trop différente"""
+        empreintes = empreintes_records(records)
+        with self._lock:
+            self._charger()
+            entree = self._entree
+
+        if entree:
+            age = time.time() - entree.get("date", 0)
+            score = similarite(empreintes, entree.get("empreintes", []))
+            if age < self.max_age and score >= self.seuil_similarite:
+                self.hits += 1
+                print(f"♻️ Analyse IA réutilisée (similarité {score:.0%}, âge {age / 3600:.1f} h)")
+                return entree.get("analyse")
+        self.misses += 1
+        return None
+
+    def enregistrer(self, records: List[Dict[str, Any]], analyse: str):
+        entree = {
+            "date": time.time(),
+            "empreintes": empreintes_records(records),
+            "analyse": analyse
+        }
+        with self._lock:
+            self._entree = entree
+            self._charge = True
+            try:
+                temporaire = f"{self.chemin}.{os.getpid()}.tmp"
+                with open(temporaire, 'w', encoding='utf-8') as f:
+                    json.dump(entree, f, ensure_ascii=False)
+                os.replace(temporaire, self.chemin)
+            except Exception as e:
+                print(f"⚠️ Sauvegarde du cache d'analyse échouée: {e}")
+
+    def statistiques(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_reutilisation": round(self.hits / total, 3) if total else 0.0
+        }
+
+# Instance globale
+cache_analyse = CacheAnalyse()
@@ -0,0 +1,168 @@
+# modules/cache_reponses.py - Cache sémantique des réponses aux commentaires
+"""
+Réutilisation des réponses aux commentaires quasi identiques
+("intéressé", "prix ?", "info svp"...).
+
+- Chaque commentaire est projeté localement (n-grammes de caractères hachés,
+  sans appel réseau) sur un vecteur normalisé ; l'index est une matrice
+  NumPy et la recherche un produit scalaire (similarité cosinus)
+- Au-delà de CACHE_REPONSES_SEUIL, la réponse mémorisée (sans signature)
+  est réutilisée et signée par l'agent courant
+- Éviction LRU au-delà de CACHE_REPONSES_TAILLE entrées
+- Index persisté sur disque (.npz, écriture atomique) au plus toutes les
+  CACHE_REPONSES_SAUVEGARDE secondes, en fin de lot (sauvegarder) et à la
+  sortie du processus
+- Taux de hits mesuré (statistiques, exposé par /api/status)
+"""
+
+import os
+import re
+import time
+import zlib
+import atexit
+import threading
+import unicodedata
+import numpy as np
+from typing import Dict, Any, Optional
+
+# Configuration
+CACHE_REPONSES_PATH = os.environ.get('CACHE_REPONSES_PATH', 'cache_reponses.npz')
+CACHE_REPONSES_SEUIL = float(os.environ.get('CACHE_REPONSES_SEUIL', 0.92))
+CACHE_REPONSES_TAILLE = int(os.environ.get('CACHE_REPONSES_TAILLE', 500))
+CACHE_REPONSES_SAUVEGARDE = int(os.environ.get('CACHE_REPONSES_SAUVEGARDE', 60))  # secondes
+DIMENSION = 1024
+TAILLE_NGRAMME = 3
+
+def normaliser(texte: str) -> str:
+    """Minuscules, sans accents ni ponctuation (hors '?'), pluriels simples retirés"""
+    texte = unicodedata.normalize('NFKD', str(texte).lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    texte = re.sub(r"[^\w?]+", " ", texte)
+    texte = re.sub(r"\s*\?[\s?]*", " ? ", texte)
+    # Pluriels simples : "infos" -> "info"
+    texte = re.sub(r"(\w{3,})[sx]\b", r"\1", texte)
+    return re.sub(r"\s+", " ", texte).strip()
+
+def vectoriser(texte: str) -> np.ndarray:
+    """Vecteur normalisé des n-grammes de caractères (hachés sur DIMENSION composantes)"""
+    vecteur = np.zeros(DIMENSION, dtype=np.float32)
+    texte = f" {normaliser(texte)} "
+    for i in range(max(1, len(texte) - TAILLE_NGRAMME + 1)):
+        ngramme = texte[i:i + TAILLE_NGRAMME]
+        vecteur[zlib.crc32(ngramme.encode('utf-8')) % DIMENSION] += 1.0
+    norme = np.linalg.norm(vecteur)
+    return vecteur / norme if norme else vecteur
+
+class CacheReponses:
+    """Index vectoriel des commentaires déjà traités -> réponse (sans signature)"""
+
+    def __init__(self, chemin: str = CACHE_REPONSES_PATH, seuil: float = CACHE_REPONSES_SEUIL,
+                 taille_max: int = CACHE_REPONSES_TAILLE, intervalle: int = CACHE_REPONSES_SAUVEGARDE):
+        self.chemin = chemin
+        self.seuil = seuil
+        self.taille_max = taille_max
+        self.intervalle = intervalle
+        self._lock = threading.Lock()
+        self._vecteurs = np.zeros((0, DIMENSION), dtype=np.float32)
+        self._reponses: list = []
+        self._utilisations = np.zeros(0, dtype=np.int64)  # horloge LRU
+        self._horloge = 0
+        self._charge = False
+        self._modifie = False
+        self._derniere_sauvegarde = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    def _charger(self):
+        if self._charge:
+            return
+        self._charge = True
+        if not os.path.exists(self.chemin):
+            return
+        try:
+            with np.load(self.chemin, allow_pickle=False) as donnees:
+                vecteurs = donnees["vecteurs"].astype(np.float32)
+                if vecteurs.shape[1:] != (DIMENSION,):
+                    print("⚠️ Cache de réponses d'une autre dimension, ignoré")
+                    return
+                self._vecteurs = vecteurs
+                self._reponses = [str(r) for r in donnees["reponses"]]
+                self._utilisations = donnees["utilisations"].astype(np.int64)
+                self._horloge = int(self._utilisations.max()) if len(self._utilisations) else 0
+            print(f"♻️ Cache de réponses chargé: {len(self._reponses)} entrées")
+        except Exception as e:
+            print(f"⚠️ Cache de réponses illisible, ignoré: {e}")
+
+    def _sauvegarder(self):
+        try:
+            temporaire = f"{self.chemin}.{os.getpid()}.tmp.npz"
+            np.savez(temporaire, vecteurs=self._vecteurs,
+                     reponses=np.array(self._reponses, dtype=str),
+                     utilisations=self._utilisations)
+            os.replace(temporaire, self.chemin)
+            self._modifie = False
+        except Exception as e:
+            print(f"⚠️ Sauvegarde du cache de réponses échouée: {e}")
+        self._derniere_sauvegarde = time.time()
+
+    def sauvegarder(self):
+        """Écrit l'index sur disque s'il a changé depuis la dernière sauvegarde"""
+        with self._lock:
+            if self._modifie:
+                self._sauvegarder()
+
+    def chercher(self, commentaire: str) -> Optional[str]:
+        """Réponse mémorisée pour un commentaire similaire, ou None"""
+        vecteur = vectoriser(commentaire)
+        with self._lock:
+            self._charger()
+            if len(self._reponses) and vecteur.any():
+                similarites = self._vecteurs @ vecteur
+                meilleur = int(np.argmax(similarites))
+                if similarites[meilleur] >= self.seuil:
+                    self._horloge += 1
+                    self._utilisations[meilleur] = self._horloge
+                    self._modifie = True
+                    self.hits += 1
+                    print(f"♻️ Réponse réutilisée (similarité {similarites[meilleur]:.2f})")
+                    return self._reponses[meilleur]
+            self.misses += 1
+            return None
+
+    def ajouter(self, commentaire: str, reponse: str):
+        """Mémorise la réponse (sans signature) d'un commentaire"""
+        vecteur = vectoriser(commentaire)
+        if not vecteur.any() or not reponse:
+            return
+        with self._lock:
+            self._charger()
+            self._horloge += 1
+            if len(self._reponses) >= self.taille_max:
+                # Éviction de l'entrée la moins récemment utilisée
+                ancien = int(np.argmin(self._utilisations))
+                self._vecteurs[ancien] = vecteur
+                self._reponses[ancien] = reponse
+                self._utilisations[ancien] = self._horloge
+            else:
+                self._vecteurs = np.vstack([self._vecteurs, vecteur[np.newaxis, :]])
+                self._reponses.append(reponse)
+                self._utilisations = np.append(self._utilisations, self._horloge)
+            self._modifie = True
+            # Réécriture complète du fichier : espacée d'au moins self.intervalle
+            if time.time() - self._derniere_sauvegarde >= self.intervalle:
+                self._sauvegarder()
+
+    def statistiques(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entrees": len(self._reponses),
+                "hits": self.hits,
+                "misses": self.misses,
+                "taux_hits": round(self.hits / total, 3) if total else 0.0,
+                "non_sauvegarde": self._modifie
+            }
+
+# Instance globale
+cache_reponses = CacheReponses()
+atexit.register(cache_reponses.sauvegarder)
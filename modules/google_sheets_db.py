@@ -14,59 +14,466 @@ Problèmes courants et solutions :
    - Vérifiez les permissions du service account
 
 3. Lenteur des requêtes
-   - Implémentez un cache local
+   - L'historique est mis en cache en mémoire (GSHEETS_CACHE_TTL,
+     GSHEETS_CACHE_STALE_TTL), invalidé à chaque écriture
    - Utilisez batch updates pour multiples écritures
 """
 
 import os
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Set, Any, Optional
 import gspread
+from gspread.utils import rowcol_to_a1, numericise_all
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 import json
+import re
+import random
 import sys
+import bisect
+import uuid
 import time
+import atexit
+import threading
+from collections import deque
 from functools import wraps
+from email.utils import parsedate_to_datetime
+import requests
+from modules.index_recherche import IndexRecherche
+from modules.journal_posts import journal_posts
+from modules.schema_posts import filtrer_par_date, colonnes_lecture_datee, filtrer_lecture_datee
 
 # Configuration
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# Cache mémoire de l'historique (secondes)
+# - CACHE_TTL : durée pendant laquelle le DataFrame est servi tel quel
+# - CACHE_STALE_TTL : fenêtre supplémentaire où la version périmée est servie
+#   pendant qu'un thread la rafraîchit en arrière-plan (stale-while-revalidate)
+CACHE_TTL = int(os.environ.get('GSHEETS_CACHE_TTL', 60))
+CACHE_STALE_TTL = int(os.environ.get('GSHEETS_CACHE_STALE_TTL', 300))
+
+# Synchronisation incrémentale : seules les nouvelles lignes sont téléchargées,
+# les colonnes modifiables après l'ajout (engagement, champs de publication,
+# COLONNES_MUTABLES) sont relues toutes les MUTABLES_REFRESH secondes
+MUTABLES_REFRESH = int(os.environ.get('GSHEETS_MUTABLES_REFRESH', 600))
+
+# File d'écriture différée (write-behind) pour les nouveaux posts
+# Les lignes sont regroupées en un seul append_rows dès que WRITE_BEHIND_BATCH
+# lignes sont en attente ou que WRITE_BEHIND_DELAI secondes se sont écoulées
+WRITE_BEHIND = os.environ.get('GSHEETS_WRITE_BEHIND', 'true').lower() == 'true'
+WRITE_BEHIND_BATCH = int(os.environ.get('GSHEETS_WRITE_BEHIND_BATCH', 20))
+WRITE_BEHIND_DELAI = float(os.environ.get('GSHEETS_WRITE_BEHIND_DELAI', 5))
+
+# Marqueur partagé des suppressions de lignes : un processus qui supprime des
+# lignes le réécrit, les autres resynchronisent alors entièrement leur cache
+# (les numéros de ligne de leur index de clés ne sont plus valides)
+MARQUEUR_SUPPRESSIONS = os.environ.get('GSHEETS_MARQUEUR_SUPPRESSIONS', '.gsheets_suppressions')
+
+# Quotas de l'API Google Sheets (requêtes par minute et par utilisateur)
+QUOTA_LECTURE_MINUTE = int(os.environ.get('GSHEETS_QUOTA_LECTURE', 60))
+QUOTA_ECRITURE_MINUTE = int(os.environ.get('GSHEETS_QUOTA_ECRITURE', 60))
+
+# Partitionnement mensuel : une feuille par mois ("posts_AAAA-MM"), les ajouts
+# sont routés selon la date du post et les lectures par plage de dates ne
+# touchent que les feuilles concernées. La première feuille reste lue comme
+# historique non partitionné (voir migrer_vers_partitions)
+PARTITIONS = os.environ.get('GSHEETS_PARTITIONS', 'false').lower() == 'true'
+PREFIXE_PARTITION = os.environ.get('GSHEETS_PREFIXE_PARTITION', 'posts_')
+
 # Colonnes du sheet (mêmes que votre Excel)
 COLUMNS = [
     "titre", "theme", "service", "style",
     "texte_marketing", "script_video", "reaction_positive", 
     "reaction_negative", "taux_conversion_estime", "publication_effective",
     "nom_plateforme", "suggestion", "date", "score_performance_final",
-    "image_path", "image_auteur", "type_publication"
+    "image_path", "image_auteur", "type_publication", "id_post"
 ]
 
-def retry_on_failure(max_retries=3, delay=1):
-    """Décorateur pour réessayer en cas d'échec API"""
+# Clés stables d'un post : identifiant généré à la création, ID Facebook après publication
+COLONNES_CLES = ["id_post", "post_id"]
+
+# Espace de noms des id_post attribués aux anciennes lignes (uuid5)
+NAMESPACE_ID_POST = uuid.UUID('6f1c2a9e-4b7d-5e3f-9a81-2c4d6e8f0a1b')
+
+# Colonnes susceptibles d'être modifiées après l'ajout d'un post
+# (engagement, puis champs écrits à la publication et au traitement des commentaires)
+COLONNES_MUTABLES = [
+    "reaction_positive", "reaction_negative", "taux_conversion_estime",
+    "publication_effective", "nom_plateforme", "score_performance_final",
+    "post_id", "statut_publication", "derniere_tentative", "date_publication",
+    "commentaires_traites"
+]
+
+class PolitiqueRetry:
+    """Politique de nouvelle tentative pour les appels à l'API Google Sheets
+    
+    - Seules les erreurs transitoires sont réessayées : APIError 429/5xx,
+      erreurs réseau et timeouts. Les autres (403, 404, validation...) sont
+      remontées immédiatement.
+    - Attente "decorrelated jitter" : uniform(base, attente_précédente * 3),
+      plafonnée à delai_max, pour désynchroniser les threads concurrents.
+    - L'en-tête Retry-After renvoyé par le serveur est respecté.
+    - La durée totale des nouvelles tentatives est plafonnée (duree_max).
+    """
+    
+    CODES_RETRYABLES = {429, 500, 502, 503, 504}
+    
+    def __init__(self, max_retries: int = 3, delai_base: float = 1.0,
+                 delai_max: float = 30.0, duree_max: float = 60.0):
+        self.max_retries = max_retries
+        self.delai_base = delai_base
+        self.delai_max = delai_max
+        self.duree_max = duree_max
+    
+    @staticmethod
+    def _code_http(erreur: Exception) -> Optional[int]:
+        reponse = getattr(erreur, 'response', None)
+        return getattr(reponse, 'status_code', None)
+    
+    def est_retryable(self, erreur: Exception) -> bool:
+        """Indique si l'erreur est transitoire"""
+        if isinstance(erreur, gspread.exceptions.APIError):
+            return self._code_http(erreur) in self.CODES_RETRYABLES
+        return isinstance(erreur, (requests.exceptions.ConnectionError,
+                                   requests.exceptions.Timeout,
+                                   ConnectionError, TimeoutError))
+    
+    @staticmethod
+    def delai_serveur(erreur: Exception) -> Optional[float]:
+        """Délai demandé par le serveur (en-tête Retry-After, en secondes)"""
+        reponse = getattr(erreur, 'response', None)
+        valeur = getattr(reponse, 'headers', {}).get('Retry-After') if reponse is not None else None
+        if not valeur:
+            return None
+        try:
+            return max(0.0, float(valeur))
+        except (TypeError, ValueError):
+            try:
+                return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    
+    def prochain_delai(self, delai_precedent: float, erreur: Exception) -> float:
+        """Calcule l'attente avant la prochaine tentative"""
+        delai = min(self.delai_max, random.uniform(self.delai_base, max(self.delai_base, delai_precedent * 3)))
+        delai_serveur = self.delai_serveur(erreur)
+        if delai_serveur is not None:
+            delai = max(delai, delai_serveur)
+        return delai
+    
+    def executer(self, func, *args, **kwargs):
+        """Exécute func en appliquant la politique"""
+        debut = time.monotonic()
+        delai = self.delai_base
+        for attempt in range(self.max_retries):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries - 1 or not self.est_retryable(e):
+                    raise
+                delai = self.prochain_delai(delai, e)
+                if time.monotonic() - debut + delai > self.duree_max:
+                    print(f"⚠️ Durée maximale de nouvelles tentatives atteinte ({self.duree_max}s)")
+                    raise
+                print(f"⚠️ Tentative {attempt + 1}/{self.max_retries} échouée: {e} - nouvel essai dans {delai:.1f}s")
+                time.sleep(delai)
+        return None
+
+def retry_on_failure(max_retries=3, delay=1, delai_max=30.0, duree_max=60.0):
+    """Décorateur pour réessayer en cas d'échec API transitoire (voir PolitiqueRetry)"""
+    politique = PolitiqueRetry(max_retries=max_retries, delai_base=delay,
+                               delai_max=delai_max, duree_max=duree_max)
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    print(f"⚠️ Tentative {attempt + 1}/{max_retries} échouée: {e}")
-                    time.sleep(delay * (attempt + 1))
-            return None
+            return politique.executer(func, *args, **kwargs)
+        wrapper.politique = politique
         return wrapper
     return decorator
 
+class SeauJetons:
+    """Seau à jetons équitable (FIFO) pour un quota d'appels par minute
+    
+    La capacité (rafale) est retranchée du débit de remplissage, de sorte
+    qu'aucune fenêtre glissante d'une minute ne dépasse le quota.
+    """
+    
+    def __init__(self, nom: str, par_minute: int, capacite: Optional[int] = None):
+        self.nom = nom
+        self.capacite = capacite or max(1, par_minute // 6)
+        self.taux = max(par_minute - self.capacite, 1) / 60.0  # jetons par seconde
+        self._jetons = float(self.capacite)
+        self._dernier_remplissage = time.monotonic()
+        self._file = deque()
+        self._condition = threading.Condition()
+        
+        # Métriques
+        self.appels = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+        self.quotas_depasses = 0
+    
+    def _remplir(self):
+        maintenant = time.monotonic()
+        self._jetons = min(self.capacite, self._jetons + (maintenant - self._dernier_remplissage) * self.taux)
+        self._dernier_remplissage = maintenant
+    
+    def acquerir(self) -> float:
+        """Attend son tour puis consomme un jeton, retourne le temps d'attente (s)"""
+        debut = time.monotonic()
+        ticket = object()
+        with self._condition:
+            self._file.append(ticket)
+            while True:
+                self._remplir()
+                en_tete = self._file[0] is ticket
+                if en_tete and self._jetons >= 1:
+                    self._jetons -= 1
+                    self._file.popleft()
+                    self._condition.notify_all()
+                    break
+                # Seul l'appel en tête de file calcule son attente, les autres attendent leur tour
+                attente = (1 - self._jetons) / self.taux if en_tete else 1.0
+                self._condition.wait(timeout=attente)
+            
+            attente = time.monotonic() - debut
+            self.appels += 1
+            self.attente_totale += attente
+            self.attente_max = max(self.attente_max, attente)
+        return attente
+    
+    def penaliser(self):
+        """Vide le seau après une réponse 429 (quota dépassé côté serveur)"""
+        with self._condition:
+            self._remplir()
+            self._jetons = min(self._jetons, 0.0)
+            self.quotas_depasses += 1
+    
+    def statistiques(self) -> Dict[str, Any]:
+        with self._condition:
+            self._remplir()
+            return {
+                "appels": self.appels,
+                "en_attente": len(self._file),
+                "jetons_disponibles": round(self._jetons, 2),
+                "attente_totale_s": round(self.attente_totale, 3),
+                "attente_moyenne_s": round(self.attente_totale / self.appels, 3) if self.appels else 0.0,
+                "attente_max_s": round(self.attente_max, 3),
+                "quotas_depasses": self.quotas_depasses
+            }
+
+class LimiteurSheets:
+    """Limiteur de débit partagé : un seau pour les lectures, un pour les écritures"""
+    
+    def __init__(self, lectures_minute: int = QUOTA_LECTURE_MINUTE, ecritures_minute: int = QUOTA_ECRITURE_MINUTE):
+        self.seaux = {
+            'lecture': SeauJetons('lecture', lectures_minute),
+            'ecriture': SeauJetons('ecriture', ecritures_minute)
+        }
+    
+    def appeler(self, type_appel: str, fonction, *args, **kwargs):
+        """Exécute un appel API après avoir obtenu un jeton du seau correspondant"""
+        seau = self.seaux[type_appel]
+        seau.acquerir()
+        try:
+            return fonction(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if getattr(e.response, 'status_code', None) == 429:
+                seau.penaliser()
+            raise
+    
+    def statistiques(self) -> Dict[str, Any]:
+        return {nom: seau.statistiques() for nom, seau in self.seaux.items()}
+
+# Limiteur partagé par toutes les instances (le quota est par compte de service)
+limiteur_sheets = LimiteurSheets()
+
+class FileEcritureDifferee:
+    """File d'attente write-behind : regroupe les lignes à ajouter en un seul appel"""
+    
+    def __init__(self, ecrire_lignes, rejeter_lignes=None,
+                 taille_lot: int = WRITE_BEHIND_BATCH, delai: float = WRITE_BEHIND_DELAI):
+        self._ecrire_lignes = ecrire_lignes    # callable(List[List[Any]])
+        self._rejeter_lignes = rejeter_lignes  # callable(List[List[Any]], Exception)
+        self._politique = PolitiqueRetry()
+        self.lignes_rejetees = 0
+        self.taille_lot = taille_lot
+        self.delai = delai
+        self._lignes: List[List[Any]] = []
+        self._premier_ajout = 0.0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.running = False
+    
+    def _demarrer(self):
+        """Démarre le thread d'écriture (au premier ajout)"""
+        if self._thread is None or not self._thread.is_alive():
+            self.running = True
+            self._thread = threading.Thread(target=self._boucle, daemon=True)
+            self._thread.start()
+    
+    def ajouter(self, ligne: List[Any]):
+        """Ajoute une ligne à la file (non bloquant)"""
+        with self._condition:
+            if not self._lignes:
+                self._premier_ajout = time.time()
+            self._lignes.append(ligne)
+            self._demarrer()
+            if len(self._lignes) >= self.taille_lot:
+                self._condition.notify()
+    
+    def taille(self) -> int:
+        """Nombre de lignes en attente d'écriture"""
+        with self._condition:
+            return len(self._lignes)
+    
+    def lignes_en_attente(self) -> List[List[Any]]:
+        """Copie des lignes non encore écrites"""
+        with self._condition:
+            return list(self._lignes)
+    
+    def vider(self) -> int:
+        """Écrit immédiatement toutes les lignes en attente, retourne le nombre écrit"""
+        with self._flush_lock:
+            with self._condition:
+                lignes = self._lignes
+                self._lignes = []
+            
+            if not lignes:
+                return 0
+            
+            try:
+                self._ecrire_lignes(lignes)
+                return len(lignes)
+            except Exception as e:
+                if self._politique.est_retryable(e):
+                    self._remettre_en_file(lignes)
+                    print(f"❌ Écriture différée échouée ({len(lignes)} lignes conservées): {e}")
+                    return 0
+                print(f"❌ Écriture différée refusée ({len(lignes)} lignes): {e}")
+                return self._isoler_rejets(lignes, e)
+    
+    def _remettre_en_file(self, lignes: List[List[Any]]):
+        """Remet des lignes en tête de file pour la prochaine tentative"""
+        with self._condition:
+            self._lignes = lignes + self._lignes
+            self._premier_ajout = time.time()
+    
+    def _isoler_rejets(self, lignes: List[List[Any]], erreur: Exception) -> int:
+        """Erreur définitive (400, 403...) : les lignes ne sont pas remises en file
+        
+        Une requête invalide (400) peut venir d'une seule ligne du lot : les
+        lignes sont alors réécrites une à une pour ne rejeter que les fautives.
+        
+        Returns:
+            Nombre de lignes écrites
+        """
+        ecrites = 0
+        rejetees = []
+        if len(lignes) > 1 and PolitiqueRetry._code_http(erreur) == 400:
+            for position, ligne in enumerate(lignes):
+                try:
+                    self._ecrire_lignes([ligne])
+                    ecrites += 1
+                except Exception as e:
+                    if self._politique.est_retryable(e):
+                        self._remettre_en_file(lignes[position:])
+                        break
+                    rejetees.append(ligne)
+                    erreur = e
+        else:
+            rejetees = lignes
+        
+        if rejetees:
+            self.lignes_rejetees += len(rejetees)
+            print(f"🚫 {len(rejetees)} ligne(s) rejetée(s) définitivement par Google Sheets: {erreur}")
+            if self._rejeter_lignes is not None:
+                try:
+                    self._rejeter_lignes(rejetees, erreur)
+                except Exception as e:
+                    print(f"❌ Conservation des lignes rejetées échouée: {e}")
+        return ecrites
+    
+    def _boucle(self):
+        """Déclenche l'écriture sur seuil de taille ou de délai"""
+        while self.running:
+            with self._condition:
+                if not self._lignes:
+                    self._condition.wait(timeout=self.delai)
+                    continue
+                
+                restant = self.delai - (time.time() - self._premier_ajout)
+                if len(self._lignes) < self.taille_lot and restant > 0:
+                    self._condition.wait(timeout=restant)
+                    continue
+            
+            self.vider()
+    
+    def arreter(self) -> int:
+        """Arrête le thread après avoir écrit les lignes en attente"""
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+        return self.vider()
+
 class GoogleSheetsDB:
-    """Classe pour gérer Google Sheets comme DB"""
+    """Classe pour gérer Google Sheets comme DB
     
-    def __init__(self):
+    Args:
+        nom_feuille: titre de la feuille à utiliser (créée si absente) ;
+            None pour la première feuille du classeur
+        parent: instance dont le client et le classeur sont partagés
+    """
+    
+    def __init__(self, nom_feuille: Optional[str] = None, parent: Optional['GoogleSheetsDB'] = None):
         self.client = None
         self.sheet = None
         self.worksheet = None
         self.initialized = False
-        self._init_client()
+        self.nom_feuille = nom_feuille
+        self.parent = parent
+        
+        # Cache de l'historique
+        self._cache_df = None
+        self._cache_time = 0.0
+        self._cache_lock = threading.Lock()
+        self._cache_invalide = False
+        self._generation = 0
+        self._refresh_en_cours = False
+        
+        # Synchronisation incrémentale (le sheet ne grandit que par ajouts)
+        self._sync_lock = threading.RLock()
+        self._entetes: List[str] = list(COLUMNS)
+        self._index_entetes: Dict[str, int] = {}  # en-tête → numéro de colonne (1-based)
+        self._entetes_lock = threading.Lock()
+        self._definir_entetes(self._entetes)
+        self._lignes_synchronisees = 0
+        self._resync_complete = True
+        self._derniere_maj_mutables = 0.0
+        
+        # Cache des lectures projetées {colonne: (horodatage, valeurs)}
+        self._cache_colonnes: Dict[str, Any] = {}
+        
+        # Index clé stable (id_post / post_id) → numéro de ligne du sheet
+        self._index_cles: Dict[str, int] = {}
+        # Changements du contenu venus d'autres processus (voir version_externe)
+        self._version_externe = 0
+        self._ids_propres: Set[str] = set()
+        self._marqueur = f"{MARQUEUR_SUPPRESSIONS}.{nom_feuille}" if nom_feuille else MARQUEUR_SUPPRESSIONS
+        self._signature_marqueur = self._lire_marqueur()
+        
+        # Index inversé pour rechercher_posts
+        self.index_recherche = IndexRecherche()
+        
+        # Écriture différée des nouveaux posts
+        self._file_ecriture = FileEcritureDifferee(self._ajouter_lignes, self._rejeter_lignes)
+        
+        if parent is not None:
+            self.client = parent.client
+        else:
+            self._init_client()
     
     def _init_client(self):
         """Initialise le client Google Sheets"""
@@ -96,6 +503,14 @@ class GoogleSheetsDB:
             print(f"❌ Erreur initialisation Google Sheets: {e}")
             self.client = None
     
+    def _lire(self, fonction, *args, **kwargs):
+        """Appel API de lecture, soumis au quota de lecture"""
+        return limiteur_sheets.appeler('lecture', fonction, *args, **kwargs)
+    
+    def _ecrire(self, fonction, *args, **kwargs):
+        """Appel API d'écriture, soumis au quota d'écriture"""
+        return limiteur_sheets.appeler('ecriture', fonction, *args, **kwargs)
+    
     def get_or_create_sheet(self, sheet_name: str = None, sheet_id: str = None):
         """Récupère ou crée le sheet"""
         if not self.client:
@@ -103,43 +518,66 @@ class GoogleSheetsDB:
             return None
         
         try:
-            sheet_name = sheet_name or os.environ.get('GOOGLE_SHEET_NAME', 'Agent IA Ben Tech - Historique')
-            sheet_id = sheet_id or os.environ.get('GOOGLE_SHEET_ID')
+            if self.parent is not None:
+                # Classeur partagé avec l'instance parente
+                if not self.parent.initialized:
+                    self.parent.get_or_create_sheet(sheet_name, sheet_id)
+                self.sheet = self.parent.sheet
+                if self.sheet is None:
+                    return None
+            else:
+                sheet_name = sheet_name or os.environ.get('GOOGLE_SHEET_NAME', 'Agent IA Ben Tech - Historique')
+                sheet_id = sheet_id or os.environ.get('GOOGLE_SHEET_ID')
             
-            # Essayer d'ouvrir par ID si fourni
-            if sheet_id and sheet_id != "YOUR_SHEET_ID":
-                self.sheet = self.client.open_by_key(sheet_id)
-                print(f"✅ Sheet ouvert par ID: {self.sheet.title}")
+                # Essayer d'ouvrir par ID si fourni
+                if sheet_id and sheet_id != "YOUR_SHEET_ID":
+                    self.sheet = self._lire(self.client.open_by_key, sheet_id)
+                    print(f"✅ Sheet ouvert par ID: {self.sheet.title}")
             
-            else:
-                # Chercher par nom
-                try:
-                    self.sheet = self.client.open(sheet_name)
-                    print(f"✅ Sheet trouvé par nom: {self.sheet.title}")
-                except gspread.SpreadsheetNotFound:
-                    # Créer un nouveau sheet
-                    print(f"📝 Création d'un nouveau sheet: {sheet_name}")
-                    self.sheet = self.client.create(sheet_name)
+                else:
+                    # Chercher par nom
+                    try:
+                        self.sheet = self._lire(self.client.open, sheet_name)
+                        print(f"✅ Sheet trouvé par nom: {self.sheet.title}")
+                    except gspread.SpreadsheetNotFound:
+                        # Créer un nouveau sheet
+                        print(f"📝 Création d'un nouveau sheet: {sheet_name}")
+                        self.sheet = self._ecrire(self.client.create, sheet_name)
                     
-                    # Partager avec votre email (optionnel)
-                    your_email = os.environ.get('YOUR_EMAIL')
-                    if your_email:
-                        self.sheet.share(your_email, perm_type='user', role='writer')
+                        # Partager avec votre email (optionnel)
+                        your_email = os.environ.get('YOUR_EMAIL')
+                        if your_email:
+                            self._ecrire(self.sheet.share, your_email, perm_type='user', role='writer')
                     
-                    print(f"✅ Nouveau sheet créé: {self.sheet.title}")
-                    print(f"📊 Sheet ID: {self.sheet.id}")
-                    print(f"🔗 URL: https://docs.google.com/spreadsheets/d/{self.sheet.id}")
+                        print(f"✅ Nouveau sheet créé: {self.sheet.title}")
+                        print(f"📊 Sheet ID: {self.sheet.id}")
+                        print(f"🔗 URL: https://docs.google.com/spreadsheets/d/{self.sheet.id}")
             
-            # Utiliser la première feuille
-            self.worksheet = self.sheet.sheet1
+            if self.nom_feuille:
+                # Feuille nommée (partition), créée au besoin
+                try:
+                    self.worksheet = self._lire(self.sheet.worksheet, self.nom_feuille)
+                except gspread.WorksheetNotFound:
+                    print(f"📝 Création de la feuille: {self.nom_feuille}")
+                    self.worksheet = self._ecrire(self.sheet.add_worksheet, title=self.nom_feuille,
+                                                  rows=1000, cols=len(COLUMNS))
+            else:
+                # Utiliser la première feuille
+                self.worksheet = self._lire(self.sheet.get_worksheet, 0)
             
             # Vérifier/initialiser les en-têtes
-            headers = self.worksheet.row_values(1)
-            if not headers or len(headers) < len(COLUMNS):
+            headers = self._lire(self.worksheet.row_values, 1)
+            if not headers:
                 print("📋 Initialisation des colonnes...")
-                self.worksheet.update('A1:R1', [COLUMNS])
-                self.worksheet.format('A1:R1', {'textFormat': {'bold': True}})
+                plage = f"A1:{self._lettre_colonne(len(COLUMNS))}1"
+                self._ecrire(self.worksheet.update, plage, [COLUMNS])
+                self._ecrire(self.worksheet.format, plage, {'textFormat': {'bold': True}})
                 print("✅ Colonnes initialisées")
+                headers = list(COLUMNS)
+            self._definir_entetes(headers)
+            
+            # Schéma évolutif : les colonnes manquantes sont ajoutées à la fin
+            self._assurer_colonnes(COLUMNS)
             
             self.initialized = True
             return self.sheet
@@ -148,36 +586,509 @@ class GoogleSheetsDB:
             print(f"❌ Erreur lors de l'accès au sheet: {e}")
             return None
     
+    def _lettre_colonne(self, col_index: int) -> str:
+        """Lettre A1 d'une colonne (1-based)"""
+        return rowcol_to_a1(1, col_index)[:-1]
+    
+    def _definir_entetes(self, entetes: List[str]):
+        """Enregistre les en-têtes du sheet et reconstruit la table en-tête → colonne"""
+        self._entetes = list(entetes)
+        index = {}
+        for position, nom in enumerate(self._entetes, start=1):
+            if nom and nom not in index:
+                index[nom] = position
+        self._index_entetes = index
+    
+    def _colonnes_ordonnees(self) -> List[str]:
+        """COLUMNS puis les colonnes ajoutées au sheet (champs de publication...)"""
+        return COLUMNS + [col for col in self._index_entetes if col not in COLUMNS]
+    
+    def _assurer_colonnes(self, colonnes: List[str]) -> List[str]:
+        """Ajoute au sheet les en-têtes absents (un seul appel API)
+        
+        Returns:
+            Colonnes ajoutées
+        """
+        with self._entetes_lock:
+            manquantes = list(dict.fromkeys(
+                str(col) for col in colonnes
+                if str(col).strip() and str(col) not in self._index_entetes
+            ))
+            if not manquantes:
+                return []
+            
+            premiere = len(self._entetes) + 1
+            derniere = premiere + len(manquantes) - 1
+            if self.worksheet.col_count < derniere:
+                self._ecrire(self.worksheet.add_cols, derniere - self.worksheet.col_count)
+            self._ecrire(self.worksheet.update,
+                         f"{rowcol_to_a1(1, premiere)}:{rowcol_to_a1(1, derniere)}", [manquantes])
+            self._definir_entetes(self._entetes + manquantes)
+        
+        with self._cache_lock:
+            if self._cache_df is not None:
+                df = self._cache_df.copy()
+                for col in manquantes:
+                    df[col] = ""
+                self._cache_df = df
+        
+        print(f"📋 Colonne(s) ajoutée(s) au sheet: {', '.join(manquantes)}")
+        return manquantes
+    
+    def _construire_df(self, rows: List[List[Any]]) -> pd.DataFrame:
+        """Construit un DataFrame à partir de lignes brutes du sheet"""
+        entetes = self._entetes or COLUMNS
+        largeur = len(entetes)
+        data = [
+            numericise_all((list(row) + [''] * largeur)[:largeur], empty2zero=False, default_blank="")
+            for row in rows
+        ]
+        df = pd.DataFrame(data, columns=range(largeur))
+        
+        # Colonnes nommées uniquement (première occurrence de chaque en-tête)
+        colonnes = self._colonnes_ordonnees()
+        return pd.DataFrame({
+            col: df[self._index_entetes[col] - 1] if col in self._index_entetes else ""
+            for col in colonnes
+        }, index=df.index, columns=colonnes)
+    
     @retry_on_failure(max_retries=3, delay=2)
-    def lire_historique(self) -> pd.DataFrame:
-        """Lit l'historique depuis Google Sheets"""
-        if not self.initialized:
-            self.get_or_create_sheet()
+    def _charger_historique(self) -> pd.DataFrame:
+        """Télécharge l'historique complet depuis Google Sheets (resynchronisation)"""
+        values = self._lire(self.worksheet.get_all_values)
         
-        if not self.initialized or not self.worksheet:
-            print("⚠️ Google Sheets non disponible, retour DataFrame vide")
-            return pd.DataFrame(columns=COLUMNS)
+        self._definir_entetes(values[0] if values else list(COLUMNS))
+        rows = values[1:]
+        self._lignes_synchronisees = len(rows)
+        self._derniere_maj_mutables = time.time()
+        
+        if not rows:
+            print("📊 Sheet vide, aucune donnée")
+        else:
+            print(f"✅ {len(rows)} posts chargés depuis Google Sheets")
+        return self._construire_df(rows)
+    
+    @retry_on_failure(max_retries=3, delay=2)
+    def _charger_nouvelles_lignes(self) -> pd.DataFrame:
+        """Télécharge uniquement les lignes ajoutées après la dernière ligne synchronisée"""
+        # +2 car: ligne 1 = en-têtes, première ligne non synchronisée ensuite
+        premiere = self._lignes_synchronisees + 2
+        derniere_col = self._lettre_colonne(len(self._entetes))
+        rows = [list(row) for row in self._lire(self.worksheet.get, f"A{premiere}:{derniere_col}")]
+        if rows == [[]]:
+            rows = []
+        
+        if rows:
+            print(f"✅ {len(rows)} nouveau(x) post(s) synchronisé(s) depuis Google Sheets")
+        return self._construire_df(rows)
+    
+    @retry_on_failure(max_retries=3, delay=2)
+    def _charger_colonnes_mutables(self, nb_lignes: int) -> Dict[str, List[Any]]:
+        """Relit les colonnes modifiables (engagement, publication) des lignes déjà synchronisées"""
+        # Colonnes de publication éventuellement ajoutées au sheet par un autre processus
+        entetes = self._lire(self.worksheet.row_values, 1)
+        if len(entetes) > len(self._entetes):
+            with self._entetes_lock:
+                self._definir_entetes(entetes)
+        
+        colonnes = [col for col in COLONNES_MUTABLES if col in self._index_entetes]
+        if not colonnes or nb_lignes == 0:
+            return {}
+        
+        plages = []
+        for col in colonnes:
+            lettre = self._lettre_colonne(self._index_entetes[col])
+            plages.append(f"{lettre}2:{lettre}{nb_lignes + 1}")
+        
+        resultats = self._lire(self.worksheet.batch_get, plages)
+        
+        valeurs = {}
+        for col, plage in zip(colonnes, resultats):
+            colonne = [row[0] if row else '' for row in plage]
+            colonne = (colonne + [''] * nb_lignes)[:nb_lignes]
+            valeurs[col] = numericise_all(colonne, empty2zero=False, default_blank="")
+        return valeurs
+    
+    def _indexer_lignes(self, df: pd.DataFrame, premiere_ligne: int):
+        """Ajoute à l'index clé → ligne les lignes d'un DataFrame (appelé sous _cache_lock)"""
+        for col in COLONNES_CLES:
+            if col not in df.columns:
+                continue
+            for offset, cle in enumerate(df[col].tolist()):
+                if cle is not None and str(cle).strip() != '':
+                    self._index_cles[str(cle)] = premiere_ligne + offset
+    
+    def _identifiant_deterministe(self, row_num: int, titre: Any, date: Any) -> str:
+        """id_post dérivé de la feuille, de la ligne et du contenu : tous les
+        workers qui complètent la même ligne calculent le même identifiant"""
+        return uuid.uuid5(NAMESPACE_ID_POST, f"{self.nom_feuille or ''}|{row_num}|{titre}|{date}").hex
+    
+    def _attribuer_identifiants(self, df: pd.DataFrame, premiere_ligne: int) -> pd.DataFrame:
+        """Attribue un id_post aux lignes qui n'en ont pas (anciennes lignes), en un seul appel
+        
+        Les identifiants sont déterministes : si plusieurs workers complètent
+        les mêmes lignes en même temps, ils écrivent les mêmes valeurs.
+        """
+        if "id_post" not in self._index_entetes or df.empty:
+            return df
+        
+        manquants = [i for i, cle in enumerate(df["id_post"].tolist()) if str(cle).strip() == '']
+        if not manquants:
+            return df
+        
+        complete = df.copy()
+        data = []
+        titres = df["titre"].tolist() if "titre" in df.columns else [''] * len(df)
+        dates = df["date"].tolist() if "date" in df.columns else [''] * len(df)
+        for i in manquants:
+            uid = self._identifiant_deterministe(premiere_ligne + i, titres[i], dates[i])
+            complete.iat[i, complete.columns.get_loc("id_post")] = uid
+            data.extend(self._plages_ligne(premiere_ligne + i, {"id_post": uid}))
         
         try:
-            # Récupérer toutes les données (sauf la ligne d'en-tête)
-            data = self.worksheet.get_all_records()
+            self._envoyer_batch_update(data)
+            print(f"🔑 {len(manquants)} identifiant(s) id_post attribué(s)")
+        except Exception as e:
+            # Identifiants gardés dans le cache (recherche, adressage par ligne) ;
+            # l'écriture sera retentée à la prochaine resynchronisation complète
+            print(f"⚠️ Attribution des identifiants échouée: {e}")
+        return complete
+    
+    def _rafraichir_cache(self) -> pd.DataFrame:
+        """Synchronise le cache : lignes nouvelles uniquement, resynchronisation complète si besoin"""
+        with self._sync_lock:
+            with self._cache_lock:
+                base = self._cache_df
+                generation = self._generation
+                resync = self._resync_complete or base is None
             
-            if not data:
-                print("📊 Sheet vide, aucune donnée")
-                return pd.DataFrame(columns=COLUMNS)
+            externe = False
+            if resync:
+                df = self._charger_historique()
+                df = self._attribuer_identifiants(df, 2)
+                nouvelles = df
+                premiere_ligne = 2
+                externe = True
+            else:
+                df = base
+                
+                # Colonnes modifiables (engagement, publication) : rafraîchies à une cadence plus lente
+                if time.time() - self._derniere_maj_mutables >= MUTABLES_REFRESH:
+                    mutables = self._charger_colonnes_mutables(self._lignes_synchronisees)
+                    if mutables:
+                        # Les mises à jour de ce processus sont déjà dans le cache
+                        externe = any(
+                            col not in df.columns or [str(v) for v in df[col].tolist()] != [str(v) for v in valeurs]
+                            for col, valeurs in mutables.items()
+                        )
+                        df = df.copy()
+                        for col, valeurs in mutables.items():
+                            df[col] = valeurs
+                        # post_id attribués à la publication par d'autres processus
+                        if "post_id" in mutables:
+                            with self._cache_lock:
+                                self._indexer_lignes(df[["post_id"]], 2)
+                    self._derniere_maj_mutables = time.time()
+                
+                premiere_ligne = self._lignes_synchronisees + 2
+                nouvelles = self._charger_nouvelles_lignes()
+                if not nouvelles.empty:
+                    nouvelles = self._attribuer_identifiants(nouvelles, premiere_ligne)
+                    ids = nouvelles["id_post"].astype(str).tolist() if "id_post" in nouvelles.columns else ['']
+                    externe = externe or any(cle not in self._ids_propres for cle in ids)
+                    df = pd.concat([df, nouvelles], ignore_index=True).fillna("")
+                    self._lignes_synchronisees += len(nouvelles)
             
-            df = pd.DataFrame(data)
+            if resync:
+                self.index_recherche.reconstruire(df.to_dict('records'))
+            else:
+                for post in nouvelles.to_dict('records'):
+                    self.index_recherche.ajouter(post.get("id_post"), post)
             
-            # S'assurer que toutes les colonnes existent
-            for col in COLUMNS:
-                if col not in df.columns:
-                    df[col] = ""
+            with self._cache_lock:
+                if resync:
+                    self._index_cles = {}
+                if externe:
+                    self._version_externe += 1
+                self._indexer_lignes(nouvelles, premiere_ligne)
+                self._cache_df = df
+                self._cache_time = time.time()
+                # Une invalidation survenue pendant le chargement impose une nouvelle synchronisation
+                if self._generation == generation:
+                    self._cache_invalide = False
+                    self._resync_complete = False
+            return df
+    
+    def _rafraichir_en_arriere_plan(self):
+        """Rafraîchit le cache dans un thread (une seule fois à la fois)"""
+        with self._cache_lock:
+            if self._refresh_en_cours:
+                return
+            self._refresh_en_cours = True
+        
+        def _worker():
+            try:
+                self._rafraichir_cache()
+            except Exception as e:
+                print(f"⚠️ Rafraîchissement du cache échoué: {e}")
+            finally:
+                with self._cache_lock:
+                    self._refresh_en_cours = False
+        
+        threading.Thread(target=_worker, daemon=True).start()
+    
+    def version_externe(self) -> int:
+        """Jeton qui change quand une synchronisation du cache apporte des
+        lignes ou des valeurs écrites par un autre processus (les écritures de
+        ce processus ne le modifient pas ; une resynchronisation complète, si)"""
+        with self._cache_lock:
+            return self._version_externe
+    
+    def invalider_cache(self, resync_complete: bool = False):
+        """Invalide le cache de l'historique (après une écriture)
+        
+        Args:
+            resync_complete: True si les positions de lignes ont changé (suppression),
+                la prochaine lecture retélécharge alors tout le sheet
+        """
+        with self._cache_lock:
+            self._cache_invalide = True
+            self._cache_colonnes = {}
+            self._generation += 1
+            if resync_complete:
+                self._resync_complete = True
+                # Numéros de ligne périmés : l'index est reconstruit par la resynchronisation
+                self._index_cles = {}
+    
+    def _lire_marqueur(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self._marqueur)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _signaler_suppression(self):
+        """Réécrit le marqueur de suppression pour les autres processus"""
+        try:
+            with open(self._marqueur, 'w') as f:
+                f.write(f"{os.getpid()} {time.time()}\n")
+            self._signature_marqueur = self._lire_marqueur()
+        except OSError as e:
+            print(f"⚠️ Marqueur de suppression non écrit: {e}")
+    
+    def _verifier_suppressions(self):
+        """Resynchronisation complète si un autre processus a supprimé des lignes"""
+        signature = self._lire_marqueur()
+        if signature != self._signature_marqueur:
+            self._signature_marqueur = signature
+            print("🔄 Lignes supprimées par un autre processus, resynchronisation complète")
+            self.invalider_cache(resync_complete=True)
+    
+    def _patcher_cache(self, updates_par_ligne: Dict[int, Dict[str, Any]]):
+        """Applique au cache et à l'index des mises à jour déjà écrites dans le sheet
+        
+        Sous _sync_lock : un rafraîchissement en cours (réplique, arrière-plan)
+        repartirait du cache d'avant la mise à jour et l'écraserait
+        """
+        with self._sync_lock, self._cache_lock:
+            for row_num, updates in updates_par_ligne.items():
+                for key, value in updates.items():
+                    self._cache_colonnes.pop(key, None)
+                    if key in COLONNES_CLES and value not in (None, ''):
+                        self._index_cles[str(value)] = row_num
+            
+            if self._cache_df is None:
+                return
+            df = self._cache_df.copy()
+            for row_num, updates in updates_par_ligne.items():
+                index = row_num - 2
+                if not 0 <= index < len(df):
+                    continue
+                for key, value in updates.items():
+                    if key in self._index_entetes:
+                        if key not in df.columns:
+                            df[key] = ""
+                        df.at[index, key] = '' if value is None else value
+                if any(key in self.index_recherche.champs for key in updates):
+                    post = df.iloc[index].to_dict()
+                    self.index_recherche.ajouter(post.get("id_post"), post)
+            self._cache_df = df
+    
+    def _retirer_lignes_cache(self, blocs: List[List[int]]):
+        """Retire des blocs de lignes supprimées [première, dernière] du cache et
+        décale l'index des clés (sans relecture du sheet)"""
+        supprimees = sorted(ligne for debut, fin in blocs for ligne in range(debut, fin + 1))
+        ensemble = set(supprimees)
+        with self._sync_lock, self._cache_lock:
+            self._cache_colonnes = {}
+            # Chaque ligne remonte du nombre de lignes supprimées au-dessus d'elle
+            self._index_cles = {
+                cle: ligne - bisect.bisect_left(supprimees, ligne)
+                for cle, ligne in self._index_cles.items() if ligne not in ensemble
+            }
             
-            print(f"✅ {len(df)} posts chargés depuis Google Sheets")
-            return df[COLUMNS]  # Retourner dans le bon ordre
+            positions = [ligne - 2 for ligne in supprimees]
+            if self._cache_df is not None and all(0 <= p < self._lignes_synchronisees for p in positions):
+                for id_post in self._cache_df["id_post"].iloc[positions].tolist():
+                    self.index_recherche.retirer(id_post)
+                self._cache_df = self._cache_df.drop(index=positions).reset_index(drop=True)
+                self._lignes_synchronisees -= len(positions)
+            else:
+                self._cache_invalide = True
+            self._generation += 1
+        self._signaler_suppression()
+    
+    def lire_historique(self, columns: Optional[List[str]] = None,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None,
+                        lever_erreurs: bool = False) -> pd.DataFrame:
+        """Lit l'historique depuis Google Sheets (avec cache mémoire)
+        
+        Args:
+            columns: colonnes à lire (lecture projetée, seules ces colonnes
+                sont téléchargées) ; None pour toutes les colonnes
+            date_debut, date_fin: bornes optionnelles sur la colonne date
+            lever_erreurs: True pour lever une exception si le sheet n'a pas
+                pu être lu, au lieu de retourner un DataFrame vide ou le cache
+        """
+        if columns:
+            df = self._lire_colonnes(colonnes_lecture_datee(columns, date_debut, date_fin), lever_erreurs)
+        else:
+            df = self._lire_historique_cache(lever_erreurs)
+        
+        # Inclure les posts encore dans la file d'écriture différée
+        en_attente = self._file_ecriture.lignes_en_attente()
+        if en_attente:
+            # Lignes écrites dans l'ordre des en-têtes (qui ne font que s'allonger)
+            entetes = self._colonnes_ordonnees()
+            df_attente = pd.DataFrame(
+                [self._post_depuis_ligne(row) for row in en_attente], columns=entetes
+            ).fillna("")
+            for col in df.columns:
+                if col not in df_attente.columns:
+                    df_attente[col] = ""
+            df = pd.concat([df, df_attente[list(df.columns)]], ignore_index=True)
+        
+        return filtrer_lecture_datee(df, columns, date_debut, date_fin)
+    
+    @retry_on_failure(max_retries=3, delay=2)
+    def _charger_colonnes(self, colonnes: List[str]) -> Dict[str, List[Any]]:
+        """Télécharge des colonnes entières en un seul appel batch_get"""
+        plages = []
+        for col in colonnes:
+            lettre = self._lettre_colonne(self._index_entetes[col])
+            plages.append(f"{lettre}2:{lettre}")
+        
+        resultats = self._lire(self.worksheet.batch_get, plages)
+        
+        valeurs = {}
+        for col, plage in zip(colonnes, resultats):
+            colonne = [row[0] if row else '' for row in plage]
+            valeurs[col] = numericise_all(colonne, empty2zero=False, default_blank="")
+        return valeurs
+    
+    def _lire_colonnes(self, columns: List[str], lever_erreurs: bool = False) -> pd.DataFrame:
+        """Lecture projetée : sert le cache complet s'il est frais, sinon ne télécharge que les colonnes demandées"""
+        if not self.initialized:
+            self.get_or_create_sheet()
+        
+        if not self.initialized or not self.worksheet:
+            if lever_erreurs:
+                raise RuntimeError("Google Sheets non disponible")
+            print("⚠️ Google Sheets non disponible, retour DataFrame vide")
+            return pd.DataFrame(columns=columns)
+        
+        self._verifier_suppressions()
+        
+        # Comme la lecture complète : seules les colonnes connues du sheet sont retournées
+        columns = [col for col in columns if col in COLUMNS or col in self._index_entetes]
+        
+        with self._cache_lock:
+            df_cache = self._cache_df
+            frais = df_cache is not None and not self._cache_invalide and time.time() - self._cache_time < CACHE_TTL
+            if frais:
+                return df_cache[[c for c in columns if c in df_cache.columns]].reindex(columns=columns, fill_value="")
             
+            maintenant = time.time()
+            generation = self._generation
+            manquantes = [
+                col for col in columns
+                if col in self._index_entetes and (
+                    col not in self._cache_colonnes
+                    or maintenant - self._cache_colonnes[col][0] >= CACHE_TTL
+                )
+            ]
+            # "titre" (obligatoire) sert de référence pour le nombre de lignes
+            if manquantes and "titre" in self._index_entetes and "titre" not in self._cache_colonnes:
+                manquantes.append("titre")
+        
+        if manquantes:
+            try:
+                valeurs = self._charger_colonnes(manquantes)
+                print(f"✅ Lecture projetée de {len(manquantes)} colonne(s) depuis Google Sheets")
+                with self._cache_lock:
+                    if self._generation == generation:
+                        for col, colonne in valeurs.items():
+                            self._cache_colonnes[col] = (maintenant, colonne)
+            except Exception as e:
+                print(f"❌ Erreur lecture projetée Google Sheets: {e}")
+                if lever_erreurs:
+                    raise
+                if df_cache is not None:
+                    return df_cache[[c for c in columns if c in df_cache.columns]].reindex(columns=columns, fill_value="")
+                return pd.DataFrame(columns=columns)
+        else:
+            valeurs = {}
+        
+        with self._cache_lock:
+            colonnes = {col: self._cache_colonnes[col][1] for col in self._cache_colonnes}
+        colonnes.update(valeurs)
+        
+        nb_lignes = max([len(colonnes[col]) for col in colonnes] or [0])
+        data = {}
+        for col in columns:
+            valeurs_col = colonnes.get(col, [])
+            data[col] = list(valeurs_col) + [''] * (nb_lignes - len(valeurs_col))
+        return pd.DataFrame(data, columns=columns)
+    
+    def _lire_historique_cache(self, lever_erreurs: bool = False, copier: bool = True) -> pd.DataFrame:
+        """Lecture de l'historique écrit dans le sheet, via le cache mémoire
+        
+        copier=False retourne le DataFrame du cache lui-même (lecture seule)
+        """
+        copie = (lambda df: df.copy()) if copier else (lambda df: df)
+        if not self.initialized:
+            self.get_or_create_sheet()
+        
+        if not self.initialized or not self.worksheet:
+            if lever_erreurs:
+                raise RuntimeError("Google Sheets non disponible")
+            print("⚠️ Google Sheets non disponible, retour DataFrame vide")
+            return pd.DataFrame(columns=COLUMNS)
+        
+        self._verifier_suppressions()
+        with self._cache_lock:
+            df_cache = self._cache_df
+            age = time.time() - self._cache_time
+            invalide = self._cache_invalide
+        
+        if df_cache is not None and not invalide:
+            if age < CACHE_TTL:
+                return copie(df_cache)
+            if age < CACHE_TTL + CACHE_STALE_TTL:
+                # Servir la version périmée et rafraîchir en arrière-plan
+                self._rafraichir_en_arriere_plan()
+                return copie(df_cache)
+        
+        try:
+            return copie(self._rafraichir_cache())
         except Exception as e:
             print(f"❌ Erreur lecture Google Sheets: {e}")
+            if lever_erreurs:
+                raise
+            if df_cache is not None:
+                print("♻️ Retour de la dernière version en cache")
+                return copie(df_cache)
             return pd.DataFrame(columns=COLUMNS)
     
     def valider_post(self, post: Dict[str, Any]) -> List[str]:
@@ -226,27 +1137,26 @@ class GoogleSheetsDB:
             return False
         
         try:
+            # Identifiant stable du post (adressage sans relecture du sheet)
+            if not post.get('id_post'):
+                post['id_post'] = uuid.uuid4().hex
+            
             # Formatage automatique des dates
             if 'date' in post and isinstance(post['date'], datetime):
                 post['date'] = post['date'].strftime('%Y-%m-%d %H:%M:%S')
             
-            # Préparer la ligne dans l'ordre des colonnes
-            row = []
-            for col in COLUMNS:
-                value = post.get(col, '')
-                
-                # Gérer les valeurs None
-                if value is None:
-                    value = ''
-                
-                # Limiter la longueur des textes longs
-                if isinstance(value, str) and len(value) > 50000:
-                    value = value[:50000] + "... [truncated]"
-                
-                row.append(value)
+            row = self._ligne_post(post)
+            
+            self.index_recherche.ajouter(post['id_post'], post)
+            self._ids_propres.add(str(post['id_post']))
             
             # Ajouter la nouvelle ligne
-            self.worksheet.append_row(row)
+            if WRITE_BEHIND:
+                self._file_ecriture.ajouter(row)
+                print(f"📥 Post en file d'écriture Google Sheets: {post.get('titre', 'N/A')}")
+                return True
+            
+            self._ajouter_lignes([row])
             
             print(f"✅ Post sauvegardé dans Google Sheets: {post.get('titre', 'N/A')}")
             return True
@@ -255,57 +1165,289 @@ class GoogleSheetsDB:
             print(f"❌ Erreur sauvegarde Google Sheets: {e}")
             return False
     
+    def _ligne_post(self, post: Dict[str, Any]) -> List[Any]:
+        """Prépare la ligne d'un post dans l'ordre des en-têtes (colonnes ajoutées au besoin)"""
+        self._assurer_colonnes(list(post.keys()))
+        
+        row = []
+        for col in self._entetes:
+            value = post.get(col, '') if col else ''
+            
+            # Gérer les valeurs None
+            if value is None:
+                value = ''
+            
+            # Limiter la longueur des textes longs
+            if isinstance(value, str) and len(value) > 50000:
+                value = value[:50000] + "... [truncated]"
+            
+            row.append(value)
+        return row
+    
+    def _post_depuis_ligne(self, row: List[Any]) -> Dict[str, Any]:
+        """Inverse de _ligne_post, d'après la table en-tête → colonne"""
+        return {
+            col: row[position - 1] if position <= len(row) else ''
+            for col, position in self._index_entetes.items()
+        }
+    
     @retry_on_failure(max_retries=3, delay=2)
-    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
-        """Met à jour un post existant (par index de ligne)"""
+    def _ajouter_lignes(self, rows: List[List[Any]]):
+        """Ajoute des lignes en un seul appel API"""
+        reponse = self._ecrire(self.worksheet.append_rows, rows)
+        self.invalider_cache()
+        
+        # Indexer immédiatement les nouvelles lignes d'après la plage écrite
+        plage = (reponse or {}).get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', plage)
+        if match:
+            premiere_ligne = int(match.group(1))
+            col_id = self._index_entetes["id_post"] - 1
+            with self._cache_lock:
+                for offset, row in enumerate(rows):
+                    if len(row) > col_id and row[col_id]:
+                        self._index_cles[str(row[col_id])] = premiere_ligne + offset
+        print(f"✅ {len(rows)} post(s) écrit(s) dans Google Sheets (1 appel API)")
+    
+    def _rejeter_lignes(self, rows: List[List[Any]], erreur: Exception):
+        """Lignes refusées définitivement par l'API : conservées dans le journal local"""
+        for row in rows:
+            post = self._post_depuis_ligne(row)
+            titre = post.get('titre', 'N/A')
+            print(f"🚫 Post non écrit dans Google Sheets ({erreur}): {titre}")
+            if journal_posts.contient(post.get('id_post')):
+                continue
+            journal_posts.ajouter_post(post)
+            print(f"💾 Post rejeté conservé dans le journal local: {titre}")
+    
+    def taille_file_attente(self) -> int:
+        """Nombre de posts en attente d'écriture différée"""
+        return self._file_ecriture.taille()
+    
+    def vider_file_attente(self) -> int:
+        """Force l'écriture des posts en attente (appelé aussi à l'arrêt)"""
         if not self.initialized or not self.worksheet:
-            return False
+            return 0
+        return self._file_ecriture.vider()
+    
+    def fermer(self) -> int:
+        """Arrête l'écriture différée en écrivant les posts en attente"""
+        if not self.initialized or not self.worksheet:
+            return 0
+        return self._file_ecriture.arreter()
+    
+    def _valider_updates(self, updates: Dict[str, Any]) -> Optional[str]:
+        """Validation partielle des mises à jour, retourne un message d'erreur ou None"""
+        if 'taux_conversion_estime' in updates and updates['taux_conversion_estime']:
+            try:
+                taux = float(updates['taux_conversion_estime'])
+                if not 0 <= taux <= 100:
+                    return "Le taux de conversion doit être entre 0 et 100"
+            except (ValueError, TypeError):
+                return "Le taux de conversion doit être un nombre"
+        return None
+    
+    def _plages_ligne(self, row_num: int, updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Construit les plages A1 d'une ligne (colonnes contiguës regroupées)
+        
+        Les colonnes absentes du sheet sont ajoutées aux en-têtes au préalable.
+        """
+        self._assurer_colonnes(list(updates.keys()))
+        cellules = sorted(
+            (self._index_entetes[key], '' if value is None else value)
+            for key, value in updates.items() if key in self._index_entetes
+        )
+        
+        plages = []
+        bloc = []
+        for col_index, value in cellules:
+            if bloc and col_index != bloc[-1][0] + 1:
+                plages.append(bloc)
+                bloc = []
+            bloc.append((col_index, value))
+        if bloc:
+            plages.append(bloc)
         
+        return [
+            {
+                'range': f"{rowcol_to_a1(row_num, b[0][0])}:{rowcol_to_a1(row_num, b[-1][0])}",
+                'values': [[value for _, value in b]]
+            }
+            for b in plages
+        ]
+    
+    @retry_on_failure(max_retries=3, delay=2)
+    def _envoyer_batch_update(self, data: List[Dict[str, Any]]):
+        """Envoie toutes les plages en un seul appel API"""
+        self._ecrire(self.worksheet.batch_update, data, value_input_option='USER_ENTERED')
+    
+    def _mettre_a_jour_lignes(self, updates_par_ligne: Dict[int, Dict[str, Any]]) -> bool:
+        """Met à jour plusieurs lignes du sheet (par numéro de ligne) en un seul appel batch_update"""
         try:
-            # Validation partielle des updates
-            if 'taux_conversion_estime' in updates and updates['taux_conversion_estime']:
-                try:
-                    taux = float(updates['taux_conversion_estime'])
-                    if not 0 <= taux <= 100:
-                        print("❌ Le taux de conversion doit être entre 0 et 100")
-                        return False
-                except (ValueError, TypeError):
-                    print("❌ Le taux de conversion doit être un nombre")
+            data = []
+            for row_num, updates in updates_par_ligne.items():
+                erreur = self._valider_updates(updates)
+                if erreur:
+                    print(f"❌ {erreur} (ligne {row_num})")
                     return False
+                data.extend(self._plages_ligne(row_num, updates))
             
-            # +2 car: ligne 1 = en-têtes, index 0-based => +2
-            row_num = index + 2
+            if not data:
+                print("ℹ️ Aucune colonne connue à mettre à jour")
+                return True
             
-            # Mettre à jour les cellules
-            for key, value in updates.items():
-                if key in COLUMNS:
-                    col_index = COLUMNS.index(key) + 1  # +1 car index 1-based
-                    self.worksheet.update_cell(row_num, col_index, value)
+            self._envoyer_batch_update(data)
+            self._patcher_cache(updates_par_ligne)
             
-            print(f"✅ Post ligne {row_num} mis à jour")
+            print(f"✅ {len(updates_par_ligne)} post(s) mis à jour ({len(data)} plage(s), 1 appel API)")
             return True
             
         except Exception as e:
             print(f"❌ Erreur mise à jour Google Sheets: {e}")
             return False
     
-    def rechercher_posts(self, criteres: Dict[str, Any]) -> pd.DataFrame:
-        """Recherche des posts selon des critères"""
-        df = self.lire_historique()
+    def mettre_a_jour_posts(self, updates_par_index: Dict[int, Dict[str, Any]]) -> bool:
+        """Met à jour plusieurs posts (par index de ligne) en un seul appel batch_update
         
-        if df.empty:
-            return df
+        Args:
+            updates_par_index: {index DataFrame: {colonne: valeur}}
+        """
+        if not self.initialized or not self.worksheet:
+            return False
         
+        # Les positions de lignes supposent que les ajouts en attente sont écrits
+        self.vider_file_attente()
+        
+        # +2 car: ligne 1 = en-têtes, index 0-based => +2
+        return self._mettre_a_jour_lignes({
+            index + 2: updates for index, updates in updates_par_index.items()
+        })
+    
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        """Met à jour un post existant (par index de ligne)"""
+        return self.mettre_a_jour_posts({index: updates})
+    
+    def ligne_post(self, cle: str) -> Optional[int]:
+        """Numéro de ligne d'un post d'après sa clé stable (id_post ou post_id Facebook)"""
+        if not self.initialized:
+            self.get_or_create_sheet()
+        
+        if not self.initialized or not self.worksheet:
+            return None
+        
+        self._verifier_suppressions()
+        cle = str(cle)
+        with self._cache_lock:
+            ligne = self._index_cles.get(cle)
+        if ligne:
+            return ligne
+        
+        # Clé inconnue : post encore en file d'attente ou ajouté par ailleurs
+        if self.taille_file_attente():
+            self.vider_file_attente()
+            with self._cache_lock:
+                ligne = self._index_cles.get(cle)
+            if ligne:
+                return ligne
+        try:
+            self._rafraichir_cache()
+        except Exception as e:
+            print(f"⚠️ Synchronisation impossible pour la clé {cle}: {e}")
+        
+        with self._cache_lock:
+            return self._index_cles.get(cle)
+    
+    def mettre_a_jour_posts_par_cle(self, updates_par_cle: Dict[str, Dict[str, Any]]) -> bool:
+        """Met à jour plusieurs posts (par clé stable) en un seul appel batch_update"""
+        if not self.initialized or not self.worksheet:
+            return False
+        
+        updates_par_ligne = {}
+        for cle, updates in updates_par_cle.items():
+            ligne = self.ligne_post(cle)
+            if not ligne:
+                print(f"❌ Post introuvable pour la clé: {cle}")
+                return False
+            updates_par_ligne[ligne] = updates
+        
+        return self._mettre_a_jour_lignes(updates_par_ligne)
+    
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un post existant (par clé stable)"""
+        return self.mettre_a_jour_posts_par_cle({cle: updates})
+    
+    def rechercher_posts(self, criteres: Dict[str, Any]) -> pd.DataFrame:
+        """Recherche des posts selon des critères
+        
+        Les critères texte sur les champs indexés (titre, theme, service, style,
+        texte_marketing) passent par l'index inversé : mots insensibles à la
+        casse et aux accents, recherche par préfixe. Seules les lignes trouvées
+        sont extraites du cache (par position), puis les autres critères leur
+        sont appliqués comme filtres exacts.
+        """
+        self._lire_historique_cache(copier=False)  # index alimenté par la synchronisation du cache
+        df = self._rechercher(criteres, self._ids_indexes(criteres))
+        print(f"🔍 {len(df)} posts trouvés pour les critères: {criteres}")
+        return df
+    
+    def _ids_indexes(self, criteres: Dict[str, Any]) -> Optional[Set[str]]:
+        """Intersection des résultats de l'index pour les critères texte indexés
+        (None si aucun critère n'est indexé)"""
+        ids = None
         for champ, valeur in criteres.items():
-            if champ in df.columns and valeur:
-                if isinstance(valeur, str):
-                    # Recherche textuelle insensible à la casse
-                    df = df[df[champ].astype(str).str.contains(valeur, case=False, na=False)]
+            if valeur and isinstance(valeur, str) and champ in self.index_recherche.champs:
+                trouves = self.index_recherche.rechercher(champ, valeur)
+                ids = trouves if ids is None else ids & trouves
+                if not ids:
+                    return set()
+        return ids
+    
+    def _lignes_par_ids(self, ids: Set[str]) -> pd.DataFrame:
+        """Lignes des posts d'identifiants ids : positions du cache données par
+        l'index clé → ligne, puis posts encore dans la file d'écriture différée"""
+        df = self._lire_historique_cache(copier=False)
+        positions = []
+        restants = set()
+        with self._cache_lock:
+            if self._cache_df is not None:
+                df = self._cache_df
+            colonne_ids = df.columns.get_loc("id_post") if "id_post" in df.columns else None
+            for doc_id in ids:
+                ligne = self._index_cles.get(doc_id)
+                position = ligne - 2 if ligne is not None else -1
+                if colonne_ids is not None and 0 <= position < len(df) and str(df.iat[position, colonne_ids]) == doc_id:
+                    positions.append(position)
                 else:
-                    # Recherche exacte pour les autres types
-                    df = df[df[champ] == valeur]
+                    restants.add(doc_id)
+        resultat = df.iloc[sorted(positions)].reset_index(drop=True)
         
-        print(f"🔍 {len(df)} posts trouvés pour les critères: {criteres}")
+        en_attente = [
+            post for post in map(self._post_depuis_ligne, self._file_ecriture.lignes_en_attente())
+            if str(post.get("id_post", "")) in restants
+        ] if restants else []
+        if en_attente:
+            df_attente = pd.DataFrame(en_attente).reindex(columns=resultat.columns, fill_value="")
+            resultat = pd.concat([resultat, df_attente], ignore_index=True)
+        return resultat.copy()
+    
+    def _rechercher(self, criteres: Dict[str, Any], ids: Optional[Set[str]]) -> pd.DataFrame:
+        """Lignes correspondant aux ids de l'index (toutes si None), filtrées
+        par les critères non indexés"""
+        df = self._lignes_par_ids(ids) if ids is not None else self.lire_historique()
+        
+        for champ, valeur in criteres.items():
+            if df.empty:
+                break
+            if champ not in df.columns or not valeur:
+                continue
+            if isinstance(valeur, str) and champ in self.index_recherche.champs:
+                continue
+            if isinstance(valeur, str):
+                # Recherche textuelle insensible à la casse
+                df = df[df[champ].astype(str).str.contains(valeur, case=False, na=False)]
+            else:
+                # Recherche exacte pour les autres types
+                df = df[df[champ] == valeur]
         return df
     
     @retry_on_failure(max_retries=2, delay=1)
@@ -319,7 +1461,7 @@ class GoogleSheetsDB:
         
         try:
             # Nombre de lignes de données (sans l'en-tête)
-            values = self.worksheet.get_all_values()
+            values = self._lire(self.worksheet.get_all_values)
             count = max(0, len(values) - 1)
             print(f"📊 {count} posts dans la base de données")
             return count
@@ -332,12 +1474,65 @@ class GoogleSheetsDB:
         if not self.initialized or not self.worksheet:
             return False
         
+        self.vider_file_attente()
+        
+        # +2 car: ligne 1 = en-têtes, index 0-based => +2
+        return self._supprimer_ligne(index + 2)
+    
+    def supprimer_post_par_cle(self, cle: str) -> bool:
+        """Supprime un post par sa clé stable"""
+        if not self.initialized or not self.worksheet:
+            return False
+        
+        ligne = self.ligne_post(cle)
+        if not ligne:
+            print(f"❌ Post introuvable pour la clé: {cle}")
+            return False
+        return self._supprimer_ligne(ligne)
+    
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        """Supprime plusieurs posts, un appel delete_rows par bloc de lignes contiguës
+        
+        Returns:
+            Nombre de posts supprimés
+        """
+        if not self.initialized or not self.worksheet:
+            return 0
+        
+        self.vider_file_attente()
+        lignes = sorted({ligne for ligne in (self.ligne_post(cle) for cle in cles) if ligne})
+        if not lignes:
+            return 0
+        
+        # Blocs contigus, supprimés du bas vers le haut pour garder les numéros valides
+        blocs = []
+        for ligne in lignes:
+            if blocs and ligne == blocs[-1][1] + 1:
+                blocs[-1][1] = ligne
+            else:
+                blocs.append([ligne, ligne])
+        
+        supprimes = []
         try:
-            # +2 car: ligne 1 = en-têtes, index 0-based => +2
-            row_num = index + 2
-            
-            # Supprimer la ligne
-            self.worksheet.delete_rows(row_num)
+            for debut, fin in reversed(blocs):
+                self._ecrire(self.worksheet.delete_rows, debut, fin)
+                supprimes.append([debut, fin])
+        except Exception as e:
+            print(f"❌ Erreur suppression Google Sheets: {e}")
+        finally:
+            # Seuls les blocs effectivement supprimés décalent l'index
+            if supprimes:
+                self._retirer_lignes_cache(supprimes)
+        supprimes = sum(fin - debut + 1 for debut, fin in supprimes)
+        
+        print(f"🗑️ {supprimes} posts supprimés ({len(blocs)} appel(s) API)")
+        return supprimes
+    
+    def _supprimer_ligne(self, row_num: int) -> bool:
+        """Supprime une ligne du sheet et met à jour cache et index"""
+        try:
+            self._ecrire(self.worksheet.delete_rows, row_num)
+            self._retirer_lignes_cache([[row_num, row_num]])
             
             print(f"🗑️ Post ligne {row_num} supprimé")
             return True
@@ -351,6 +1546,8 @@ class GoogleSheetsDB:
         if not self.initialized or not self.worksheet:
             return False
         
+        self.vider_file_attente()
+        
         try:
             # Compter le nombre de lignes de données
             count = self.compter_posts()
@@ -359,7 +1556,9 @@ class GoogleSheetsDB:
                 return True
             
             # Supprimer toutes les lignes sauf l'en-tête
-            self.worksheet.delete_rows(2, count + 1)
+            self._ecrire(self.worksheet.delete_rows, 2, count + 1)
+            self.invalider_cache(resync_complete=True)
+            self._signaler_suppression()
             
             print(f"🗑️ Base vidée: {count} posts supprimés")
             return True
@@ -368,12 +1567,320 @@ class GoogleSheetsDB:
             print(f"❌ Erreur vidage base: {e}")
             return False
 
-# Instance globale
-gsheets_db = GoogleSheetsDB()
+    def get_sheet_info(self) -> Dict[str, Any]:
+        """Retourne les informations de connexion et l'état de la file d'écriture"""
+        if not self.initialized:
+            self.get_or_create_sheet()
+        
+        if not self.initialized or not self.sheet:
+            return {
+                "status": "non initialisé",
+                "file_attente": self.taille_file_attente(),
+                "lignes_rejetees": self._file_ecriture.lignes_rejetees,
+                "limiteur": limiteur_sheets.statistiques()
+            }
+        
+        return {
+            "status": "initialisé",
+            "title": self.sheet.title,
+            "id": self.sheet.id,
+            "url": f"https://docs.google.com/spreadsheets/d/{self.sheet.id}",
+            "file_attente": self.taille_file_attente(),
+            "lignes_rejetees": self._file_ecriture.lignes_rejetees,
+            "limiteur": limiteur_sheets.statistiques()
+        }
+
+class GoogleSheetsPartitionne:
+    """Historique réparti en une feuille par mois
+    
+    Même interface que GoogleSheetsDB. Chaque partition est une instance
+    GoogleSheetsDB (cache, synchronisation incrémentale et index propres)
+    partageant le client et le classeur de la première feuille, qui reste
+    lue comme historique non partitionné. Les index globaux suivent l'ordre
+    de lecture : historique non partitionné, puis les mois par ordre chronologique.
+    """
+    
+    MOTIF_PARTITION = re.compile(r'^' + re.escape(PREFIXE_PARTITION) + r'(\d{4})-(\d{2})$')
+    
+    def __init__(self):
+        self.racine = GoogleSheetsDB()
+        self._partitions: Dict[str, GoogleSheetsDB] = {}
+        self._partitions_lock = threading.RLock()
+        self._partitions_decouvertes = False
+    
+    @property
+    def client(self):
+        return self.racine.client
+    
+    @property
+    def sheet(self):
+        return self.racine.sheet
+    
+    @property
+    def initialized(self) -> bool:
+        return self.racine.initialized
+    
+    @property
+    def index_recherche(self) -> IndexRecherche:
+        return self.racine.index_recherche
+    
+    def get_or_create_sheet(self, sheet_name: str = None, sheet_id: str = None):
+        return self.racine.get_or_create_sheet(sheet_name, sheet_id)
+    
+    @staticmethod
+    def cle_partition(date: Any) -> str:
+        """Clé AAAA-MM du mois d'une date (mois courant si la date est invalide)"""
+        horodatage = pd.to_datetime(date, errors='coerce') if date not in (None, "") else pd.NaT
+        if pd.isna(horodatage):
+            horodatage = pd.Timestamp.now()
+        return f"{horodatage.year:04d}-{horodatage.month:02d}"
+    
+    def _partition(self, cle: str) -> GoogleSheetsDB:
+        """Instance de la partition (créée à la demande, feuille comprise)"""
+        with self._partitions_lock:
+            if cle not in self._partitions:
+                self._partitions[cle] = GoogleSheetsDB(nom_feuille=f"{PREFIXE_PARTITION}{cle}", parent=self.racine)
+            return self._partitions[cle]
+    
+    def _decouvrir_partitions(self):
+        """Recense une fois les feuilles mensuelles existantes du classeur"""
+        with self._partitions_lock:
+            if self._partitions_decouvertes:
+                return
+            if not self.racine.initialized:
+                self.racine.get_or_create_sheet()
+            if not self.racine.initialized:
+                return
+            try:
+                for feuille in self.racine._lire(self.racine.sheet.worksheets):
+                    correspondance = self.MOTIF_PARTITION.match(feuille.title)
+                    if correspondance:
+                        self._partition(f"{correspondance.group(1)}-{correspondance.group(2)}")
+                self._partitions_decouvertes = True
+                print(f"🗂️ {len(self._partitions)} partitions mensuelles trouvées")
+            except Exception as e:
+                print(f"⚠️ Erreur recensement des partitions: {e}")
+    
+    def _partitions_ordonnees(self, date_debut: Optional[datetime] = None,
+                              date_fin: Optional[datetime] = None) -> List[GoogleSheetsDB]:
+        """Historique non partitionné puis partitions du mois le plus ancien au plus récent,
+        limitées à celles qui recouvrent [date_debut, date_fin]"""
+        self._decouvrir_partitions()
+        debut = self.cle_partition(date_debut) if date_debut is not None else None
+        fin = self.cle_partition(date_fin) if date_fin is not None else None
+        with self._partitions_lock:
+            cles = sorted(cle for cle in self._partitions
+                          if (debut is None or cle >= debut) and (fin is None or cle <= fin))
+            return [self.racine] + [self._partitions[cle] for cle in cles]
+    
+    def _localiser_index(self, index: int):
+        """Partition et index local d'un index global"""
+        decalage = 0
+        for partition in self._partitions_ordonnees():
+            taille = len(partition.lire_historique(columns=["titre"]))
+            if index < decalage + taille:
+                return partition, index - decalage
+            decalage += taille
+        return None, None
+    
+    def _localiser_cle(self, cle: str) -> Optional[GoogleSheetsDB]:
+        """Partition contenant un post, en commençant par les mois récents"""
+        partitions = list(reversed(self._partitions_ordonnees()))
+        # D'abord les index déjà chargés (sans appel réseau)
+        for partition in partitions:
+            if str(cle) in partition._index_cles:
+                return partition
+        for partition in partitions:
+            if partition.ligne_post(cle):
+                return partition
+        return None
+    
+    def lire_historique(self, columns: Optional[List[str]] = None,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None,
+                        lever_erreurs: bool = False) -> pd.DataFrame:
+        """Lit l'historique en ne touchant que les partitions de la plage de dates"""
+        morceaux = [
+            partition.lire_historique(columns, date_debut, date_fin, lever_erreurs)
+            for partition in self._partitions_ordonnees(date_debut, date_fin)
+        ]
+        morceaux = [df for df in morceaux if not df.empty] or morceaux[:1]
+        # Les partitions peuvent avoir des colonnes ajoutées différentes
+        return pd.concat(morceaux, ignore_index=True).fillna("") if len(morceaux) > 1 else morceaux[0]
+    
+    def valider_post(self, post: Dict[str, Any]) -> List[str]:
+        return self.racine.valider_post(post)
+    
+    def sauvegarder_post(self, post: Dict[str, Any]) -> bool:
+        """Ajoute le post dans la partition du mois de sa date"""
+        return self._partition(self.cle_partition(post.get("date"))).sauvegarder_post(post)
+    
+    def mettre_a_jour_posts(self, updates_par_index: Dict[int, Dict[str, Any]]) -> bool:
+        par_partition = {}
+        for index, updates in updates_par_index.items():
+            partition, index_local = self._localiser_index(index)
+            if partition is None:
+                print(f"❌ Index hors limites: {index}")
+                return False
+            par_partition.setdefault(id(partition), (partition, {}))[1][index_local] = updates
+        return all(partition.mettre_a_jour_posts(updates)
+                   for partition, updates in par_partition.values())
+    
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        return self.mettre_a_jour_posts({index: updates})
+    
+    def mettre_a_jour_posts_par_cle(self, updates_par_cle: Dict[str, Dict[str, Any]]) -> bool:
+        par_partition = {}
+        for cle, updates in updates_par_cle.items():
+            partition = self._localiser_cle(cle)
+            if partition is None:
+                print(f"❌ Post introuvable pour la clé: {cle}")
+                return False
+            par_partition.setdefault(id(partition), (partition, {}))[1][cle] = updates
+        return all(partition.mettre_a_jour_posts_par_cle(updates)
+                   for partition, updates in par_partition.values())
+    
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        return self.mettre_a_jour_posts_par_cle({cle: updates})
+    
+    def rechercher_posts(self, criteres: Dict[str, Any]) -> pd.DataFrame:
+        # Index commun à toutes les partitions : interrogé une seule fois,
+        # après la synchronisation des caches qui l'alimentent
+        partitions = self._partitions_ordonnees()
+        for partition in partitions:
+            partition._lire_historique_cache(copier=False)
+        ids = self.racine._ids_indexes(criteres)
+        resultats = [partition._rechercher(criteres, ids) for partition in partitions]
+        df = pd.concat(resultats, ignore_index=True)
+        print(f"🔍 {len(df)} posts trouvés pour les critères: {criteres}")
+        return df
+    
+    def compter_posts(self) -> int:
+        """Compte les posts (lectures projetées servies par les caches des partitions)"""
+        return sum(len(partition.lire_historique(columns=["titre"])) for partition in self._partitions_ordonnees())
+    
+    def supprimer_post(self, index: int) -> bool:
+        partition, index_local = self._localiser_index(index)
+        if partition is None:
+            return False
+        return partition.supprimer_post(index_local)
+    
+    def supprimer_post_par_cle(self, cle: str) -> bool:
+        partition = self._localiser_cle(cle)
+        if partition is None:
+            print(f"❌ Post introuvable pour la clé: {cle}")
+            return False
+        return partition.supprimer_post_par_cle(cle)
+    
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        par_partition = {}
+        for cle in cles:
+            partition = self._localiser_cle(cle)
+            if partition is not None:
+                par_partition.setdefault(id(partition), (partition, []))[1].append(cle)
+        return sum(partition.supprimer_posts_par_cle(cles_partition)
+                   for partition, cles_partition in par_partition.values())
+    
+    def vider_base(self) -> bool:
+        return all([partition.vider_base() for partition in self._partitions_ordonnees()])
+    
+    def version_externe(self) -> tuple:
+        """Jetons des feuilles connues (racine et partitions)"""
+        with self._partitions_lock:
+            partitions = [self.racine] + [self._partitions[cle] for cle in sorted(self._partitions)]
+        return tuple(partition.version_externe() for partition in partitions)
+    
+    def invalider_cache(self, resync_complete: bool = False):
+        for partition in self._partitions_ordonnees():
+            partition.invalider_cache(resync_complete)
+    
+    def taille_file_attente(self) -> int:
+        with self._partitions_lock:
+            partitions = [self.racine] + list(self._partitions.values())
+        return sum(partition.taille_file_attente() for partition in partitions)
+    
+    def vider_file_attente(self) -> int:
+        with self._partitions_lock:
+            partitions = [self.racine] + list(self._partitions.values())
+        return sum(partition.vider_file_attente() for partition in partitions)
+    
+    def fermer(self) -> int:
+        with self._partitions_lock:
+            partitions = [self.racine] + list(self._partitions.values())
+        return sum(partition.fermer() for partition in partitions)
+    
+    def migrer_vers_partitions(self) -> int:
+        """Déplace l'historique non partitionné (première feuille) vers les feuilles mensuelles
+        
+        Idempotente : les posts déjà présents dans leur partition (id_post)
+        ne sont pas recopiés, une migration interrompue peut donc être relancée.
+        Seuls les posts copiés sont ensuite retirés de la première feuille.
+        
+        Returns:
+            Nombre de posts déplacés
+        """
+        try:
+            df = self.racine.lire_historique(lever_erreurs=True)
+        except Exception as e:
+            print(f"❌ Migration impossible, historique illisible: {e}")
+            return 0
+        if df.empty:
+            return 0
+        
+        if (df["id_post"].astype(str).str.strip() == "").any():
+            print("❌ Migration impossible : des posts n'ont pas d'id_post")
+            return 0
+        
+        posts_par_cle: Dict[str, List[Dict[str, Any]]] = {}
+        for post in df.to_dict('records'):
+            posts_par_cle.setdefault(self.cle_partition(post.get("date")), []).append(post)
+        
+        migres = []
+        try:
+            for cle, posts in sorted(posts_par_cle.items()):
+                partition = self._partition(cle)
+                if not partition.initialized:
+                    partition.get_or_create_sheet()
+                
+                # Reprise d'une migration interrompue : posts déjà copiés ignorés
+                presents = set(
+                    partition.lire_historique(columns=["id_post"], lever_erreurs=True)["id_post"].astype(str)
+                )
+                a_copier = [post for post in posts if str(post["id_post"]) not in presents]
+                if a_copier:
+                    partition._ajouter_lignes([partition._ligne_post(post) for post in a_copier])
+                print(f"📦 {len(a_copier)} posts migrés vers {partition.nom_feuille} "
+                      f"({len(posts) - len(a_copier)} déjà présents)")
+                migres.extend(str(post["id_post"]) for post in posts)
+        except Exception as e:
+            print(f"❌ Migration interrompue, historique conservé (relancer la migration la reprend): {e}")
+            return 0
+        
+        return self.racine.supprimer_posts_par_cle(migres)
+    
+    def get_sheet_info(self) -> Dict[str, Any]:
+        info = self.racine.get_sheet_info()
+        info["file_attente"] = self.taille_file_attente()
+        with self._partitions_lock:
+            partitions = list(self._partitions.values())
+        info["lignes_rejetees"] = sum(p._file_ecriture.lignes_rejetees for p in [self.racine] + partitions)
+        if self.racine.initialized:
+            self._decouvrir_partitions()
+            with self._partitions_lock:
+                info["partitions"] = sorted(p.nom_feuille for p in self._partitions.values())
+        return info
+
+# Instance globale (partitionnée par mois si GSHEETS_PARTITIONS=true)
+gsheets_db = GoogleSheetsPartitionne() if PARTITIONS else GoogleSheetsDB()
+
+# Écrire les posts en attente à l'arrêt du processus
+atexit.register(gsheets_db.fermer)
 
 # Fonctions d'interface (pour compatibilité)
-def lire_historique_gsheets() -> pd.DataFrame:
-    return gsheets_db.lire_historique()
+def lire_historique_gsheets(columns: Optional[List[str]] = None,
+                            date_debut: Optional[datetime] = None,
+                            date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    return gsheets_db.lire_historique(columns, date_debut, date_fin)
 
 def sauvegarder_post_gsheets(post: Dict[str, Any]) -> bool:
     return gsheets_db.sauvegarder_post(post)
@@ -381,9 +1888,18 @@ def sauvegarder_post_gsheets(post: Dict[str, Any]) -> bool:
 def mettre_a_jour_post_gsheets(index: int, updates: Dict[str, Any]) -> bool:
     return gsheets_db.mettre_a_jour_post(index, updates)
 
+def mettre_a_jour_posts_gsheets(updates_par_index: Dict[int, Dict[str, Any]]) -> bool:
+    return gsheets_db.mettre_a_jour_posts(updates_par_index)
+
 def compter_posts_gsheets() -> int:
     return gsheets_db.compter_posts()
 
+def taille_file_attente_gsheets() -> int:
+    return gsheets_db.taille_file_attente()
+
+def vider_file_attente_gsheets() -> int:
+    return gsheets_db.vider_file_attente()
+
 def rechercher_posts_gsheets(criteres: Dict[str, Any]) -> pd.DataFrame:
     return gsheets_db.rechercher_posts(criteres)
 
@@ -393,5 +1909,14 @@ def valider_post_gsheets(post: Dict[str, Any]) -> List[str]:
 def supprimer_post_gsheets(index: int) -> bool:
     return gsheets_db.supprimer_post(index)
 
+def mettre_a_jour_post_par_cle_gsheets(cle: str, updates: Dict[str, Any]) -> bool:
+    return gsheets_db.mettre_a_jour_post_par_cle(cle, updates)
+
+def mettre_a_jour_posts_par_cle_gsheets(updates_par_cle: Dict[str, Dict[str, Any]]) -> bool:
+    return gsheets_db.mettre_a_jour_posts_par_cle(updates_par_cle)
+
+def supprimer_post_par_cle_gsheets(cle: str) -> bool:
+    return gsheets_db.supprimer_post_par_cle(cle)
+
 def vider_base_gsheets() -> bool:
     return gsheets_db.vider_base()
\ No newline at end of file
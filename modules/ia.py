@@ -1,35 +1,35 @@
 # modules/ia.py - Générateur de contenu Ben Tech PRO
 import requests
+import json
 import pandas as pd
 import random
 import time
+import threading
 from datetime import datetime
 from urllib.parse import quote
 import os
 import warnings
-from typing import Tuple, Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Tuple, Optional, Dict, Any, List, Callable
 
 # Ignorer les avertissements NumPy
 warnings.filterwarnings('ignore', category=RuntimeWarning)
 
 # -----------------------------------------------------------------
-# CONFIGURATION GOOGLE SHEETS
+# CONFIGURATION DU STOCKAGE (Google Sheets / SQLite / journal local)
 # -----------------------------------------------------------------
-try:
-    from modules.google_sheets_db import (
-        lire_historique_gsheets, 
-        sauvegarder_post_gsheets,
-        mettre_a_jour_post_gsheets,
-        compter_posts_gsheets
-    )
-    GOOGLE_SHEETS_AVAILABLE = True
-    print("✅ Module Google Sheets disponible")
-except ImportError as e:
-    GOOGLE_SHEETS_AVAILABLE = False
-    print(f"⚠️ Google Sheets non disponible: {e}")
-except Exception as e:
-    GOOGLE_SHEETS_AVAILABLE = False
-    print(f"⚠️ Erreur chargement Google Sheets: {e}")
+from modules.post_store import (
+    post_store,
+    lire_historique_posts,
+    sauvegarder_post,
+    EXCEL_FILE
+)
+from modules.schema_posts import valeur_json
+from modules.cache_analyse import cache_analyse
+from modules.cache_reponses import cache_reponses
+from modules.statistiques_selection import statistiques_selection, SELECTION_BANDIT
+from modules.budget_prompt import construire_prompt, comptabilite_prompts, estimer_tokens, MARQUEUR_DONNEES
+GOOGLE_SHEETS_AVAILABLE = post_store.nom == "sheets"
 
 # -----------------------------------------------------------------
 # CONFIGURATION GOOGLE DRIVE
@@ -87,10 +87,17 @@ except ImportError:
     if GOOGLE_DRIVE_AVAILABLE and GOOGLE_DRIVE_CREDENTIALS:
         initialize_drive_manager(GOOGLE_DRIVE_CREDENTIALS, GOOGLE_DRIVE_FOLDER_ID)
 
-EXCEL_FILE = "historique_posts.xlsx"
 IMAGE_FOLDER = "images_posts"
 os.makedirs(IMAGE_FOLDER, exist_ok=True)
 
+# Génération parallèle (image / texte / script) : taille du pool et délais par tâche
+# (3 tâches par génération, GENERATIONS_SIMULTANEES générations à la fois)
+GENERATIONS_SIMULTANEES = int(os.environ.get('GENERATIONS_SIMULTANEES', 2))
+GENERATION_WORKERS = int(os.environ.get('GENERATION_WORKERS', 3 * GENERATIONS_SIMULTANEES))
+TIMEOUT_IMAGE = int(os.environ.get('GENERATION_TIMEOUT_IMAGE', 90))
+TIMEOUT_TEXTE = int(os.environ.get('GENERATION_TIMEOUT_TEXTE', 60))
+TIMEOUT_ATTENTE = int(os.environ.get('GENERATION_TIMEOUT_ATTENTE', 120))  # attente d'un thread libre
+
 # ---------------------------
 # AGENTS BEN TECH AVEC DÉPARTEMENTS
 # ---------------------------
@@ -160,14 +167,20 @@ def get_agent_aleatoire() -> Dict[str, str]:
 # ---------------------------
 # Utilitaires OpenAI (retry)
 # ---------------------------
-def openai_chat_request(messages: list, model: str = OPENAI_MODEL, max_retries: int = 3, timeout: int = 15) -> Dict[str, Any]:
-    """Requête à l'API OpenAI avec retry"""
+def openai_chat_request(messages: list, model: str = OPENAI_MODEL, max_retries: int = 3, timeout: int = 15,
+                        **options) -> Dict[str, Any]:
+    """Requête à l'API OpenAI avec retry
+    
+    Args:
+        options: paramètres supplémentaires de l'API (max_tokens, response_format...)
+    """
     if not OPENAI_API_KEY:
         raise ValueError("❌ OPENAI_API_KEY non configurée")
     
     url = "https://api.openai.com/v1/chat/completions"
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
     payload = {"model": model, "messages": messages, "temperature": 0.7, "max_tokens": 900}
+    payload.update(options)
 
     for attempt in range(1, max_retries + 1):
         try:
@@ -180,115 +193,69 @@ def openai_chat_request(messages: list, model: str = OPENAI_MODEL, max_retries:
             backoff = 1.5 ** attempt
             time.sleep(backoff)
 
-# ---------------------------
-# 1. Lecture/écriture des données (Google Sheets + fallback Excel)
-# ---------------------------
-def lire_historique() -> pd.DataFrame:
-    """Lit l'historique depuis Google Sheets ou fallback local"""
+def openai_chat_stream(messages: list, model: str = OPENAI_MODEL, max_retries: int = 3, timeout: int = 15):
+    """Requête à l'API OpenAI en streaming : génère les fragments de texte au fil de l'eau
     
-    # Essayer Google Sheets d'abord
-    if GOOGLE_SHEETS_AVAILABLE:
-        try:
-            df = lire_historique_gsheets()
-            if df is not None and not df.empty:
-                print(f"📊 {len(df)} posts chargés depuis Google Sheets")
-                return df
-            else:
-                print("⚠️ Google Sheets vide ou erreur, fallback local")
-        except Exception as e:
-            print(f"⚠️ Erreur Google Sheets, fallback local: {e}")
+    Les nouvelles tentatives ne sont faites qu'avant le premier fragment reçu.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("❌ OPENAI_API_KEY non configurée")
     
-    # Fallback : Excel local
-    try:
-        df = pd.read_excel(EXCEL_FILE, engine='openpyxl')
-        
-        # Vérifier que toutes les colonnes nécessaires existent
-        colonnes_requises = [
-            "titre", "theme", "service", "style",
-            "texte_marketing", "script_video",
-            "reaction_positive", "reaction_negative",
-            "taux_conversion_estime", "publication_effective",
-            "nom_plateforme", "suggestion", "date",
-            "score_performance_final", "image_path", "image_auteur", "type_publication",
-            "agent_responsable",
-            "image_drive_id", "image_drive_filename", "image_drive_url",
-            "image_public_link", "image_direct_link"
-        ]
-        
-        for col in colonnes_requises:
-            if col not in df.columns:
-                df[col] = ""
-        
-        print(f"📊 {len(df)} posts chargés depuis Excel local")
-        return df
-        
-    except FileNotFoundError:
-        df = pd.DataFrame(columns=colonnes_requises)
-        df.to_excel(EXCEL_FILE, index=False, engine='openpyxl')
-        print("📝 Fichier Excel créé avec colonnes")
-        return df
-    except Exception as e:
-        print(f"❌ Erreur lecture Excel: {e}")
-        return pd.DataFrame(columns=colonnes_requises)
+    url = "https://api.openai.com/v1/chat/completions"
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
+    payload = {"model": model, "messages": messages, "temperature": 0.7, "max_tokens": 900, "stream": True}
 
-def mettre_a_jour_historique(nouveau_post: dict):
-    """Sauvegarde dans Google Sheets ou fallback local"""
-    
-    gsheets_success = False
-    
-    # Essayer Google Sheets d'abord
-    if GOOGLE_SHEETS_AVAILABLE:
+    for attempt in range(1, max_retries + 1):
         try:
-            gsheets_success = sauvegarder_post_gsheets(nouveau_post)
-            if gsheets_success:
-                print(f"✅ Post sauvegardé dans Google Sheets: {nouveau_post.get('titre', 'N/A')}")
-            else:
-                print("⚠️ Échec sauvegarde Google Sheets, fallback local uniquement")
+            resp = requests.post(url, json=payload, headers=headers, timeout=timeout, stream=True)
+            resp.raise_for_status()
+            break
         except Exception as e:
-            print(f"⚠️ Erreur Google Sheets: {e}, fallback local uniquement")
-            gsheets_success = False
+            if attempt == max_retries:
+                raise
+            backoff = 1.5 ** attempt
+            time.sleep(backoff)
+
+    with resp:
+        for ligne in resp.iter_lines(decode_unicode=True):
+            if not ligne or not ligne.startswith("data:"):
+                continue
+            donnees = ligne[len("data:"):].strip()
+            if donnees == "[DONE]":
+                break
+            choix = json.loads(donnees).get("choices") or [{}]
+            fragment = (choix[0].get("delta") or {}).get("content")
+            if fragment:
+                yield fragment
+
+# ---------------------------
+# 1. Lecture/écriture des données (Google Sheets + fallback journal local)
+# ---------------------------
+# Colonnes courtes utilisées par les analyses (lectures projetées)
+COLONNES_SELECTION = [
+    "date", "theme", "service", "style", "reaction_positive", "reaction_negative",
+    "taux_conversion_estime", "suggestion", "type_publication", "id_post", "post_id"
+]
+COLONNES_STATISTIQUES = [
+    "titre", "date", "theme", "service", "reaction_positive", "reaction_negative",
+    "taux_conversion_estime", "agent_responsable", "image_drive_id", "image_path"
+]
+
+def lire_historique(columns: Optional[List[str]] = None, historique_complet: bool = False) -> pd.DataFrame:
+    """Lit l'historique typé depuis le stockage configuré (voir post_store.py)
     
-    # TOUJOURS sauvegarder localement
-    try:
-        try:
-            df = pd.read_excel(EXCEL_FILE, engine='openpyxl')
-        except FileNotFoundError:
-            df = pd.DataFrame(columns=[
-                "titre", "theme", "service", "style",
-                "texte_marketing", "script_video",
-                "reaction_positive", "reaction_negative",
-                "taux_conversion_estime", "publication_effective",
-                "nom_plateforme", "suggestion", "date",
-                "score_performance_final", "image_path", "image_auteur", "type_publication",
-                "agent_responsable",
-                "image_drive_id", "image_drive_filename", "image_drive_url",
-                "image_public_link", "image_direct_link"
-            ])
-        
-        nouveau_df = pd.DataFrame([nouveau_post])
-        
-        for col in df.columns:
-            if col not in nouveau_df.columns:
-                nouveau_df[col] = ""
-        
-        df = pd.concat([df, nouveau_df], ignore_index=True)
-        
-        with pd.ExcelWriter(EXCEL_FILE, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False)
-        
-        if not GOOGLE_SHEETS_AVAILABLE or not gsheets_success:
-            print(f"✅ Post sauvegardé localement uniquement: {nouveau_post.get('titre', 'Sans titre')}")
-        else:
-            print(f"✅ Post sauvegardé localement (backup): {nouveau_post.get('titre', 'Sans titre')}")
-        
-    except Exception as e:
-        print(f"❌ Erreur sauvegarde locale: {e}")
-        try:
-            df = pd.DataFrame([nouveau_post])
-            df.to_excel(EXCEL_FILE, index=False, engine='openpyxl')
-            print("⚠️ Sauvegarde d'urgence réussie")
-        except Exception as e2:
-            print(f"❌ Erreur critique sauvegarde: {e2}")
+    Le DataFrame retourné est partagé entre les fonctions d'analyse :
+    ne pas le modifier en place.
+    
+    Args:
+        columns: colonnes à lire (lecture projetée) ; None pour toutes les colonnes
+        historique_complet: True pour fusionner les posts archivés
+    """
+    return lire_historique_posts(columns, historique_complet, typer=True)
+
+def mettre_a_jour_historique(nouveau_post: dict):
+    """Sauvegarde dans le stockage configuré (+ sauvegarde dans le journal local)"""
+    return sauvegarder_post(nouveau_post)
 
 # ---------------------------
 # 2. Services list
@@ -327,9 +294,15 @@ def analyse_ia_avance(df: pd.DataFrame) -> str:
 « Pédagogie technique avec impact entrepreneurial - La référence tech qui parle business »
 """
     
+    colonnes = ["theme", "service", "style", "reaction_positive", "reaction_negative", "taux_conversion_estime", "suggestion", "type_publication"]
     sample = df.sort_values(by="date", ascending=False).head(60)
-    rows = sample[["theme", "service", "style", "reaction_positive", "reaction_negative", "taux_conversion_estime", "suggestion", "type_publication"]]
-    records = rows.fillna("").to_dict(orient="records")
+    rows = sample[colonnes]
+    records = rows.astype(object).where(rows.notna(), "").to_dict(orient="records")
+    
+    # Historique inchangé ou presque : réutiliser la dernière stratégie
+    analyse_en_cache = cache_analyse.obtenir(records)
+    if analyse_en_cache:
+        return analyse_en_cache
 
     prompt = f"""
 # RÔLE : STRATÈGE MARKETING DIGITAL SENIOR - AGENCE BEN TECH
@@ -342,8 +315,8 @@ Votre mission : Analyser les performances passées et développer une stratégie
 - Valeurs : Excellence technique, Impact local, Accessibilité
 - Objectif business : Devenir la référence tech en RDC francophone
 
-## DONNÉES HISTORIQUES À ANALYSER :
-{records}
+## DONNÉES HISTORIQUES À ANALYSER (CSV, plus récent en premier) :
+{MARQUEUR_DONNEES}
 
 ## COMMANDES D'ANALYSE STRATÉGIQUE :
 
@@ -374,62 +347,62 @@ Votre mission : Analyser les performances passées et développer une stratégie
 Structure professionnelle avec sections claires, bullet points actionnables, chiffres quand possible.
 Ton : Expert, stratégique, orienté résultats, adapté marché africain.
 """
+    # Données encodées en CSV ; au-delà du budget, les posts les plus anciens sont écartés
+    prompt = construire_prompt("analyse", prompt, records, colonnes)
     response = openai_chat_request([{"role": "user", "content": prompt}])
-    return response["choices"][0]["message"]["content"].strip()
+    comptabilite_prompts.enregistrer_usage("analyse", response.get("usage"))
+    analyse = response["choices"][0]["message"]["content"].strip()
+    cache_analyse.enregistrer(records, analyse)
+    return analyse
 
 # ---------------------------
 # 4. Choix automatique (thème/service/style/type)
 # ---------------------------
+# Compteurs incrémentaux (statistiques_selection.py) : le choix ne parcourt
+# pas l'historique, qui n'est relu que si un autre processus l'a modifié.
+# Tirage pondéré (bandit) à la place de la valeur la plus fréquente si SELECTION_BANDIT=true
+THEMES_DEPART = [
+    "Transformation digitale des PME congolaises",
+    "Solutions tech pour entrepreneur africain",
+    "Cybersécurité pour entreprises locales",
+    "Automatisation intelligente en RDC",
+    "Développement web optimisé marché africain",
+    "Applications mobiles qui transforment le business",
+    "Formation tech accessible à tous"
+]
+STYLES = ["pédagogique", "énergique", "direct", "storytelling", "technique", "influenceur", "entrepreneurial"]
+TYPES_PUBLICATION = ["contenu", "service"]
+
+def _statistiques(df: pd.DataFrame):
+    statistiques_selection.synchroniser(df, post_store.version_externe())
+    return statistiques_selection
+
 def choisir_theme(df: pd.DataFrame) -> str:
     if df.empty:
-        seeds = [
-            "Transformation digitale des PME congolaises",
-            "Solutions tech pour entrepreneur africain",
-            "Cybersécurité pour entreprises locales",
-            "Automatisation intelligente en RDC",
-            "Développement web optimisé marché africain",
-            "Applications mobiles qui transforment le business",
-            "Formation tech accessible à tous"
-        ]
-        return random.choice(seeds)
-    
-    themes_valides = df["theme"].dropna()
-    if themes_valides.empty:
-        return random.choice(seeds)
-    
-    scores = themes_valides.groupby(themes_valides).size()
-    if scores.sum() > 0:
-        return scores.idxmax()
-    return random.choice(themes_valides.tolist() or ["Transformation digitale des PME congolaises"])
+        return random.choice(THEMES_DEPART)
+    stats = _statistiques(df)
+    if SELECTION_BANDIT:
+        return stats.tirer("theme", THEMES_DEPART) or random.choice(THEMES_DEPART)
+    return stats.plus_frequent("theme") or random.choice(THEMES_DEPART)
 
 def choisir_service(df: pd.DataFrame) -> str:
     if df.empty:
         return random.choice(SERVICES_BEN_TECH)
-    
-    services_valides = df["service"].dropna()
-    if services_valides.empty:
-        return random.choice(SERVICES_BEN_TECH)
-    
-    scores = services_valides.groupby(services_valides).size()
-    if scores.sum() > 0:
-        return scores.idxmax()
-    return random.choice(SERVICES_BEN_TECH)
+    stats = _statistiques(df)
+    if SELECTION_BANDIT:
+        return stats.tirer("service", SERVICES_BEN_TECH) or random.choice(SERVICES_BEN_TECH)
+    return stats.plus_frequent("service") or random.choice(SERVICES_BEN_TECH)
 
 def choisir_style(df: pd.DataFrame) -> str:
-    styles = ["pédagogique", "énergique", "direct", "storytelling", "technique", "influenceur", "entrepreneurial"]
     if df.empty:
         return "entrepreneurial"
-    
-    styles_valides = df["style"].dropna()
-    if styles_valides.empty:
-        return random.choice(styles)
-    
-    scores = styles_valides.groupby(styles_valides).size()
-    if scores.sum() > 0:
-        best = scores.idxmax()
-        if best in styles:
-            return best
-    return random.choice(styles)
+    stats = _statistiques(df)
+    if SELECTION_BANDIT:
+        return stats.tirer("style", STYLES, restreindre=True)
+    best = stats.plus_frequent("style")
+    if best in STYLES:
+        return best
+    return random.choice(STYLES)
 
 def choisir_type_publication(df: pd.DataFrame) -> str:
     if df.empty:
@@ -438,9 +411,14 @@ def choisir_type_publication(df: pd.DataFrame) -> str:
     if "type_publication" not in df.columns:
         return "contenu" if random.random() < 0.7 else "service"
     
-    recent = df.tail(12)
-    contenu_score = recent[recent["type_publication"] == "contenu"]["reaction_positive"].sum() if "type_publication" in recent.columns else 0
-    service_score = recent[recent["type_publication"] == "service"]["reaction_positive"].sum() if "type_publication" in recent.columns else 0
+    stats = _statistiques(df)
+    if SELECTION_BANDIT:
+        return stats.tirer("type_publication", TYPES_PUBLICATION, restreindre=True)
+    
+    # Engagement des 12 derniers posts par type
+    recent = stats.engagement_recent("type_publication", 12)
+    contenu_score = recent.get("contenu", 0.0)
+    service_score = recent.get("service", 0.0)
     
     if contenu_score > service_score:
         return "contenu" if random.random() < 0.75 else "service"
@@ -727,24 +705,11 @@ Retournez uniquement le contenu final, prêt à publier.
 # ---------------------------
 # 7. RÉPONSE AUX COMMENTAIRES AVEC AGENT + DÉPARTEMENT
 # ---------------------------
-def generer_reponse_commentaire(commentaire: str) -> str:
-    """Génère une réponse professionnelle avec signature agent + département"""
-    
-    agent = get_agent_aleatoire()
-    
-    prompt = f"""
-# RÔLE : AGENT DE SERVICE CLIENT BEN TECH - RÉPONSE PROFESSIONNELLE
-
-## INFORMATIONS AGENT :
-- Nom complet : {agent['prenom']} {agent['nom']}
-- Poste : {agent['poste']}
-- Département : {agent['departement']}
-- Spécialité : {agent['specialite']}
-- Signature : {agent['signature']}
-
-## COMMENTAIRE CLIENT À TRAITER :
-"{commentaire}"
+# Taille des lots de commentaires traités en une seule requête
+REPONSES_LOT_TAILLE = int(os.environ.get('REPONSES_LOT_TAILLE', 10))
+TOKENS_PAR_REPONSE = 250
 
+PROTOCOLE_REPONSE_COMMENTAIRE = """
 ## PROTOCOLE DE RÉPONSE BEN TECH :
 
 1. ACCUEIL PERSONNALISÉ (chaleureux mais professionnel) :
@@ -775,40 +740,213 @@ def generer_reponse_commentaire(commentaire: str) -> str:
 
 ## TON "VOIX BEN TECH" SERVICE CLIENT :
 « Professionnel qui comprend vos défis, humain qui valorise votre temps. »
+"""
+
+def _infos_agent(agent: Dict[str, str]) -> str:
+    return f"""## INFORMATIONS AGENT :
+- Nom complet : {agent['prenom']} {agent['nom']}
+- Poste : {agent['poste']}
+- Département : {agent['departement']}
+- Spécialité : {agent['specialite']}
+- Signature : {agent['signature']}"""
+
+def _signature(agent: Dict[str, str]) -> str:
+    return f"{agent['prenom']} {agent['nom']}\n{agent['poste']} | {agent['departement']}\n{agent['signature']}"
+
+def _signer_reponse(reponse_ia: str, agent: Dict[str, str]) -> str:
+    """Ajoute la signature standardisée si la réponse ne la contient pas déjà"""
+    if agent['prenom'] not in reponse_ia or agent['departement'] not in reponse_ia:
+        reponse_ia += f"\n\n{_signature(agent)}"
+    return reponse_ia
+
+def _retirer_signature(reponse_ia: str, agent: Dict[str, str]) -> str:
+    """Retire la signature de l'agent (dernières lignes qui la mentionnent)"""
+    marqueurs = [agent['prenom'], agent['nom'], agent['poste'], agent['departement'], agent['signature']]
+    lignes = reponse_ia.rstrip().split("\n")
+    while lignes and (not lignes[-1].strip() or any(m in lignes[-1] for m in marqueurs if m)):
+        lignes.pop()
+    return "\n".join(lignes).strip()
 
+def _reponse_secours(agent: Dict[str, str]) -> str:
+    return f"""Merci pour votre commentaire ! Nous apprécions vraiment vos retours. 💬
+
+Je serais ravi d'échanger plus en détail sur ce sujet. Notre équipe d'experts peut vous proposer des solutions adaptées spécifiquement à vos besoins.
+
+N'hésitez pas à nous contacter sur WhatsApp pour une consultation personnalisée : +243990530518
+
+{agent['prenom']} {agent['nom']}
+{agent['poste']} | {agent['departement']}
+{agent['signature']}"""
+
+def generer_reponse_commentaire(commentaire: str, chercher_cache: bool = True) -> str:
+    """Génère une réponse professionnelle avec signature agent + département
+    
+    chercher_cache=False quand le cache a déjà été consulté pour ce commentaire
+    (repli de generer_reponses_commentaires) : une seule recherche comptée
+    """
+    
+    agent = get_agent_aleatoire()
+    
+    # Commentaire quasi identique déjà traité : réponse réutilisée, signée par l'agent courant
+    reponse_en_cache = cache_reponses.chercher(commentaire) if chercher_cache else None
+    if reponse_en_cache:
+        return _signer_reponse(reponse_en_cache, agent)
+    
+    prompt = f"""
+# RÔLE : AGENT DE SERVICE CLIENT BEN TECH - RÉPONSE PROFESSIONNELLE
+
+{_infos_agent(agent)}
+
+## COMMENTAIRE CLIENT À TRAITER :
+"{commentaire}"
+{PROTOCOLE_REPONSE_COMMENTAIRE}
 Retournez uniquement la réponse finale avec signature complète.
 """
     
     try:
         resp = openai_chat_request([{"role": "user", "content": prompt}])
         reponse_ia = resp["choices"][0]["message"]["content"].strip()
-        
-        # Vérifier si la signature est déjà incluse
-        if agent['prenom'] not in reponse_ia or agent['departement'] not in reponse_ia:
-            # Ajouter signature standardisée
-            signature = f"\n\n{agent['prenom']} {agent['nom']}\n{agent['poste']} | {agent['departement']}\n{agent['signature']}"
-            reponse_ia += signature
-        
-        return reponse_ia
+        cache_reponses.ajouter(commentaire, _retirer_signature(reponse_ia, agent))
+        return _signer_reponse(reponse_ia, agent)
         
     except Exception as e:
         print(f"❌ Erreur génération réponse commentaire: {e}")
         # Fallback avec agent
-        return f"""Merci pour votre commentaire ! Nous apprécions vraiment vos retours. 💬
+        return _reponse_secours(agent)
 
-Je serais ravi d'échanger plus en détail sur ce sujet. Notre équipe d'experts peut vous proposer des solutions adaptées spécifiquement à vos besoins.
+class LotTronque(Exception):
+    """Réponse du lot coupée par max_tokens : JSON incomplet"""
 
-N'hésitez pas à nous contacter sur WhatsApp pour une consultation personnalisée : +243990530518
+def _tokens_lot(agents: List[Dict[str, str]]) -> int:
+    """max_tokens d'un lot : réponse + signature de l'agent de chaque commentaire"""
+    return sum(TOKENS_PAR_REPONSE + estimer_tokens(_signature(agent)) for agent in agents)
 
-{agent['prenom']} {agent['nom']}
-{agent['poste']} | {agent['departement']}
-{agent['signature']}"""
+def _generer_lot_reponses(lot: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Une requête pour un lot de (id, commentaire) : réponses structurées en JSON
+    
+    Chaque commentaire reçoit son propre agent, rappelé dans le JSON retourné.
+    Lève LotTronque si la réponse a été coupée par max_tokens.
+    """
+    # Identifiants courts dans le prompt, reconvertis à la réception
+    alias = {f"c{i}": comment_id for i, (comment_id, _) in enumerate(lot, start=1)}
+    agents = {cle: get_agent_aleatoire() for cle in alias}
+    codes = {f"a{AGENTS_BEN_TECH.index(agent) + 1}": agent for agent in agents.values()}
+    code_agent = {cle: f"a{AGENTS_BEN_TECH.index(agent) + 1}" for cle, agent in agents.items()}
+    
+    # Agents du lot décrits une seule fois
+    infos_agents = "\n".join(
+        f"- {code} : {agent['prenom']} {agent['nom']}, {agent['poste']} | {agent['departement']}"
+        f" — Spécialité : {agent['specialite']} — Signature : {agent['signature']}"
+        for code, agent in sorted(codes.items())
+    )
+    commentaires = "\n".join(
+        f"- {cle} (agent {code_agent[cle]}) : {json.dumps(message, ensure_ascii=False)}"
+        for cle, (_, message) in zip(alias, lot)
+    )
+    
+    prompt = f"""
+# RÔLE : AGENTS DE SERVICE CLIENT BEN TECH - RÉPONSES PROFESSIONNELLES
+
+## AGENTS :
+{infos_agents}
+
+## COMMENTAIRES CLIENTS À TRAITER ({len(lot)}) :
+{commentaires}
+{PROTOCOLE_REPONSE_COMMENTAIRE}
+Chaque réponse est indépendante, adaptée à son commentaire et rédigée par l'agent indiqué.
+Retournez uniquement un objet JSON de la forme :
+{{"reponses": [{{"id": "c1", "agent": "{code_agent['c1']}", "reponse": "réponse finale avec signature complète de l'agent"}}]}}
+"""
+    
+    resp = openai_chat_request(
+        [{"role": "user", "content": prompt}],
+        max_tokens=_tokens_lot(list(agents.values())),
+        response_format={"type": "json_object"},
+        timeout=60
+    )
+    choix = resp["choices"][0]
+    if choix.get("finish_reason") == "length":
+        raise LotTronque(f"lot de {len(lot)} commentaire(s)")
+    try:
+        contenu = json.loads(choix["message"]["content"])
+    except json.JSONDecodeError as e:
+        raise LotTronque(f"JSON invalide pour un lot de {len(lot)} commentaire(s): {e}")
+    
+    messages = dict(lot)
+    reponses = {}
+    for element in contenu.get("reponses", []):
+        cle = str(element.get("id", ""))
+        comment_id = alias.get(cle)
+        texte = str(element.get("reponse", "")).strip()
+        if comment_id and texte:
+            # Agent annoncé par le modèle s'il fait partie du lot, sinon celui attribué
+            agent = codes.get(str(element.get("agent", "")), agents[cle])
+            cache_reponses.ajouter(messages[comment_id], _retirer_signature(texte, agent))
+            reponses[comment_id] = _signer_reponse(texte, agent)
+    return reponses
+
+def _repondre_lot(lot: List[Tuple[str, str]], reponses: Dict[str, str]):
+    """Traite un lot ; s'il est tronqué, le coupe en deux plutôt que de
+    repasser par une requête par commentaire"""
+    try:
+        reponses.update(_generer_lot_reponses(lot))
+        print(f"✅ {len(lot)} réponse(s) générée(s) en une requête")
+    except LotTronque as e:
+        if len(lot) > 1:
+            moitie = len(lot) // 2
+            print(f"✂️ Réponse tronquée ({e}), lot coupé en {moitie} + {len(lot) - moitie}")
+            _repondre_lot(lot[:moitie], reponses)
+            _repondre_lot(lot[moitie:], reponses)
+        else:
+            print(f"❌ Réponse tronquée: {e}")
+    except Exception as e:
+        print(f"❌ Erreur génération lot de réponses: {e}")
+
+def generer_reponses_commentaires(commentaires: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Génère les réponses d'une liste de (id, commentaire) par lots de REPONSES_LOT_TAILLE
+    
+    Le protocole de réponse n'est envoyé qu'une fois par lot, chaque commentaire
+    gardant son propre agent. Les commentaires proches d'un commentaire déjà
+    traité sont servis par le cache sémantique ; un lot tronqué est coupé en
+    deux, et seuls les commentaires encore sans réponse (erreur API) sont
+    traités individuellement.
+    
+    Returns:
+        {id du commentaire: réponse}
+    """
+    reponses: Dict[str, str] = {}
+    
+    # Commentaires quasi identiques à des commentaires déjà traités : sans requête
+    a_generer = []
+    for comment_id, message in commentaires:
+        reponse_en_cache = cache_reponses.chercher(message)
+        if reponse_en_cache:
+            reponses[comment_id] = _signer_reponse(reponse_en_cache, get_agent_aleatoire())
+        else:
+            a_generer.append((comment_id, message))
+    commentaires = a_generer
+    
+    for debut in range(0, len(commentaires), REPONSES_LOT_TAILLE):
+        lot = commentaires[debut:debut + REPONSES_LOT_TAILLE]
+        _repondre_lot(lot, reponses)
+        
+        for comment_id, message in lot:
+            if comment_id not in reponses:
+                reponses[comment_id] = generer_reponse_commentaire(message, chercher_cache=False)
+    
+    cache_reponses.sauvegarder()
+    stats = cache_reponses.statistiques()
+    print(f"♻️ Cache de réponses: {stats['hits']} hits / {stats['misses']} misses "
+          f"(taux {stats['taux_hits']:.0%}, {stats['entrees']} entrées)")
+    return reponses
 
 # ---------------------------
 # 8. Chat IA pour analyse et recommandations - PROMPT PRO
 # ---------------------------
-def chat_ia_analyse(question: str, contexte: str = "") -> str:
-    df = lire_historique()
+def _prompt_chat_analyse(question: str, contexte: str = "") -> str:
+    df = lire_historique(columns=["titre"] + COLONNES_SELECTION)
+    colonnes_posts = ["titre", "theme", "service", "reaction_positive", "reaction_negative"]
+    derniers_posts = []
     
     if df.empty:
         contexte_data = """
@@ -832,7 +970,7 @@ def chat_ia_analyse(question: str, contexte: str = "") -> str:
 """
     else:
         total_posts = len(df)
-        derniers_posts = df.tail(3)[["titre", "theme", "service", "reaction_positive", "reaction_negative"]].to_dict('records')
+        derniers_posts = df.tail(3)[colonnes_posts].iloc[::-1].to_dict('records')
         
         try:
             meilleur_theme = df.groupby("theme")["reaction_positive"].sum().idxmax() if not df["theme"].empty and "reaction_positive" in df.columns else "Aucun"
@@ -856,7 +994,8 @@ def chat_ia_analyse(question: str, contexte: str = "") -> str:
 • Thème le plus performant : {meilleur_theme}
 • Service le plus demandé : {meilleur_service}
 • Taux conversion moyen : {taux_moyen_conversion:.1f}%
-• 3 derniers posts : {derniers_posts}
+• 3 derniers posts (CSV, plus récent en premier) :
+{MARQUEUR_DONNEES}
 
 🎯 TENDANCES IDENTIFIÉES :
 {analyser_tendances_avancees(df) if not df.empty else "Aucune donnée pour analyse"}
@@ -911,13 +1050,10 @@ def chat_ia_analyse(question: str, contexte: str = "") -> str:
 
 Retournez l'analyse stratégique complète.
 """
-    
-    try:
-        response = openai_chat_request([{"role": "user", "content": prompt}])
-        return response["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        print(f"❌ Erreur lors de l'analyse chat IA: {e}")
-        return f"""❌ Erreur système d'analyse
+    # Sans historique, le prompt ne contient pas de données à encoder
+    return construire_prompt("chat", prompt, derniers_posts, colonnes_posts if derniers_posts else [])
+
+MESSAGE_ERREUR_CHAT = """❌ Erreur système d'analyse
 
 Veuillez réessayer ou contacter notre équipe technique.
 
@@ -929,13 +1065,129 @@ Beny
 CEO & Fondateur | Direction Générale
 Ensemble, créons l'avenir digital de votre entreprise. 💼"""
 
+def chat_ia_analyse(question: str, contexte: str = "") -> str:
+    prompt = _prompt_chat_analyse(question, contexte)
+    
+    try:
+        response = openai_chat_request([{"role": "user", "content": prompt}])
+        comptabilite_prompts.enregistrer_usage("chat", response.get("usage"))
+        return response["choices"][0]["message"]["content"].strip()
+    except Exception as e:
+        print(f"❌ Erreur lors de l'analyse chat IA: {e}")
+        return MESSAGE_ERREUR_CHAT
+
+def chat_ia_analyse_stream(question: str, contexte: str = ""):
+    """Comme chat_ia_analyse, mais génère la réponse fragment par fragment
+    (premier fragment en moins d'une seconde au lieu de la réponse complète)"""
+    prompt = _prompt_chat_analyse(question, contexte)
+    
+    recu = False
+    try:
+        for fragment in openai_chat_stream([{"role": "user", "content": prompt}]):
+            recu = True
+            yield fragment
+    except Exception as e:
+        print(f"❌ Erreur lors de l'analyse chat IA (streaming): {e}")
+        yield ("\n\n" if recu else "") + MESSAGE_ERREUR_CHAT
+
 # ---------------------------
 # 9. Génération complète du contenu PROFESSIONNEL (version Google Drive uniquement)
 # ---------------------------
+# Pool borné partagé par les générations : les branches indépendantes
+# (image, texte marketing, script vidéo) s'exécutent en parallèle
+executeur_generation = ThreadPoolExecutor(max_workers=GENERATION_WORKERS,
+                                          thread_name_prefix="generation")
+
+class TacheGeneration:
+    """Tâche soumise au pool de génération, dont l'heure de démarrage est connue
+    (le délai d'une tâche court à partir de son démarrage, pas de sa soumission)"""
+    
+    def __init__(self, fonction: Callable[..., Any], *args):
+        self.demarree = threading.Event()
+        self.debut: Optional[float] = None
+        self.future = executeur_generation.submit(self._executer, fonction, *args)
+    
+    def _executer(self, fonction: Callable[..., Any], *args) -> Any:
+        self.debut = time.time()
+        self.demarree.set()
+        return fonction(*args)
+
+def resultat_tache(tache: TacheGeneration, delai: float, secours: Callable[[], Any], libelle: str,
+                   nettoyage: Optional[Callable[[Any], None]] = None) -> Any:
+    """Résultat d'une tâche au plus delai secondes après son démarrage, sinon valeur de secours
+    
+    Une tâche encore en file après TIMEOUT_ATTENTE secondes est annulée. Une
+    tâche démarrée en retard n'est pas interrompue (les threads ne peuvent pas
+    l'être) : elle se termine en arrière-plan, son résultat est ignoré et passé
+    à nettoyage (ex. suppression d'une image déjà envoyée sur Google Drive).
+    """
+    future = tache.future
+    try:
+        if not tache.demarree.wait(timeout=TIMEOUT_ATTENTE) and future.cancel():
+            print(f"⏱️ {libelle} : aucun thread libre, tâche annulée, contenu de secours")
+            return secours()
+        tache.demarree.wait()
+        return future.result(timeout=max(0.0, tache.debut + delai - time.time()))
+    except FuturesTimeout:
+        print(f"⏱️ {libelle} : délai dépassé, contenu de secours")
+        if nettoyage is not None:
+            def _nettoyer(termine):
+                if not termine.cancelled() and termine.exception() is None:
+                    nettoyage(termine.result())
+            future.add_done_callback(_nettoyer)
+    except Exception as e:
+        print(f"❌ Erreur {libelle} : {e}")
+    return secours()
+
+def _supprimer_image_abandonnee(resultat: Tuple[Optional[str], Optional[dict]]):
+    """Supprime de Google Drive l'image d'une recherche terminée après son délai"""
+    _, drive_info = resultat if resultat else (None, None)
+    if drive_info and drive_info.get('id') and drive_manager:
+        print(f"🧹 Image arrivée après le délai, supprimée de Google Drive: {drive_info.get('name', drive_info['id'])}")
+        drive_manager.delete_file(drive_info['id'])
+
+def _generer_texte_marketing(prompt_texte: str) -> str:
+    resp_text = openai_chat_request([{"role": "user", "content": prompt_texte}])
+    texte_marketing = resp_text["choices"][0]["message"]["content"].strip()
+    print(f"✅ Texte marketing généré ({len(texte_marketing)} caractères)")
+    return texte_marketing
+
+def _texte_marketing_secours(service: str, theme: str) -> str:
+    return f"""🚀 {service} - {theme}
+
+💡 Expert en {service.lower()} chez Ben Tech, je partage des stratégies éprouvées pour transformer votre présence digitale.
+
+📊 Notre approche unique combine expertise technique et compréhension profonde du marché africain.
+
+🔍 Besoin d'une analyse personnalisée ? Contactez notre équipe pour une consultation gratuite.
+
+📱 WhatsApp : +243990530518
+
+#BenTech #{service.replace(' ', '')} #DigitalAfrica #{theme.replace(' ', '')}"""
+
+def _generer_script_video(prompt_script: str) -> str:
+    resp_script = openai_chat_request([{"role": "user", "content": prompt_script}])
+    script_video = resp_script["choices"][0]["message"]["content"].strip()
+    print(f"✅ Script vidéo généré ({len(script_video)} caractères)")
+    return script_video
+
+def _script_video_secours(service: str, theme: str) -> str:
+    return f"""🎬 HOOK : Vous cherchez à optimiser {theme.lower()} ?
+
+💬 "En tant qu'expert Ben Tech en {service.lower()}, je constate que..."
+
+📈 "La solution ? Une approche personnalisée combinant..."
+
+🔧 "Nos clients ont vu leurs résultats augmenter de..."
+
+📱 ACTION : Messagez-nous "CONSULTATION" sur WhatsApp pour un audit gratuit !
+
+#BenTech #ExpertTech #SolutionDigitale"""
+
 def generer_contenu() -> Dict[str, Any]:
     """Génère un contenu professionnel complet pour Ben Tech"""
     try:
-        df = lire_historique()
+        df = lire_historique(columns=COLONNES_SELECTION)
         
         # Analyse IA avancée
         try:
@@ -957,8 +1209,25 @@ def generer_contenu() -> Dict[str, Any]:
         print(f"🎯 GÉNÉRATION PRO BEN TECH: {service} | Thème: {theme} | Style: {style} | Type: {type_publication}")
         print(f"{'='*60}")
         
+        # Génération des prompts pro
+        prompt_texte, prompt_script = generer_prompt_personnalise(service, theme, style, analyse, type_publication)
+        
+        # Branches indépendantes en parallèle : image (reformulation + Unsplash
+        # + Google Drive), texte marketing et script vidéo
+        debut = time.time()
+        tache_image = TacheGeneration(trouver_image_unsplash, theme)
+        tache_texte = TacheGeneration(_generer_texte_marketing, prompt_texte)
+        tache_script = TacheGeneration(_generer_script_video, prompt_script)
+        
+        texte_marketing = resultat_tache(tache_texte, TIMEOUT_TEXTE,
+                                         lambda: _texte_marketing_secours(service, theme), "génération texte")
+        script_video = resultat_tache(tache_script, TIMEOUT_TEXTE,
+                                      lambda: _script_video_secours(service, theme), "génération script")
         # Recherche d'image (UNIQUEMENT dans Google Drive)
-        image_auteur, drive_info = trouver_image_unsplash(theme)
+        image_auteur, drive_info = resultat_tache(tache_image, TIMEOUT_IMAGE,
+                                                  lambda: (None, None), "recherche image",
+                                                  nettoyage=_supprimer_image_abandonnee)
+        print(f"⚡ Image, texte et script générés en {time.time() - debut:.1f}s")
         
         # Récupérer les infos Google Drive
         image_drive_url = drive_info.get('webViewLink') if drive_info else ""
@@ -966,49 +1235,6 @@ def generer_contenu() -> Dict[str, Any]:
         image_drive_filename = drive_info.get('name') if drive_info else ""
         image_public_link = drive_info.get('public_link') if drive_info else ""
         image_direct_link = drive_info.get('direct_image_link') if drive_info else ""
-        
-        # Génération des prompts pro
-        prompt_texte, prompt_script = generer_prompt_personnalise(service, theme, style, analyse, type_publication)
-        
-        # Texte marketing pro
-        texte_marketing = ""
-        try:
-            resp_text = openai_chat_request([{"role": "user", "content": prompt_texte}])
-            texte_marketing = resp_text["choices"][0]["message"]["content"].strip()
-            print(f"✅ Texte marketing généré ({len(texte_marketing)} caractères)")
-        except Exception as e:
-            print(f"❌ Erreur génération texte: {e}")
-            texte_marketing = f"""🚀 {service} - {theme}
-
-💡 Expert en {service.lower()} chez Ben Tech, je partage des stratégies éprouvées pour transformer votre présence digitale.
-
-📊 Notre approche unique combine expertise technique et compréhension profonde du marché africain.
-
-🔍 Besoin d'une analyse personnalisée ? Contactez notre équipe pour une consultation gratuite.
-
-📱 WhatsApp : +243990530518
-
-#BenTech #{service.replace(' ', '')} #DigitalAfrica #{theme.replace(' ', '')}"""
-        
-        # Script vidéo pro
-        script_video = ""
-        try:
-            resp_script = openai_chat_request([{"role": "user", "content": prompt_script}])
-            script_video = resp_script["choices"][0]["message"]["content"].strip()
-            print(f"✅ Script vidéo généré ({len(script_video)} caractères)")
-        except Exception as e:
-            print(f"❌ Erreur génération script: {e}")
-            script_video = f"""🎬 HOOK : Vous cherchez à optimiser {theme.lower()} ?
-
-💬 "En tant qu'expert Ben Tech en {service.lower()}, je constate que..."
-
-📈 "La solution ? Une approche personnalisée combinant..."
-
-🔧 "Nos clients ont vu leurs résultats augmenter de..."
-
-📱 ACTION : Messagez-nous "CONSULTATION" sur WhatsApp pour un audit gratuit !
-
-#BenTech #ExpertTech #SolutionDigitale"""
 
         # Score conversion réaliste
         score_conversion = random.randint(40, 90)
@@ -1117,7 +1343,7 @@ def generer_contenu() -> Dict[str, Any]:
 # 10. Fonctions d'export pour le dashboard
 # ---------------------------
 def get_statistiques_globales() -> Dict[str, Any]:
-    df = lire_historique()
+    df = lire_historique(columns=COLONNES_STATISTIQUES, historique_complet=True)
     
     if df.empty:
         return {
@@ -1129,7 +1355,7 @@ def get_statistiques_globales() -> Dict[str, Any]:
             "meilleur_service": "Aucun",
             "recommandations": generer_recommandations_proactives(),
             "dernier_post": None,
-            "data_source": "Excel local" if not GOOGLE_SHEETS_AVAILABLE else "Google Sheets",
+            "data_source": post_store.libelle,
             "gsheets_available": GOOGLE_SHEETS_AVAILABLE,
             "agents_disponibles": len(AGENTS_BEN_TECH),
             "google_drive_available": GOOGLE_DRIVE_AVAILABLE
@@ -1171,14 +1397,13 @@ def get_statistiques_globales() -> Dict[str, Any]:
         dernier_post = None
         if "date" in df.columns and "titre" in df.columns:
             try:
-                df["date_dt"] = pd.to_datetime(df["date"], errors='coerce')
-                dernier = df.sort_values("date_dt", ascending=False).iloc[0]
+                dernier = df.sort_values("date", ascending=False).iloc[0]
                 dernier_post = {
                     "titre": dernier.get("titre", "Sans titre"),
-                    "date": dernier.get("date", ""),
-                    "theme": dernier.get("theme", ""),
-                    "service": dernier.get("service", ""),
-                    "agent": dernier.get("agent_responsable", "Non attribué"),
+                    "date": valeur_json(dernier.get("date", "")),
+                    "theme": valeur_json(dernier.get("theme", "")),
+                    "service": valeur_json(dernier.get("service", "")),
+                    "agent": valeur_json(dernier.get("agent_responsable", "Non attribué")) or "Non attribué",
                     "image_storage": "Google Drive" if dernier.get("image_drive_id") else "Local" if dernier.get("image_path") else "Aucune"
                 }
             except:
@@ -1193,7 +1418,7 @@ def get_statistiques_globales() -> Dict[str, Any]:
             "meilleur_service": meilleur_service,
             "recommandations": generer_recommandations_proactives(),
             "dernier_post": dernier_post,
-            "data_source": "Excel local" if not GOOGLE_SHEETS_AVAILABLE else "Google Sheets",
+            "data_source": post_store.libelle,
             "gsheets_available": GOOGLE_SHEETS_AVAILABLE,
             "google_drive_available": GOOGLE_DRIVE_AVAILABLE,
             "agents_disponibles": len(AGENTS_BEN_TECH),
@@ -1239,12 +1464,14 @@ def analyser_tendances_avancees(df: pd.DataFrame) -> str:
         # Analyse par type de publication
         if "type_publication" in recent_posts.columns:
             types = recent_posts["type_publication"].value_counts()
+            types = types[types > 0]
             for type_pub, count in types.items():
                 tendances.append(f"• {type_pub}: {count} posts")
         
         # Analyse par style
         if "style" in recent_posts.columns:
-            styles = recent_posts["style"].value_counts().head(3)
+            styles = recent_posts["style"].value_counts()
+            styles = styles[styles > 0].head(3)
             tendances.append(f"Styles dominants: {', '.join(styles.index)}")
         
         return "\n".join(tendances) if tendances else "Tendances non identifiables"
@@ -1254,7 +1481,7 @@ def analyser_tendances_avancees(df: pd.DataFrame) -> str:
 
 def generer_recommandations_proactives() -> List[str]:
     """Génère des recommandations proactives basées sur l'analyse"""
-    df = lire_historique()
+    df = lire_historique(columns=["type_publication", "reaction_positive"])
     
     if df.empty:
         return [
@@ -0,0 +1,124 @@
+# modules/index_recherche.py - Index inversé pour la recherche de posts
+"""
+Index inversé en mémoire pour rechercher les posts sans parcourir tout l'historique.
+
+- Tokenisation insensible à la casse et aux accents ("Sécurité" == "securite")
+- Recherche par préfixe de mot ("auto" trouve "automatisation")
+- Maintenu de façon incrémentale (ajout, mise à jour, suppression d'un post)
+"""
+
+import re
+import bisect
+import threading
+import unicodedata
+from typing import Dict, List, Set, Any, Optional, Iterable
+
+# Champs texte indexés
+CHAMPS_INDEXES = ["titre", "theme", "service", "style", "texte_marketing"]
+
+def normaliser_tokens(texte: Any) -> List[str]:
+    """Découpe un texte en tokens minuscules sans accents"""
+    if texte is None:
+        return []
+    texte = unicodedata.normalize('NFKD', str(texte))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return re.findall(r'[a-z0-9]+', texte.lower())
+
+class IndexRecherche:
+    """Index inversé (champ, token) → identifiants de posts"""
+
+    def __init__(self, champs: Iterable[str] = CHAMPS_INDEXES):
+        self.champs = list(champs)
+        self._postings: Dict[str, Dict[str, Set[str]]] = {champ: {} for champ in self.champs}
+        self._vocabulaire: Dict[str, List[str]] = {champ: [] for champ in self.champs}  # trié
+        self._documents: Dict[str, Dict[str, Set[str]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return str(doc_id) in self._documents
+
+    def ajouter(self, doc_id: str, post: Dict[str, Any]):
+        """Indexe (ou réindexe) un post"""
+        if doc_id is None or str(doc_id).strip() == '':
+            return
+        doc_id = str(doc_id)
+
+        with self._lock:
+            self.retirer(doc_id)
+            tokens_doc = {}
+            for champ in self.champs:
+                tokens = set(normaliser_tokens(post.get(champ, '')))
+                tokens_doc[champ] = tokens
+                postings = self._postings[champ]
+                for token in tokens:
+                    if token not in postings:
+                        postings[token] = set()
+                        bisect.insort(self._vocabulaire[champ], token)
+                    postings[token].add(doc_id)
+            self._documents[doc_id] = tokens_doc
+
+    def retirer(self, doc_id: str):
+        """Retire un post de l'index"""
+        doc_id = str(doc_id)
+        with self._lock:
+            tokens_doc = self._documents.pop(doc_id, None)
+            if not tokens_doc:
+                return
+            for champ, tokens in tokens_doc.items():
+                postings = self._postings[champ]
+                for token in tokens:
+                    ids = postings.get(token)
+                    if ids is None:
+                        continue
+                    ids.discard(doc_id)
+                    if not ids:
+                        del postings[token]
+                        vocabulaire = self._vocabulaire[champ]
+                        position = bisect.bisect_left(vocabulaire, token)
+                        if position < len(vocabulaire) and vocabulaire[position] == token:
+                            vocabulaire.pop(position)
+
+    def reconstruire(self, posts: Iterable[Dict[str, Any]], colonne_id: str = "id_post"):
+        """Reconstruit l'index complet à partir d'une liste de posts"""
+        with self._lock:
+            self._postings = {champ: {} for champ in self.champs}
+            self._vocabulaire = {champ: [] for champ in self.champs}
+            self._documents = {}
+            for post in posts:
+                self.ajouter(post.get(colonne_id), post)
+
+    def _ids_prefixe(self, champ: str, prefixe: str) -> Set[str]:
+        """Identifiants des posts dont un token du champ commence par le préfixe"""
+        vocabulaire = self._vocabulaire[champ]
+        postings = self._postings[champ]
+        ids = set()
+        position = bisect.bisect_left(vocabulaire, prefixe)
+        while position < len(vocabulaire) and vocabulaire[position].startswith(prefixe):
+            ids |= postings[vocabulaire[position]]
+            position += 1
+        return ids
+
+    def rechercher(self, champ: str, texte: str) -> Optional[Set[str]]:
+        """Posts dont le champ contient tous les mots du texte (par préfixe)
+
+        Returns:
+            Ensemble d'identifiants, ou None si le champ n'est pas indexé
+        """
+        if champ not in self._postings:
+            return None
+
+        tokens = normaliser_tokens(texte)
+        with self._lock:
+            if not tokens:
+                return set(self._documents)
+
+            resultat = None
+            for token in tokens:
+                ids = self._ids_prefixe(champ, token)
+                resultat = ids if resultat is None else resultat & ids
+                if not resultat:
+                    return set()
+            return resultat
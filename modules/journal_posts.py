@@ -0,0 +1,392 @@
+# modules/journal_posts.py - Journal local des posts (ajout seul)
+"""
+Journal JSONL des posts, stockage local principal à la place du fichier Excel.
+
+- Chaque écriture ajoute une seule ligne en fin de fichier : coût constant,
+  quelle que soit la taille de l'historique (plus de réécriture du classeur)
+- Trois opérations : {"op": "ajout", "post": {...}},
+  {"op": "maj", "cle" | "index": ..., "updates": {...}} et
+  {"op": "suppression", "cles": [...]} (archivage)
+- L'état est reconstruit en rejouant le journal, incrémentalement : seules
+  les lignes ajoutées depuis la dernière lecture sont relues
+- historique_posts.xlsx devient un export (exporter_excel), écrit en
+  streaming par openpyxl en mode write-only ; au premier démarrage,
+  un fichier Excel existant est importé dans le journal
+- lire_excel : lecture d'un fichier Excel mise en cache tant que le fichier
+  ne change pas (date de modification et taille)
+
+Plusieurs processus (workers gunicorn) peuvent écrire le même journal : les
+écritures prennent un verrou fichier exclusif (<journal>.lock), les lectures
+n'en prennent aucun (une ligne incomplète est simplement relue plus tard).
+Vérification : modules/test_journal_posts.py
+"""
+
+import os
+import json
+import threading
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    print("⚠️ fcntl non disponible - écritures du journal non verrouillées entre processus")
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from modules.schema_posts import valeur_json
+
+# Configuration
+JOURNAL_PATH = os.environ.get('JOURNAL_POSTS_PATH', 'historique_posts.jsonl')
+EXCEL_FILE = "historique_posts.xlsx"
+
+# Colonnes du fichier Excel local
+COLONNES_EXCEL = [
+    "titre", "theme", "service", "style",
+    "texte_marketing", "script_video",
+    "reaction_positive", "reaction_negative",
+    "taux_conversion_estime", "publication_effective",
+    "nom_plateforme", "suggestion", "date",
+    "score_performance_final", "image_path", "image_auteur", "type_publication",
+    "agent_responsable",
+    "image_drive_id", "image_drive_filename", "image_drive_url",
+    "image_public_link", "image_direct_link"
+]
+
+# Clés stables d'un post : identifiant généré à la création, ID Facebook après publication
+COLONNES_CLES = ["id_post", "post_id"]
+
+# Lectures Excel en cache : chemin -> ((mtime_ns, taille), DataFrame)
+_cache_excel: Dict[str, Any] = {}
+_cache_excel_lock = threading.Lock()
+
+def lire_excel(chemin: str = EXCEL_FILE) -> pd.DataFrame:
+    """Lit un fichier Excel, reparsé seulement si sa date de modification ou sa taille change
+
+    Le DataFrame retourné est partagé entre appelants : ne pas le modifier en place.
+    Lève FileNotFoundError si le fichier n'existe pas.
+    """
+    stat = os.stat(chemin)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cache_excel_lock:
+        en_cache = _cache_excel.get(chemin)
+    if en_cache and en_cache[0] == signature:
+        return en_cache[1]
+
+    df = pd.read_excel(chemin, engine='openpyxl')
+    with _cache_excel_lock:
+        _cache_excel[chemin] = (signature, df)
+    return df
+
+class VerrouFichier:
+    """Verrou exclusif entre processus (flock sur un fichier dédié)
+
+    Non bloquant (bloquant=False) : lève BlockingIOError si un autre
+    processus détient déjà le verrou.
+    """
+
+    def __init__(self, chemin: str, bloquant: bool = True):
+        self.chemin = chemin
+        self.bloquant = bloquant
+        self._fichier = None
+
+    def __enter__(self):
+        self._fichier = open(self.chemin, 'a')
+        if FCNTL_AVAILABLE:
+            try:
+                fcntl.flock(self._fichier.fileno(), fcntl.LOCK_EX | (0 if self.bloquant else fcntl.LOCK_NB))
+            except OSError:
+                self._fichier.close()
+                self._fichier = None
+                raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fichier.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fichier.close()
+            self._fichier = None
+        return False
+
+def _cellule(valeur: Any) -> Any:
+    """Valeur acceptée par openpyxl (caractères de contrôle retirés)"""
+    if isinstance(valeur, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", valeur)
+    return valeur
+
+def _propre(valeurs: Dict[str, Any]) -> Dict[str, Any]:
+    """Valeurs sérialisables JSON (NaN, Timestamp, types NumPy...)"""
+    return {str(col): valeur_json(valeur) for col, valeur in valeurs.items()}
+
+class JournalPosts:
+    """Journal JSONL des posts, rejoué en mémoire de façon incrémentale"""
+
+    def __init__(self, chemin: str = JOURNAL_PATH, excel: str = EXCEL_FILE):
+        self.chemin = chemin
+        self.excel = excel
+        self._lock = threading.RLock()
+        self._posts: List[Dict[str, Any]] = []
+        self._colonnes: List[str] = list(COLONNES_EXCEL)
+        self._index_cles: Dict[str, int] = {}
+        self._identite = None   # (st_dev, st_ino) du fichier rejoué
+        self._offset = 0        # octets déjà rejoués
+        self._octets_propres = 0  # octets écrits par ce processus dans ce fichier
+        self._remplacements = 0   # fichier existant remplacé, tronqué ou supprimé
+        self._df_cache = None   # (version, DataFrame)
+        self._importe = False
+
+    def _verrou(self) -> VerrouFichier:
+        """Verrou des écritures, partagé par tous les processus"""
+        return VerrouFichier(self.chemin + ".lock")
+
+    # ----- Rejeu -----
+
+    def _reinitialiser(self, identite=None):
+        self._posts = []
+        self._colonnes = list(COLONNES_EXCEL)
+        self._index_cles = {}
+        self._identite = identite
+        self._offset = 0
+        self._octets_propres = 0
+
+    def _indexer(self, position: int, valeurs: Dict[str, Any]):
+        for col in COLONNES_CLES:
+            cle = valeurs.get(col)
+            if cle not in (None, ""):
+                self._index_cles[str(cle)] = position
+
+    def _appliquer(self, entree: Dict[str, Any]):
+        op = entree.get("op")
+        if op == "ajout":
+            post = dict(entree.get("post") or {})
+            self._posts.append(post)
+            self._indexer(len(self._posts) - 1, post)
+            valeurs = post
+        elif op == "maj":
+            if "cle" in entree:
+                position = self._index_cles.get(str(entree["cle"]))
+            else:
+                position = entree.get("index")
+            if position is None or not 0 <= position < len(self._posts):
+                return
+            valeurs = entree.get("updates") or {}
+            self._posts[position].update(valeurs)
+            self._indexer(position, valeurs)
+        elif op == "suppression":
+            positions = {self._index_cles[str(cle)] for cle in entree.get("cles") or []
+                         if str(cle) in self._index_cles}
+            if positions:
+                self._posts = [post for i, post in enumerate(self._posts) if i not in positions]
+                self._index_cles = {}
+                for position, post in enumerate(self._posts):
+                    self._indexer(position, post)
+            return
+        else:
+            return
+
+        for col in valeurs:
+            if col not in self._colonnes:
+                self._colonnes.append(col)
+
+    def _rattraper(self):
+        """Rejoue les lignes ajoutées au journal depuis la dernière lecture"""
+        self._importer_excel()
+        try:
+            stat = os.stat(self.chemin)
+        except FileNotFoundError:
+            if self._identite is not None or self._posts:
+                self._remplacements += 1
+                self._reinitialiser()
+            return
+
+        identite = (stat.st_dev, stat.st_ino)
+        if identite != self._identite or stat.st_size < self._offset:
+            # Fichier remplacé ou tronqué : rejeu complet
+            if self._identite is not None:
+                self._remplacements += 1
+            self._reinitialiser(identite)
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.chemin, 'rb') as f:
+            f.seek(self._offset)
+            donnees = f.read()
+
+        # Une ligne en cours d'écriture (sans \n final) sera relue plus tard
+        fin = donnees.rfind(b"\n") + 1
+        for ligne in donnees[:fin].splitlines():
+            if not ligne.strip():
+                continue
+            try:
+                self._appliquer(json.loads(ligne))
+            except ValueError as e:
+                print(f"⚠️ Ligne de journal ignorée: {e}")
+        self._offset += fin
+
+    def _ajouter_entree(self, entree: Dict[str, Any]):
+        """Ajoute une ligne au journal (une seule écriture, sous verrou fichier)"""
+        ligne = json.dumps(entree, ensure_ascii=False, default=str) + "\n"
+        with open(self.chemin, 'a', encoding='utf-8') as f:
+            f.write(ligne)
+            f.flush()
+            os.fsync(f.fileno())
+        # Rejeu d'abord (fichier créé ou remplacé : compteurs remis à zéro),
+        # puis octets de cette ligne comptés comme écrits par ce processus
+        self._rattraper()
+        self._octets_propres += len(ligne.encode('utf-8'))
+
+    def _importer_excel(self):
+        """Importe une seule fois l'ancien historique Excel dans un journal absent"""
+        if self._importe:
+            return
+        self._importe = True
+        if os.path.exists(self.chemin) or not os.path.exists(self.excel):
+            return
+
+        try:
+            with self._verrou():
+                # Un autre processus a pu importer entre-temps
+                if os.path.exists(self.chemin):
+                    return
+                self._ecrire_import()
+        except Exception as e:
+            print(f"❌ Erreur import Excel dans le journal: {e}")
+
+    def _ecrire_import(self):
+        """Écrit le journal initial à partir du fichier Excel (remplacement atomique)"""
+        df = lire_excel(self.excel)
+        temporaire = self.chemin + ".tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            for post in df.to_dict('records'):
+                f.write(json.dumps({"op": "ajout", "post": _propre(post)},
+                                   ensure_ascii=False, default=str) + "\n")
+        os.replace(temporaire, self.chemin)
+        print(f"📥 {len(df)} posts importés de {self.excel} dans le journal {self.chemin}")
+
+    # ----- API -----
+
+    def version(self) -> tuple:
+        """Jeton qui change à chaque écriture (y compris d'un autre processus)"""
+        with self._lock:
+            self._rattraper()
+            return (self._identite, self._offset)
+
+    def version_externe(self) -> tuple:
+        """Jeton qui ne change qu'avec les écritures des autres processus
+        (octets du journal non écrits par ce processus)"""
+        with self._lock:
+            self._rattraper()
+            return (self._remplacements, self._offset - self._octets_propres)
+
+    def lire(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lit les posts du journal (DataFrame reconstruit seulement s'il a changé)"""
+        with self._lock:
+            self._rattraper()
+            version = (self._identite, self._offset)
+            if self._df_cache is None or self._df_cache[0] != version:
+                df = pd.DataFrame(self._posts, columns=self._colonnes).fillna("")
+                self._df_cache = (version, df)
+            df = self._df_cache[1]
+
+        if columns:
+            return df.reindex(columns=columns, fill_value="")
+        return df.copy()
+
+    def ajouter_post(self, post: Dict[str, Any]):
+        with self._lock:
+            self._importer_excel()
+            with self._verrou():
+                self._ajouter_entree({"op": "ajout", "post": _propre(post)})
+            self._rattraper()
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        """Met à jour le post à la position index (0 = premier post)"""
+        with self._lock:
+            self._importer_excel()  # avant le verrou, qu'il prend lui-même
+            with self._verrou():
+                # Vérification et écriture sous le même verrou
+                self._rattraper()
+                if not 0 <= index < len(self._posts):
+                    return False
+                self._ajouter_entree({"op": "maj", "index": int(index), "updates": _propre(updates)})
+            self._rattraper()
+            return True
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un post par son id_post (ou son ID Facebook post_id)"""
+        with self._lock:
+            self._importer_excel()
+            with self._verrou():
+                self._rattraper()
+                if str(cle) not in self._index_cles:
+                    return False
+                self._ajouter_entree({"op": "maj", "cle": str(cle), "updates": _propre(updates)})
+            self._rattraper()
+            return True
+
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        """Supprime des posts par id_post (ou post_id), retourne le nombre supprimé"""
+        with self._lock:
+            self._importer_excel()
+            with self._verrou():
+                self._rattraper()
+                presentes = sorted({str(cle) for cle in cles if str(cle) in self._index_cles})
+                if not presentes:
+                    return 0
+                supprimes = len({self._index_cles[cle] for cle in presentes})
+                self._ajouter_entree({"op": "suppression", "cles": presentes})
+            self._rattraper()
+            return supprimes
+
+    def contient(self, cle: Any) -> bool:
+        """Indique si un post d'id_post (ou post_id) cle est dans le journal"""
+        if cle in (None, ""):
+            return False
+        with self._lock:
+            self._rattraper()
+            return str(cle) in self._index_cles
+
+    def compter_posts(self) -> int:
+        with self._lock:
+            self._rattraper()
+            return len(self._posts)
+
+    def exporter_excel(self, chemin: Optional[str] = None) -> int:
+        """Exporte l'historique vers Excel, en streaming (openpyxl write-only)
+
+        Returns:
+            Nombre de posts exportés
+        """
+        chemin = chemin or self.excel
+        with self._lock:
+            self._rattraper()
+            posts = list(self._posts)
+            colonnes = list(self._colonnes)
+
+        try:
+            classeur = Workbook(write_only=True)
+            feuille = classeur.create_sheet()
+            feuille.append(colonnes)
+            for post in posts:
+                feuille.append([_cellule(post.get(col, "")) for col in colonnes])
+
+            temporaire = f"{chemin}.{os.getpid()}.tmp.xlsx"
+            classeur.save(temporaire)
+            os.replace(temporaire, chemin)
+            print(f"📤 {len(posts)} posts exportés vers {chemin}")
+            return len(posts)
+        except Exception as e:
+            print(f"❌ Erreur export Excel: {e}")
+            return 0
+
+# Instance globale
+journal_posts = JournalPosts()
+
+def exporter_excel(chemin: Optional[str] = None) -> int:
+    return journal_posts.exporter_excel(chemin)
+
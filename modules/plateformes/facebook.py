@@ -5,7 +5,7 @@ import requests
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-from modules.ia import generer_reponse_commentaire
+from modules.ia import generer_reponse_commentaire, generer_reponses_commentaires
 from config import FACEBOOK_PAGE_ID, FACEBOOK_ACCESS_TOKEN
 
 API_URL = "https://graph.facebook.com/v19.0"
@@ -231,29 +231,35 @@ def traiter_anciens_posts_et_commentaires() -> Dict[str, Any]:
         posts = obtenir_posts_recents(days_back=MAX_DAYS_OLD)
         stats['posts_checked'] = len(posts)
         
+        # 2. Récupérer les commentaires non répondus de tous les posts
+        commentaires_par_post = []
         for post in posts:
+            un_replied_comments = obtenir_commentaires_non_repondus(
+                post.get('id'), 
+                hours_limit=COMMENT_DAYS_LIMIT * 24
+            )
+            commentaires_par_post.append((post, un_replied_comments))
+            stats['comments_found'] += len(un_replied_comments)
+        
+        # 3. Générer toutes les réponses IA par lots (une requête par lot)
+        reponses = generer_reponses_commentaires([
+            (comment['comment_id'], comment['message'])
+            for _, comments in commentaires_par_post for comment in comments
+        ])
+        
+        for post, un_replied_comments in commentaires_par_post:
             post_id = post.get('id')
             post_stats = {
                 'post_id': post_id,
                 'age_days': post.get('age_days', 0),
-                'comments_checked': 0,
+                'comments_checked': len(un_replied_comments),
                 'comments_replied': 0
             }
             
-            # 2. Récupérer les commentaires non répondus
-            un_replied_comments = obtenir_commentaires_non_repondus(
-                post_id, 
-                hours_limit=COMMENT_DAYS_LIMIT * 24
-            )
-            
-            post_stats['comments_checked'] = len(un_replied_comments)
-            stats['comments_found'] += len(un_replied_comments)
-            
-            # 3. Traiter chaque commentaire non répondu
+            # 4. Répondre à chaque commentaire non répondu
             for comment in un_replied_comments:
                 try:
-                    # Générer une réponse IA
-                    reponse_ia = generer_reponse_commentaire(comment['message'])
+                    reponse_ia = reponses.get(comment['comment_id']) or generer_reponse_commentaire(comment['message'], chercher_cache=False)
                     
                     # Répondre au commentaire
                     if repondre_au_commentaire(comment['comment_id'], reponse_ia):
@@ -489,10 +495,14 @@ def traiter_commentaires(post_id: str) -> List[Dict]:
     un_replied = obtenir_commentaires_non_repondus(post_id, hours_limit=24)
     results = []
     
+    # Réponses IA générées par lots
+    reponses = generer_reponses_commentaires([
+        (comment['comment_id'], comment['message']) for comment in un_replied
+    ]) if un_replied else {}
+    
     for comment in un_replied:
         try:
-            # Générer réponse IA
-            reponse = generer_reponse_commentaire(comment['message'])
+            reponse = reponses.get(comment['comment_id']) or generer_reponse_commentaire(comment['message'], chercher_cache=False)
             
             # Répondre
             if repondre_au_commentaire(comment['comment_id'], reponse):
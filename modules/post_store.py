@@ -0,0 +1,475 @@
+# modules/post_store.py - Interface de stockage de l'historique des posts
+"""
+Point d'accès unique au stockage des posts.
+
+Backends disponibles (variable d'environnement POST_STORE) :
+- "sheets" : Google Sheets (lectures servies par la réplique SQLite locale,
+             où les écritures de ce processus sont appliquées immédiatement)
+- "sqlite" : base SQLite locale comme stockage principal (gros volumes)
+- "local"  : journal JSONL local (journal_posts.py), exporté vers Excel
+             à la demande ("excel" est conservé comme alias)
+- "auto"   : Google Sheets s'il est configuré, sinon le journal local (par défaut)
+
+Quand le backend principal n'est pas le journal local, celui-ci reste utilisé
+comme secours en lecture et comme sauvegarde locale (POST_STORE_BACKUP_LOCAL).
+
+Les lectures acceptent une plage de dates : les chemins qui ne montrent que
+les posts récents lisent la fenêtre debut_fenetre_recente()
+(POST_STORE_FENETRE_JOURS jours) au lieu de tout l'historique.
+"""
+
+import os
+import uuid
+import threading
+import pandas as pd
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+# Configuration
+POST_STORE = os.environ.get('POST_STORE', 'auto').lower()
+POST_STORE_SQLITE_PATH = os.environ.get('POST_STORE_SQLITE_PATH', 'posts.db')
+POST_STORE_REPLICA = os.environ.get('POST_STORE_REPLICA', 'true').lower() == 'true'
+POST_STORE_FENETRE_JOURS = int(os.environ.get('POST_STORE_FENETRE_JOURS', 30))
+POST_STORE_BACKUP_LOCAL = os.environ.get(
+    'POST_STORE_BACKUP_LOCAL', os.environ.get('POST_STORE_BACKUP_EXCEL', 'true')
+).lower() == 'true'
+
+from modules.journal_posts import journal_posts, EXCEL_FILE, COLONNES_EXCEL
+
+try:
+    from modules.google_sheets_db import gsheets_db, COLONNES_CLES
+    GOOGLE_SHEETS_AVAILABLE = True
+except Exception as e:
+    GOOGLE_SHEETS_AVAILABLE = False
+    COLONNES_CLES = ["id_post", "post_id"]
+    print(f"⚠️ Google Sheets non disponible pour le stockage: {e}")
+
+from modules.archive_posts import fusionner_archive, ARCHIVE_PATH
+from modules.schema_posts import appliquer_schema, colonnes_lecture_datee, filtrer_lecture_datee
+from modules.statistiques_selection import statistiques_selection
+
+try:
+    from modules.replica_sqlite import TablePostsSQLite, replica, lire_historique_replica
+    SQLITE_AVAILABLE = True
+except Exception as e:
+    SQLITE_AVAILABLE = False
+    print(f"⚠️ SQLite non disponible pour le stockage: {e}")
+
+class PostStore(ABC):
+    """Interface commune des backends de stockage des posts"""
+
+    nom = "abstrait"
+    libelle = "Stockage"
+
+    def est_disponible(self) -> bool:
+        return True
+
+    @abstractmethod
+    def lire_historique(self, columns: Optional[List[str]] = None, coherent: bool = False,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None) -> pd.DataFrame:
+        """Lit l'historique
+        
+        Args:
+            columns: lecture projetée ; None pour toutes les colonnes
+            coherent: True pour lire la source de vérité plutôt qu'une réplique
+                (nécessaire avant d'écrire par index)
+            date_debut, date_fin: bornes optionnelles sur la colonne date ; les
+                index du DataFrame ne sont alors plus des positions de l'historique
+        """
+
+    @abstractmethod
+    def sauvegarder_post(self, post: Dict[str, Any]) -> bool:
+        """Ajoute un post à la fin de l'historique"""
+
+    @abstractmethod
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        """Met à jour le post à la position index de l'historique"""
+
+    @abstractmethod
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un post par sa clé stable (id_post ou post_id)"""
+
+    @abstractmethod
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        """Supprime des posts par clé stable, retourne le nombre supprimé"""
+
+    def compter_posts(self) -> int:
+        return len(self.lire_historique(columns=["titre"]))
+
+    def version(self) -> Optional[Any]:
+        """Jeton qui change quand le contenu change (None : inconnu, pas de cache)"""
+        return None
+
+    def version_externe(self) -> Optional[Any]:
+        """Jeton qui change seulement quand un autre processus modifie le
+        contenu (None : inconnu)"""
+        return None
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "backend": self.nom,
+            "status": "initialisé" if self.est_disponible() else "non initialisé"
+        }
+
+class SheetsPostStore(PostStore):
+    """Google Sheets, lectures servies par la réplique SQLite si activée"""
+
+    nom = "sheets"
+    libelle = "Google Sheets"
+
+    def est_disponible(self) -> bool:
+        return gsheets_db.initialized
+
+    def lire_historique(self, columns: Optional[List[str]] = None, coherent: bool = False,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None) -> pd.DataFrame:
+        if POST_STORE_REPLICA and SQLITE_AVAILABLE and not coherent:
+            try:
+                df = lire_historique_replica(columns, date_debut, date_fin)
+                # Fenêtre vide d'une réplique remplie : résultat valide
+                if df is not None and (not df.empty or replica.compter_posts() > 0):
+                    return df
+            except Exception as e:
+                print(f"⚠️ Erreur réplique SQLite: {e}")
+        # Partitionné : seules les feuilles des mois de la plage sont lues
+        return gsheets_db.lire_historique(columns, date_debut, date_fin)
+
+    def version(self) -> Optional[Any]:
+        # Seules les lectures servies par la réplique sont versionnées
+        if POST_STORE_REPLICA and SQLITE_AVAILABLE and replica.est_initialisee() and replica.compter_posts() > 0:
+            return ("replica", replica.version)
+        return None
+
+    def version_externe(self) -> Optional[Any]:
+        # Le sheet fait foi, y compris pour les lectures servies par la réplique
+        if not gsheets_db.initialized:
+            return None
+        return ("sheets", gsheets_db.version_externe())
+
+    def _apres_ecriture(self, appliquer):
+        """Applique l'écriture à la réplique dans ce processus (la lecture
+        suivante la voit), puis demande la synchronisation en arrière-plan
+        qui reprend les écritures des autres processus"""
+        if not (POST_STORE_REPLICA and SQLITE_AVAILABLE):
+            return
+        # Réplique jamais synchronisée : elle n'est pas lue, rien à appliquer
+        if replica.est_initialisee():
+            try:
+                replica.appliquer_ecriture(appliquer)
+                return
+            except Exception as e:
+                print(f"⚠️ Écriture dans la réplique SQLite échouée: {e}")
+        replica.demander_synchronisation()
+
+    def sauvegarder_post(self, post: Dict[str, Any]) -> bool:
+        succes = gsheets_db.sauvegarder_post(post)
+        if succes:
+            self._apres_ecriture(lambda: replica.ajouter_post(post))
+        return succes
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        succes = gsheets_db.mettre_a_jour_post(index, updates)
+        if succes:
+            self._apres_ecriture(lambda: replica.mettre_a_jour_post(index, updates))
+        return succes
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        succes = gsheets_db.mettre_a_jour_post_par_cle(cle, updates)
+        if succes:
+            self._apres_ecriture(lambda: replica.mettre_a_jour_post_par_cle(cle, updates))
+        return succes
+
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        supprimes = gsheets_db.supprimer_posts_par_cle(cles)
+        if supprimes:
+            self._apres_ecriture(lambda: replica.supprimer_posts_par_cle(cles))
+        return supprimes
+
+    def compter_posts(self) -> int:
+        return gsheets_db.compter_posts()
+
+    def get_info(self) -> Dict[str, Any]:
+        info = gsheets_db.get_sheet_info()
+        info["backend"] = self.nom
+        if POST_STORE_REPLICA and SQLITE_AVAILABLE:
+            info["replica"] = replica.get_info()
+        return info
+
+class SQLitePostStore(PostStore):
+    """Base SQLite locale comme stockage principal"""
+
+    nom = "sqlite"
+    libelle = "SQLite local"
+
+    def __init__(self, chemin: str = POST_STORE_SQLITE_PATH):
+        self.table = TablePostsSQLite(chemin)
+
+    def lire_historique(self, columns: Optional[List[str]] = None, coherent: bool = False,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None) -> pd.DataFrame:
+        return self.table.lire(columns, date_debut, date_fin)
+
+    def sauvegarder_post(self, post: Dict[str, Any]) -> bool:
+        try:
+            self.table.ajouter_post(post)
+            return True
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde SQLite: {e}")
+            return False
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        try:
+            return self.table.mettre_a_jour_post(index, updates)
+        except Exception as e:
+            print(f"❌ Erreur mise à jour SQLite: {e}")
+            return False
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        try:
+            return self.table.mettre_a_jour_post_par_cle(cle, updates)
+        except Exception as e:
+            print(f"❌ Erreur mise à jour SQLite: {e}")
+            return False
+
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        try:
+            return self.table.supprimer_posts_par_cle(cles)
+        except Exception as e:
+            print(f"❌ Erreur suppression SQLite: {e}")
+            return 0
+
+    def compter_posts(self) -> int:
+        return self.table.compter_posts()
+
+    def version(self) -> Optional[Any]:
+        return ("sqlite", self.table.version)
+
+    def version_externe(self) -> Optional[Any]:
+        return ("sqlite", self.table.version_externe())
+
+    def get_info(self) -> Dict[str, Any]:
+        info = super().get_info()
+        info.update({"chemin": self.table.chemin, "posts": self.table.compter_posts()})
+        return info
+
+class JournalPostStore(PostStore):
+    """Journal JSONL local (écritures en ajout seul), exporté vers Excel à la demande"""
+
+    nom = "local"
+    libelle = "Journal local"
+
+    def __init__(self, journal=journal_posts):
+        self.journal = journal
+
+    def lire_historique(self, columns: Optional[List[str]] = None, coherent: bool = False,
+                        date_debut: Optional[datetime] = None,
+                        date_fin: Optional[datetime] = None) -> pd.DataFrame:
+        try:
+            df = self.journal.lire(colonnes_lecture_datee(columns, date_debut, date_fin))
+            return filtrer_lecture_datee(df, columns, date_debut, date_fin)
+        except Exception as e:
+            print(f"❌ Erreur lecture journal local: {e}")
+            return pd.DataFrame(columns=columns or COLONNES_EXCEL)
+
+    def sauvegarder_post(self, post: Dict[str, Any]) -> bool:
+        try:
+            self.journal.ajouter_post(post)
+            return True
+        except Exception as e:
+            print(f"❌ Erreur sauvegarde locale: {e}")
+            return False
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        try:
+            return self.journal.mettre_a_jour_post(index, updates)
+        except Exception as e:
+            print(f"❌ Erreur mise à jour journal local: {e}")
+            return False
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        try:
+            return self.journal.mettre_a_jour_post_par_cle(cle, updates)
+        except Exception as e:
+            print(f"❌ Erreur mise à jour journal local: {e}")
+            return False
+
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        try:
+            return self.journal.supprimer_posts_par_cle(cles)
+        except Exception as e:
+            print(f"❌ Erreur suppression journal local: {e}")
+            return 0
+
+    def compter_posts(self) -> int:
+        return self.journal.compter_posts()
+
+    def version(self) -> Optional[Any]:
+        return ("local", self.journal.version())
+
+    def version_externe(self) -> Optional[Any]:
+        return ("local", self.journal.version_externe())
+
+    def get_info(self) -> Dict[str, Any]:
+        info = super().get_info()
+        info.update({"chemin": self.journal.chemin, "export_excel": self.journal.excel})
+        return info
+
+def creer_post_store(backend: str = POST_STORE) -> PostStore:
+    """Instancie le backend demandé (POST_STORE)"""
+    if backend == "auto":
+        backend = "sheets" if GOOGLE_SHEETS_AVAILABLE and gsheets_db.client is not None else "local"
+
+    if backend == "sheets" and GOOGLE_SHEETS_AVAILABLE:
+        return SheetsPostStore()
+    if backend == "sqlite" and SQLITE_AVAILABLE:
+        return SQLitePostStore()
+    if backend not in ("local", "excel"):
+        print(f"⚠️ Backend de stockage '{backend}' indisponible, utilisation du journal local")
+    return JournalPostStore()
+
+# Instances globales : backend principal et journal local (secours / sauvegarde)
+post_store = creer_post_store()
+store_local = post_store if isinstance(post_store, JournalPostStore) else JournalPostStore()
+print(f"🗃️ Stockage des posts: {post_store.libelle}")
+
+def debut_fenetre_recente(jours: int = POST_STORE_FENETRE_JOURS) -> datetime:
+    """Début de la fenêtre des posts récents : minuit, il y a jours jours
+    (stable sur la journée, donc réutilisable comme clé de cache)"""
+    return datetime.combine(datetime.now().date() - timedelta(days=jours), datetime.min.time())
+
+# DataFrames typés partagés : (colonnes, historique_complet, plage de dates) -> (version, df)
+_frames_types: Dict[Any, Any] = {}
+_frames_lock = threading.Lock()
+
+def _version_archive() -> Optional[tuple]:
+    try:
+        stat = os.stat(ARCHIVE_PATH)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def lire_historique_posts(columns: Optional[List[str]] = None, historique_complet: bool = False,
+                          typer: bool = False, date_debut: Optional[datetime] = None,
+                          date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    """Lit l'historique depuis le backend principal, le journal local en secours
+
+    Args:
+        columns: lecture projetée ; None pour toutes les colonnes
+        historique_complet: True pour inclure les posts archivés (archive_posts.py)
+        typer: True pour le DataFrame typé (schema_posts.py), calculé une fois
+            par version du stockage et partagé en lecture seule entre appelants
+        date_debut, date_fin: bornes optionnelles sur la colonne date
+            (voir debut_fenetre_recente)
+    """
+    if not typer:
+        return _lire_historique_brut(columns, historique_complet, date_debut, date_fin)
+
+    cle = (tuple(columns) if columns else None, historique_complet, date_debut, date_fin)
+    version = post_store.version()
+    if version is not None:
+        version = (version, _version_archive() if historique_complet else None)
+        with _frames_lock:
+            en_cache = _frames_types.get(cle)
+        if en_cache and en_cache[0] == version:
+            return en_cache[1]
+
+    df = appliquer_schema(_lire_historique_brut(columns, historique_complet, date_debut, date_fin))
+    if version is not None:
+        with _frames_lock:
+            _frames_types[cle] = (version, df)
+    return df
+
+def _lire_historique_brut(columns: Optional[List[str]], historique_complet: bool,
+                          date_debut: Optional[datetime] = None,
+                          date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    # Colonne date conservée jusqu'au filtrage final (archive comprise)
+    lecture = colonnes_lecture_datee(columns, date_debut, date_fin)
+    df = None
+    if post_store is not store_local:
+        try:
+            df = post_store.lire_historique(lecture, date_debut=date_debut, date_fin=date_fin)
+            if df is not None and not df.empty:
+                print(f"📊 {len(df)} posts chargés depuis {post_store.libelle}")
+            else:
+                print(f"⚠️ {post_store.libelle} vide ou erreur, fallback local")
+                df = None
+        except Exception as e:
+            print(f"⚠️ Erreur {post_store.libelle}, fallback local: {e}")
+            df = None
+
+    if df is None:
+        df = store_local.lire_historique(lecture, date_debut=date_debut, date_fin=date_fin)
+        print(f"📊 {len(df)} posts chargés depuis {store_local.libelle}")
+
+    if historique_complet:
+        df = fusionner_archive(df, lecture)
+    return filtrer_lecture_datee(df, columns, date_debut, date_fin)
+
+def sauvegarder_post(post: Dict[str, Any]) -> bool:
+    """Sauvegarde un post dans le backend principal (+ sauvegarde dans le journal local)"""
+    # Clé stable attribuée avant l'écriture, identique dans tous les backends
+    if not post.get('id_post'):
+        post['id_post'] = uuid.uuid4().hex
+    succes = _sauvegarder_post(post)
+    if succes:
+        statistiques_selection.ajouter_post(post)
+    return succes
+
+def _sauvegarder_post(post: Dict[str, Any]) -> bool:
+    succes = False
+    try:
+        succes = post_store.sauvegarder_post(post)
+        if succes:
+            print(f"✅ Post sauvegardé dans {post_store.libelle}: {post.get('titre', 'N/A')}")
+        else:
+            print(f"⚠️ Échec sauvegarde {post_store.libelle}, fallback local uniquement")
+    except Exception as e:
+        print(f"⚠️ Erreur {post_store.libelle}: {e}, fallback local uniquement")
+
+    if post_store is store_local or (succes and not POST_STORE_BACKUP_LOCAL):
+        return succes
+
+    if store_local.sauvegarder_post(post):
+        if succes:
+            print(f"✅ Post sauvegardé localement (backup): {post.get('titre', 'Sans titre')}")
+        else:
+            print(f"✅ Post sauvegardé localement uniquement: {post.get('titre', 'Sans titre')}")
+        return True
+    return succes
+
+def mettre_a_jour_post(index: int, updates: Dict[str, Any]) -> bool:
+    succes = post_store.mettre_a_jour_post(index, updates)
+    if succes:
+        statistiques_selection.mettre_a_jour_post(index, updates)
+    return succes
+
+def mettre_a_jour_post_par_cle(cle: str, updates: Dict[str, Any]) -> bool:
+    succes = post_store.mettre_a_jour_post_par_cle(cle, updates)
+    if succes:
+        statistiques_selection.mettre_a_jour_post_par_cle(cle, updates)
+    return succes
+
+def supprimer_posts_par_cle(cles: List[str]) -> int:
+    """Supprime des posts du backend principal (et de la sauvegarde locale)
+
+    Returns:
+        Nombre de posts supprimés du backend principal
+    """
+    supprimes = post_store.supprimer_posts_par_cle(cles)
+    if post_store is not store_local and POST_STORE_BACKUP_LOCAL:
+        store_local.supprimer_posts_par_cle(cles)
+    if supprimes:
+        statistiques_selection.invalider()
+    return supprimes
+
+def compter_posts() -> int:
+    return post_store.compter_posts()
+
+def get_info_stockage() -> Dict[str, Any]:
+    return post_store.get_info()
+
+def exporter_historique_excel() -> int:
+    """Exporte le journal local vers historique_posts.xlsx (job périodique / à la demande)"""
+    return store_local.journal.exporter_excel()
@@ -14,10 +14,14 @@ from modules.plateformes.facebook import (
     get_statut_service_commentaires,
     executer_traitement_manuel
 )
-from modules.google_sheets_db import (
-    mettre_a_jour_post_gsheets,
-    lire_historique_gsheets,
-    gsheets_db
+from modules.schema_posts import valeur_json
+from modules.post_store import (
+    post_store,
+    lire_historique_posts,
+    mettre_a_jour_post,
+    mettre_a_jour_post_par_cle,
+    get_info_stockage,
+    debut_fenetre_recente
 )
 
 INTERVALLE_ANALYSE = 60  # secondes
@@ -65,23 +69,36 @@ def log_message(category: str, message: str, level: str = "INFO"):
 # -----------------------------
 def est_deja_publie(post_data):
     """Vérifie si un post est déjà publié"""
-    nom_plateforme = post_data.get("nom_plateforme", "")
-    publication_effective = post_data.get("publication_effective", "")
-    post_id = post_data.get("post_id", "")
+    nom_plateforme = str(post_data.get("nom_plateforme", "") or "").strip()
+    publication_effective = str(post_data.get("publication_effective", "") or "").strip()
+    post_id = str(post_data.get("post_id", "") or "").strip()
     
-    if (nom_plateforme and nom_plateforme != "") or \
-       (publication_effective and publication_effective.lower() in ["oui", "yes", "true"]) or \
-       (post_id and post_id != ""):
+    if nom_plateforme or \
+       publication_effective.lower() in ["oui", "yes", "true"] or \
+       post_id:
         return True
     return False
 
+def mettre_a_jour_post_publie(post_data, index, updates):
+    """Met à jour un post par sa clé stable (id_post), ou par index à défaut"""
+    cle = post_data.get("id_post", "")
+    if cle:
+        return mettre_a_jour_post_par_cle(cle, updates)
+    return mettre_a_jour_post(index, updates)
+
 def lire_posts_non_publies():
-    """Récupère les posts non publiés depuis Google Sheets"""
+    """Récupère les posts non publiés depuis le stockage des posts"""
     try:
-        df = lire_historique_gsheets()
+        # Lecture cohérente (sans réplique), limitée aux posts récents : les
+        # mises à jour se font par id_post
+        df = post_store.lire_historique(coherent=True, date_debut=debut_fenetre_recente())
+        if not df.empty and ("id_post" not in df.columns
+                             or (df["id_post"].astype(str).str.strip() == "").any()):
+            # Posts sans id_post : mises à jour par index, qui exigent l'historique complet
+            df = post_store.lire_historique(coherent=True)
         
         if df.empty:
-            log_message("publications", "Aucun post dans Google Sheets", "INFO")
+            log_message("publications", f"Aucun post dans {post_store.libelle}", "INFO")
             return []
         
         posts_non_publies = []
@@ -91,7 +108,7 @@ def lire_posts_non_publies():
             
             if not est_deja_publie(post_data):
                 # Vérifier si le post a déjà été tenté et a échoué
-                last_attempt = post_data.get("derniere_tentative", "")
+                last_attempt = str(post_data.get("derniere_tentative", "") or "").strip()
                 if last_attempt:
                     try:
                         last_attempt_dt = datetime.strptime(last_attempt, "%Y-%m-%d %H:%M:%S")
@@ -109,7 +126,7 @@ def lire_posts_non_publies():
         return posts_non_publies
         
     except Exception as e:
-        log_message("errors", f"Erreur lecture Google Sheets: {e}", "ERROR")
+        log_message("errors", f"Erreur lecture {post_store.libelle}: {e}", "ERROR")
         return []
 
 def verifier_heure_publication():
@@ -161,7 +178,7 @@ def publier_post_facebook(post_data, index):
             log_message("errors", f"Publication échouée: {error_msg}", "ERROR")
             
             # Enregistrer l'échec dans Google Sheets
-            mettre_a_jour_post_gsheets(index, {
+            mettre_a_jour_post_publie(post_data, index, {
                 "derniere_tentative": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "statut_publication": "échec",
                 "erreur_publication": error_msg[:100]  # Limiter la longueur
@@ -196,7 +213,7 @@ def publier_post_facebook(post_data, index):
         }
         
         # Mettre à jour dans Google Sheets
-        success = mettre_a_jour_post_gsheets(index, updates)
+        success = mettre_a_jour_post_publie(post_data, index, updates)
         
         if success:
             log_message("publications", f"Google Sheets mis à jour pour '{titre}'", "SUCCESS")
@@ -375,7 +392,11 @@ def thread_automatisation():
 def verifier_etat_publications():
     """Vérifie l'état des publications récentes"""
     try:
-        df = lire_historique_gsheets()
+        # DataFrame typé partagé (reaction_positive numérique, dates en datetime64)
+        df = lire_historique_posts(columns=[
+            "titre", "publication_effective", "reaction_positive",
+            "commentaires_traites", "date_publication"
+        ], typer=True)
         
         if df.empty:
             return {"status": "no_data", "message": "Aucune donnée disponible"}
@@ -400,38 +421,35 @@ def verifier_etat_publications():
         if publies > 0:
             # Calculer les moyennes
             if "reaction_positive" in df.columns:
-                reactions = pd.to_numeric(df["reaction_positive"], errors='coerce').fillna(0)
-                stats["reactions_moyennes"] = reactions.mean()
+                stats["reactions_moyennes"] = float(df["reaction_positive"].mean())
             
             if "commentaires_traites" in df.columns:
-                commentaires = pd.to_numeric(df["commentaires_traites"], errors='coerce').fillna(0)
-                stats["commentaires_moyens"] = commentaires.mean()
+                stats["commentaires_moyens"] = float(df["commentaires_traites"].mean())
             
             # Trouver le meilleur post
             if "reaction_positive" in df.columns:
-                best_idx = df["reaction_positive"].astype(str).str.extract('(\d+)').fillna(0).astype(int).idxmax()
+                best_idx = df["reaction_positive"].idxmax()
                 if pd.notna(best_idx):
                     best_post = df.loc[best_idx]
                     stats["meilleur_post"] = {
                         "titre": best_post.get("titre", "N/A"),
-                        "reactions": best_post.get("reaction_positive", 0),
-                        "date": best_post.get("date_publication", "N/A")
+                        "reactions": valeur_json(best_post.get("reaction_positive", 0)),
+                        "date": valeur_json(best_post.get("date_publication", "")) or "N/A"
                     }
         
         # Dernières publications
         if "date_publication" in df.columns:
-            df_publies = df[df["publication_effective"] == "oui"].copy()
+            df_publies = df[df["publication_effective"] == "oui"]
             if not df_publies.empty:
-                df_publies["date_publication"] = pd.to_datetime(df_publies["date_publication"], errors='coerce')
                 df_publies = df_publies.sort_values("date_publication", ascending=False)
                 
                 dernieres = df_publies.head(5).to_dict('records')
                 stats["dernieres_publications"] = [
                     {
                         "titre": p.get("titre", "N/A"),
-                        "date": p.get("date_publication", "N/A"),
-                        "reactions": p.get("reaction_positive", 0),
-                        "commentaires": p.get("commentaires_traites", 0)
+                        "date": valeur_json(p.get("date_publication", "")) or "N/A",
+                        "reactions": valeur_json(p.get("reaction_positive", 0)),
+                        "commentaires": valeur_json(p.get("commentaires_traites", 0))
                     }
                     for p in dernieres
                 ]
@@ -459,12 +477,12 @@ def demarrer_automatisation_complete():
         return {"status": "already_running", "message": "Système déjà démarré"}
     
     try:
-        # Vérifier la connexion Google Sheets
-        info = gsheets_db.get_sheet_info()
+        # Vérifier la connexion au stockage des posts
+        info = get_info_stockage()
         
         if info.get('status') != 'initialisé':
-            log_message("errors", "❌ Google Sheets non connecté", "ERROR")
-            return {"status": "error", "message": "Google Sheets non connecté"}
+            log_message("errors", f"❌ {post_store.libelle} non connecté", "ERROR")
+            return {"status": "error", "message": f"{post_store.libelle} non connecté"}
         
         # Configurer le logging
         setup_logging()
@@ -482,7 +500,7 @@ def demarrer_automatisation_complete():
         log_message("system", "🚀 SYSTÈME D'AUTOMATISATION COMPLET DÉMARRÉ", "SUCCESS")
         log_message("system", f"   • Publication: {HEURES_OUVERTURE[0]}h-{HEURES_OUVERTURE[1]}h", "INFO")
         log_message("system", f"   • Vérification: {INTERVALLE_ANALYSE}s", "INFO")
-        log_message("system", f"   • Google Sheets: {info.get('title', 'Inconnu')}", "INFO")
+        log_message("system", f"   • {post_store.libelle}: {info.get('title', info.get('chemin', 'Inconnu'))}", "INFO")
         log_message("system", f"   • Service commentaires: {'ACTIVÉ' if comment_service.running else 'DÉSACTIVÉ'}", "INFO")
         log_message("system", "=" * 60, "INFO")
         
@@ -535,8 +553,8 @@ def get_statut_complet():
             "derniere_verification": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        # Statut Google Sheets
-        sheets_info = gsheets_db.get_sheet_info()
+        # Statut du stockage des posts
+        sheets_info = get_info_stockage()
         
         # Statut service commentaires
         comment_status = get_statut_service_commentaires()
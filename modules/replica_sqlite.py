@@ -0,0 +1,427 @@
+# modules/replica_sqlite.py - Réplique locale SQLite de l'historique Google Sheets
+"""
+Réplique locale de la feuille des posts dans une base SQLite.
+La même table sert de stockage principal pour le backend "sqlite" (voir post_store.py).
+
+- Même schéma que COLUMNS (+ le numéro de ligne dans le sheet)
+- Index sur date, theme, service et publication_effective
+- Tenue à jour par un job de synchronisation en arrière-plan
+  (REPLICA_SYNC_INTERVAL secondes, ou immédiatement après une écriture) ;
+  les écritures du processus y sont aussi appliquées directement
+  (post_store.py), pour qu'il relise aussitôt ce qu'il vient d'écrire
+- Avec le partitionnement mensuel, une synchronisation ne relit que les
+  posts datés du mois précédent ou après ; la réplique entière est
+  resynchronisée toutes les REPLICA_RESYNC_COMPLETE secondes
+- Les lectures et requêtes d'analyse sont servies depuis le disque local,
+  y compris pendant une panne de Google Sheets
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from modules.google_sheets_db import COLUMNS, COLONNES_CLES, PARTITIONS, gsheets_db
+from modules.schema_posts import FORMAT_DATE, filtrer_par_date, colonnes_lecture_datee, filtrer_lecture_datee
+
+# Configuration
+REPLICA_PATH = os.environ.get('REPLICA_SQLITE_PATH', 'historique_posts.db')
+REPLICA_SYNC_INTERVAL = int(os.environ.get('REPLICA_SYNC_INTERVAL', 60))
+REPLICA_RESYNC_COMPLETE = int(os.environ.get('REPLICA_RESYNC_COMPLETE', 3600))
+
+TABLE_POSTS = "posts"
+COLONNES_INDEXEES = ["date", "theme", "service", "publication_effective"]
+
+class TablePostsSQLite:
+    """Table SQLite des posts (schéma COLUMNS, ordonnée par numéro de ligne)"""
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._lock = threading.RLock()
+        self._colonnes: List[str] = []
+        self._empreinte = None
+        self._empreinte_fenetre = None
+        self.derniere_synchronisation = None
+        self.version = 0  # incrémentée à chaque modification du contenu
+        self._ecritures_propres = 0  # écritures de ce processus (voir version_externe)
+        self._initialiser_schema()
+
+    def _connexion(self) -> sqlite3.Connection:
+        connexion = sqlite3.connect(self.chemin, timeout=30)
+        connexion.execute("PRAGMA journal_mode=WAL")
+        connexion.execute("PRAGMA synchronous=NORMAL")
+        return connexion
+
+    @staticmethod
+    def _quoter(colonne: str) -> str:
+        return '"' + str(colonne).replace('"', '""') + '"'
+
+    def _initialiser_schema(self):
+        """Crée la table, les index et la table de métadonnées"""
+        with self._lock, self._connexion() as connexion:
+            colonnes_sql = ", ".join(self._quoter(col) for col in COLUMNS)
+            connexion.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE_POSTS} (ligne INTEGER PRIMARY KEY, {colonnes_sql})"
+            )
+            for col in COLONNES_INDEXEES:
+                connexion.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{TABLE_POSTS}_{col} ON {TABLE_POSTS} ({self._quoter(col)})"
+                )
+            connexion.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+
+            self._colonnes = [info[1] for info in connexion.execute(f"PRAGMA table_info({TABLE_POSTS})")
+                              if info[1] != "ligne"]
+            ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = 'derniere_synchronisation'").fetchone()
+            if ligne:
+                self.derniere_synchronisation = float(ligne[0])
+
+    def _assurer_colonnes(self, connexion: sqlite3.Connection, colonnes: List[str]):
+        """Ajoute les colonnes absentes de la table (schéma évolutif)"""
+        for col in colonnes:
+            if col not in self._colonnes:
+                connexion.execute(f"ALTER TABLE {TABLE_POSTS} ADD COLUMN {self._quoter(col)}")
+                self._colonnes.append(col)
+
+    def _valeurs_sql(self, post: Dict[str, Any], colonnes: List[str]) -> List[Any]:
+        valeurs = []
+        for col in colonnes:
+            valeur = post.get(col, "")
+            valeurs.append(None if valeur is None or (isinstance(valeur, float) and pd.isna(valeur)) else valeur)
+        return valeurs
+
+    def _invalider_empreintes(self):
+        # Contenu modifié hors synchronisation : la prochaine réécrit la table
+        self._empreinte = None
+        self._empreinte_fenetre = None
+
+    def _compter_ecriture(self, connexion: sqlite3.Connection):
+        """Compteur d'écritures partagé par les processus (même transaction que l'écriture)"""
+        connexion.execute(
+            "INSERT INTO meta (cle, valeur) VALUES ('ecritures', '1') "
+            "ON CONFLICT(cle) DO UPDATE SET valeur = CAST(valeur AS INTEGER) + 1"
+        )
+        self._ecritures_propres += 1
+
+    def version_externe(self) -> int:
+        """Jeton qui ne change qu'avec les écritures des autres processus
+        (écritures comptées dans la base moins celles de ce processus)"""
+        with self._lock, self._connexion() as connexion:
+            ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = 'ecritures'").fetchone()
+            return (int(ligne[0]) if ligne else 0) - self._ecritures_propres
+
+    def ajouter_post(self, post: Dict[str, Any]):
+        """Ajoute un post à la fin de la table"""
+        with self._lock, self._connexion() as connexion:
+            colonnes = list(dict.fromkeys(COLUMNS + [str(col) for col in post]))
+            self._assurer_colonnes(connexion, colonnes)
+            colonnes_sql = ", ".join(self._quoter(col) for col in colonnes)
+            marqueurs = ", ".join("?" * len(colonnes))
+            connexion.execute(
+                f"INSERT INTO {TABLE_POSTS} (ligne, {colonnes_sql}) "
+                f"VALUES ((SELECT COALESCE(MAX(ligne), 1) + 1 FROM {TABLE_POSTS}), {marqueurs})",
+                self._valeurs_sql(post, colonnes)
+            )
+            self._compter_ecriture(connexion)
+            self._invalider_empreintes()
+            self.version += 1
+
+    def _mettre_a_jour(self, condition: str, params: tuple, updates: Dict[str, Any]) -> bool:
+        if not updates:
+            return True
+        with self._lock, self._connexion() as connexion:
+            colonnes = [str(col) for col in updates]
+            self._assurer_colonnes(connexion, colonnes)
+            affectations = ", ".join(f"{self._quoter(col)} = ?" for col in colonnes)
+            curseur = connexion.execute(
+                f"UPDATE {TABLE_POSTS} SET {affectations} WHERE {condition}",
+                tuple(self._valeurs_sql(updates, colonnes)) + params
+            )
+            if curseur.rowcount > 0:
+                self._compter_ecriture(connexion)
+            self._invalider_empreintes()
+            self.version += 1
+            return curseur.rowcount > 0
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]) -> bool:
+        """Met à jour le post à la position index (0 = premier post)"""
+        return self._mettre_a_jour(
+            f"ligne = (SELECT ligne FROM {TABLE_POSTS} ORDER BY ligne LIMIT 1 OFFSET ?)",
+            (int(index),), updates
+        )
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un post par son id_post (ou son ID Facebook post_id)"""
+        conditions = [f"{self._quoter(col)} = ?" for col in COLONNES_CLES if col in self._colonnes]
+        if not conditions:
+            return False
+        return self._mettre_a_jour(" OR ".join(conditions), (str(cle),) * len(conditions), updates)
+
+    def supprimer_posts_par_cle(self, cles: List[str]) -> int:
+        """Supprime des posts par id_post (ou post_id), retourne le nombre supprimé"""
+        cles = [str(cle) for cle in cles]
+        colonnes = [col for col in COLONNES_CLES if col in self._colonnes]
+        if not cles or not colonnes:
+            return 0
+        supprimes = 0
+        with self._lock, self._connexion() as connexion:
+            # Lots de 500 clés (limite du nombre de paramètres SQLite)
+            for debut in range(0, len(cles), 500):
+                lot = cles[debut:debut + 500]
+                marqueurs = ", ".join("?" * len(lot))
+                condition = " OR ".join(f"{self._quoter(col)} IN ({marqueurs})" for col in colonnes)
+                supprimes += connexion.execute(
+                    f"DELETE FROM {TABLE_POSTS} WHERE {condition}", tuple(lot) * len(colonnes)
+                ).rowcount
+            if supprimes:
+                self._compter_ecriture(connexion)
+                self._invalider_empreintes()
+                self.version += 1
+        return supprimes
+
+    def compter_posts(self) -> int:
+        with self._connexion() as connexion:
+            return connexion.execute(f"SELECT COUNT(*) FROM {TABLE_POSTS}").fetchone()[0]
+
+    def est_initialisee(self) -> bool:
+        """True si la réplique a déjà été synchronisée au moins une fois"""
+        return self.derniere_synchronisation is not None
+
+    @staticmethod
+    def _empreinte_df(df: pd.DataFrame) -> int:
+        return int(pd.util.hash_pandas_object(df.astype(str), index=True).sum()) if not df.empty else 0
+
+    def _inserer(self, connexion: sqlite3.Connection, df: pd.DataFrame, premiere_ligne: int):
+        """Insère les lignes du DataFrame à partir du numéro de ligne premiere_ligne"""
+        colonnes = [str(col) for col in df.columns]
+        valeurs = df.astype(object).where(pd.notna(df), None).values.tolist()
+        lignes = [[premiere_ligne + i] + ligne for i, ligne in enumerate(valeurs)]
+        self._assurer_colonnes(connexion, colonnes)
+        if lignes:
+            colonnes_sql = ", ".join(["ligne"] + [self._quoter(col) for col in colonnes])
+            marqueurs = ", ".join("?" * (len(colonnes) + 1))
+            connexion.executemany(
+                f"INSERT INTO {TABLE_POSTS} ({colonnes_sql}) VALUES ({marqueurs})", lignes
+            )
+
+    def remplacer(self, df: pd.DataFrame) -> bool:
+        """Remplace le contenu de la réplique par le DataFrame (transaction unique)
+
+        Returns:
+            True si la réplique a été modifiée
+        """
+        empreinte = self._empreinte_df(df)
+
+        with self._lock:
+            if empreinte == self._empreinte:
+                self._marquer_synchronisee()
+                return False
+
+            with self._connexion() as connexion:
+                connexion.execute(f"DELETE FROM {TABLE_POSTS}")
+                self._inserer(connexion, df, 2)
+
+            self._empreinte = empreinte
+            self._empreinte_fenetre = None
+            self.version += 1
+            self._marquer_synchronisee()
+            return True
+
+    def remplacer_depuis(self, df: pd.DataFrame, date_debut: datetime) -> bool:
+        """Remplace les posts datés de date_debut ou après par ceux du DataFrame
+        (synchronisation d'une fenêtre récente, transaction unique)
+
+        Les posts de la fenêtre sont réinsérés après les posts plus anciens.
+
+        Returns:
+            True si la réplique a été modifiée
+        """
+        empreinte = (str(date_debut), self._empreinte_df(df))
+
+        with self._lock:
+            if empreinte == self._empreinte_fenetre:
+                self._marquer_synchronisee()
+                return False
+
+            with self._connexion() as connexion:
+                existants = pd.read_sql_query(f"SELECT ligne, date FROM {TABLE_POSTS}", connexion)
+                retires = filtrer_par_date(existants, date_debut)["ligne"].tolist()
+                connexion.executemany(f"DELETE FROM {TABLE_POSTS} WHERE ligne = ?",
+                                      [(int(ligne),) for ligne in retires])
+                derniere = connexion.execute(f"SELECT COALESCE(MAX(ligne), 1) FROM {TABLE_POSTS}").fetchone()[0]
+                self._inserer(connexion, df, derniere + 1)
+
+            self._empreinte = None
+            self._empreinte_fenetre = empreinte
+            self.version += 1
+            self._marquer_synchronisee()
+            return True
+
+    def _marquer_synchronisee(self):
+        self.derniere_synchronisation = time.time()
+        with self._connexion() as connexion:
+            connexion.execute(
+                "INSERT OR REPLACE INTO meta (cle, valeur) VALUES ('derniere_synchronisation', ?)",
+                (str(self.derniere_synchronisation),)
+            )
+
+    def lire(self, columns: Optional[List[str]] = None, date_debut: Optional[datetime] = None,
+             date_fin: Optional[datetime] = None) -> pd.DataFrame:
+        """Lit les posts de la réplique, dans l'ordre du sheet
+
+        Args:
+            columns: colonnes à lire ; None pour toutes les colonnes
+            date_debut, date_fin: bornes optionnelles sur la colonne date
+                (pré-filtrées en SQL grâce à l'index sur date)
+        """
+        colonnes = [col for col in (columns or self._colonnes) if col in self._colonnes]
+        if not colonnes:
+            return pd.DataFrame(columns=columns or [])
+
+        lecture = colonnes_lecture_datee(colonnes, date_debut, date_fin)
+        conditions, params = [], []
+        if date_debut is not None:
+            conditions.append('"date" >= ?')
+            params.append(pd.Timestamp(date_debut).strftime(FORMAT_DATE)[:10])
+        if date_fin is not None:
+            conditions.append('"date" <= ?')
+            params.append(pd.Timestamp(date_fin).strftime(FORMAT_DATE))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        colonnes_sql = ", ".join(self._quoter(col) for col in lecture)
+        with self._connexion() as connexion:
+            df = pd.read_sql_query(f"SELECT {colonnes_sql} FROM {TABLE_POSTS}{where} ORDER BY ligne",
+                                   connexion, params=tuple(params))
+        return filtrer_lecture_datee(df.fillna(""), colonnes, date_debut, date_fin)
+
+    def requete(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Exécute une requête d'analyse en lecture sur la table posts"""
+        with self._connexion() as connexion:
+            return pd.read_sql_query(sql, connexion, params=params)
+
+class ReplicaSQLite(TablePostsSQLite):
+    """Miroir local de la feuille des posts, synchronisé en arrière-plan"""
+
+    def __init__(self, chemin: str = REPLICA_PATH):
+        super().__init__(chemin)
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self._thread = None
+        self.derniere_erreur = None
+        self._derniere_resync_complete = 0.0
+        self._ecritures_locales = 0  # écritures de ce processus appliquées directement
+
+    @staticmethod
+    def debut_fenetre() -> datetime:
+        """Premier jour du mois précédent : les métriques des posts récents changent encore"""
+        premier_du_mois = pd.Timestamp.now().normalize().replace(day=1)
+        return (premier_du_mois - pd.DateOffset(months=1)).to_pydatetime()
+
+    def synchroniser(self) -> bool:
+        """Synchronise la réplique depuis Google Sheets
+
+        Le cache incrémental de GoogleSheetsDB limite le trafic réseau aux
+        nouvelles lignes et aux colonnes d'engagement. Une lecture en échec
+        lève une exception : la réplique garde alors son contenu, elle n'est
+        jamais remplacée par un historique vide faute de lecture réussie.
+        """
+        try:
+            ecritures = self._ecritures_locales
+            complete = (not PARTITIONS or
+                        time.time() - self._derniere_resync_complete >= REPLICA_RESYNC_COMPLETE)
+            if complete:
+                df = gsheets_db.lire_historique(lever_erreurs=True)
+            else:
+                # Seules les partitions des mois récents sont relues
+                debut = self.debut_fenetre()
+                df = gsheets_db.lire_historique(date_debut=debut, lever_erreurs=True)
+            if df is None:
+                raise RuntimeError("Google Sheets indisponible")
+
+            with self._lock:
+                if self._ecritures_locales != ecritures:
+                    # Écriture appliquée pendant la lecture : celle-ci peut la
+                    # précéder, elle écraserait la réplique ; relecture immédiate
+                    self._reveil.set()
+                    return True
+                if complete:
+                    modifiee = self.remplacer(df)
+                    self._derniere_resync_complete = time.time()
+                else:
+                    modifiee = self.remplacer_depuis(df, debut)
+            self.derniere_erreur = None
+            if modifiee:
+                portee = "" if complete else f" depuis le {debut:%Y-%m-%d}"
+                print(f"🗄️ Réplique SQLite synchronisée: {len(df)} posts{portee}")
+            return True
+        except Exception as e:
+            self.derniere_erreur = str(e)
+            print(f"⚠️ Synchronisation de la réplique SQLite échouée: {e}")
+            return False
+
+    def appliquer_ecriture(self, ecriture):
+        """Applique tout de suite une écriture faite par ce processus dans le
+        sheet (ecriture : fonction sans argument appelant ajouter_post,
+        mettre_a_jour_post...), puis réveille la synchronisation"""
+        with self._lock:
+            ecriture()
+            self._ecritures_locales += 1
+        self._reveil.set()
+
+    def demander_synchronisation(self):
+        """Réveille le job de synchronisation (après une écriture)"""
+        self._reveil.set()
+
+    def _boucle(self, intervalle: int):
+        while not self._arret.is_set():
+            self.synchroniser()
+            self._reveil.wait(timeout=intervalle)
+            self._reveil.clear()
+
+    def demarrer_synchronisation(self, intervalle: int = REPLICA_SYNC_INTERVAL):
+        """Démarre le job de synchronisation en arrière-plan (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._arret.clear()
+            self._thread = threading.Thread(target=self._boucle, args=(intervalle,),
+                                            name="replica-sqlite-sync", daemon=True)
+            self._thread.start()
+            print(f"🔄 Synchronisation de la réplique SQLite toutes les {intervalle}s")
+
+    def arreter_synchronisation(self):
+        self._arret.set()
+        self._reveil.set()
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "chemin": self.chemin,
+            "posts": self.compter_posts(),
+            "derniere_synchronisation": self.derniere_synchronisation,
+            "age_secondes": round(time.time() - self.derniere_synchronisation, 1) if self.derniere_synchronisation else None,
+            "synchronisation_active": bool(self._thread and self._thread.is_alive()),
+            "derniere_erreur": self.derniere_erreur
+        }
+
+# Instance globale
+replica = ReplicaSQLite()
+
+def lire_historique_replica(columns: Optional[List[str]] = None, date_debut: Optional[datetime] = None,
+                            date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    """Lit l'historique depuis la réplique locale
+
+    Au premier appel, démarre le job de synchronisation et, si la réplique n'a
+    jamais été remplie, la synchronise immédiatement.
+    """
+    replica.demarrer_synchronisation()
+    if not replica.est_initialisee():
+        replica.synchroniser()
+    return replica.lire(columns, date_debut, date_fin)
+
+def requete_replica(sql: str, params: tuple = ()) -> pd.DataFrame:
+    return replica.requete(sql, params)
+
+def demander_synchronisation_replica():
+    replica.demander_synchronisation()
@@ -0,0 +1,109 @@
+# modules/schema_posts.py - Schéma typé de l'historique des posts
+"""
+Schéma déclaré de l'historique, appliqué une seule fois au chargement.
+
+- Colonnes d'engagement numériques (int32 / float32)
+- Dates en datetime64
+- Colonnes à faible cardinalité en category
+
+Le DataFrame typé est partagé en lecture seule par les fonctions d'analyse
+(voir post_store.lire_historique_posts(typer=True)) : ne jamais le modifier
+en place, travailler sur des Series dérivées ou sur une copie.
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, List, Optional
+
+# Schéma : colonne -> type
+SCHEMA_POSTS = {
+    "reaction_positive": "int32",
+    "reaction_negative": "int32",
+    "commentaires_traites": "int32",
+    "taux_conversion_estime": "float32",
+    "score_performance_final": "float32",
+    "date": "datetime64[ns]",
+    "date_publication": "datetime64[ns]",
+    "theme": "category",
+    "service": "category",
+    "style": "category",
+    "type_publication": "category",
+    "agent_responsable": "category",
+}
+
+FORMAT_DATE = "%Y-%m-%d %H:%M:%S"
+
+def _numerique(serie: pd.Series) -> pd.Series:
+    """Conversion numérique tolérante ("12 likes" -> 12)"""
+    valeurs = pd.to_numeric(serie, errors='coerce')
+    manquants = valeurs.isna() & serie.notna()
+    if manquants.any():
+        extraits = serie[manquants].astype(str).str.extract(r'(-?\d+(?:[.,]\d+)?)')[0]
+        valeurs[manquants] = pd.to_numeric(extraits.str.replace(',', '.'), errors='coerce')
+    return valeurs
+
+def _sans_vides(serie: pd.Series) -> pd.Series:
+    """Cellules vides -> valeurs manquantes"""
+    return serie.where(serie.astype(str).str.strip() != "")
+
+def appliquer_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Retourne une copie typée du DataFrame selon SCHEMA_POSTS"""
+    df = df.copy()
+    for col, type_col in SCHEMA_POSTS.items():
+        if col not in df.columns:
+            continue
+        try:
+            if type_col.startswith("int"):
+                df[col] = _numerique(df[col]).fillna(0).astype(type_col)
+            elif type_col.startswith("float"):
+                df[col] = _numerique(df[col]).astype(type_col)
+            elif type_col.startswith("datetime"):
+                df[col] = pd.to_datetime(_sans_vides(df[col]), errors='coerce')
+            elif type_col == "category":
+                df[col] = _sans_vides(df[col]).astype("category")
+        except Exception as e:
+            print(f"⚠️ Colonne {col} non typée: {e}")
+    return df
+
+def valeur_json(valeur: Any) -> Any:
+    """Convertit une valeur du DataFrame typé en valeur sérialisable JSON"""
+    if isinstance(valeur, pd.Timestamp):
+        return valeur.strftime(FORMAT_DATE)
+    if valeur is None or (not isinstance(valeur, str) and pd.isna(valeur)):
+        return ""
+    if isinstance(valeur, np.generic):
+        return valeur.item()
+    return valeur
+
+def filtrer_par_date(df: pd.DataFrame, date_debut: Optional[datetime] = None,
+                     date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    """Garde les posts dont la colonne date est dans [date_debut, date_fin]"""
+    if (date_debut is None and date_fin is None) or df.empty or "date" not in df.columns:
+        return df
+    dates = pd.to_datetime(df["date"], errors='coerce')
+    masque = pd.Series(True, index=df.index)
+    if date_debut is not None:
+        masque &= dates >= pd.Timestamp(date_debut)
+    if date_fin is not None:
+        masque &= dates <= pd.Timestamp(date_fin)
+    return df[masque].reset_index(drop=True)
+
+def colonnes_lecture_datee(columns: Optional[List[str]], date_debut: Optional[datetime] = None,
+                           date_fin: Optional[datetime] = None) -> Optional[List[str]]:
+    """Colonnes à lire pour filtrer par date une lecture projetée (ajoute "date")"""
+    if not columns or (date_debut is None and date_fin is None) or "date" in columns:
+        return columns
+    return list(columns) + ["date"]
+
+def filtrer_lecture_datee(df: pd.DataFrame, columns: Optional[List[str]],
+                          date_debut: Optional[datetime] = None,
+                          date_fin: Optional[datetime] = None) -> pd.DataFrame:
+    """Filtre par date une lecture faite avec colonnes_lecture_datee, puis
+    retire la colonne date si elle n'était pas demandée"""
+    if date_debut is None and date_fin is None:
+        return df
+    df = filtrer_par_date(df, date_debut, date_fin)
+    if columns and "date" not in columns and "date" in df.columns:
+        df = df.drop(columns=["date"])
+    return df
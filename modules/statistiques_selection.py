@@ -0,0 +1,216 @@
+# modules/statistiques_selection.py - Statistiques incrémentales pour le choix des paramètres
+"""
+Compteurs par thème, service, style et type de publication :
+nombre de posts et somme de l'engagement (reaction_positive).
+
+- Construits une fois depuis l'historique, puis tenus à jour en O(1) à chaque
+  sauvegarde de post et à chaque mise à jour des métriques (post_store.py)
+- Reconstruits quand le stockage a été modifié par un autre processus
+  (post_store.version_externe() : posts ajoutés, métriques rafraîchies ou
+  posts supprimés ailleurs) ou après une suppression (invalider) ; les
+  écritures de ce processus ne changent pas ce jeton et ne déclenchent
+  jamais de reconstruction
+- Politique par défaut : valeur la plus fréquente (plus_frequent) et
+  engagement des derniers posts (engagement_recent) ; tirage pondéré de
+  type bandit (tirer) seulement si SELECTION_BANDIT=true
+"""
+
+import os
+import math
+import time
+import random
+import threading
+import pandas as pd
+from typing import Dict, List, Any, Optional, Iterable
+
+# Configuration
+SELECTION_EXPLORATION = float(os.environ.get('SELECTION_EXPLORATION', 1.0))
+SELECTION_BANDIT = os.environ.get('SELECTION_BANDIT', 'false').lower() == 'true'
+
+DIMENSIONS = ["theme", "service", "style", "type_publication"]
+COLONNE_ENGAGEMENT = "reaction_positive"
+COLONNES_CLES = ["id_post", "post_id"]
+
+def _valeur(valeur: Any) -> Optional[str]:
+    if valeur is None or (isinstance(valeur, float) and math.isnan(valeur)):
+        return None
+    texte = str(valeur).strip()
+    return texte or None
+
+def _engagement(valeur: Any) -> float:
+    try:
+        nombre = float(valeur)
+        return 0.0 if math.isnan(nombre) else nombre
+    except (TypeError, ValueError):
+        return 0.0
+
+class StatistiquesSelection:
+    """Nombre de posts et engagement cumulé par valeur de chaque dimension"""
+
+    def __init__(self, exploration: float = SELECTION_EXPLORATION):
+        self.exploration = exploration
+        self._lock = threading.Lock()
+        self._reinitialiser()
+        self._construit = False
+        self._construit_a: Optional[float] = None
+        self.version = None
+        self.reconstructions = 0
+
+    def _reinitialiser(self):
+        self._compteurs: Dict[str, Dict[str, List[float]]] = {dim: {} for dim in DIMENSIONS}
+        self._posts: List[Dict[str, Any]] = []  # dans l'ordre du stockage
+        self._positions: Dict[str, int] = {}     # id_post / post_id -> position
+
+    def _indexer(self, post: Dict[str, Any]):
+        entree = {dim: _valeur(post.get(dim)) for dim in DIMENSIONS}
+        entree["engagement"] = _engagement(post.get(COLONNE_ENGAGEMENT))
+        for dim in DIMENSIONS:
+            if entree[dim] is not None:
+                compteur = self._compteurs[dim].setdefault(entree[dim], [0, 0.0])
+                compteur[0] += 1
+                compteur[1] += entree["engagement"]
+        for col in COLONNES_CLES:
+            cle = _valeur(post.get(col))
+            if cle is not None:
+                self._positions[cle] = len(self._posts)
+        self._posts.append(entree)
+
+    def _appliquer(self, position: Optional[int], updates: Dict[str, Any]):
+        if position is None or not 0 <= position < len(self._posts):
+            return
+        entree = self._posts[position]
+        for col in COLONNES_CLES:
+            cle = _valeur(updates.get(col))
+            if cle is not None:
+                self._positions[cle] = position
+
+        nouvelle = dict(entree)
+        for dim in DIMENSIONS:
+            if dim in updates:
+                nouvelle[dim] = _valeur(updates[dim])
+        if COLONNE_ENGAGEMENT in updates:
+            nouvelle["engagement"] = _engagement(updates[COLONNE_ENGAGEMENT])
+        if nouvelle == entree:
+            return
+
+        # Retrait de l'ancienne contribution, ajout de la nouvelle
+        for dim in DIMENSIONS:
+            if entree[dim] is not None:
+                compteur = self._compteurs[dim][entree[dim]]
+                compteur[0] -= 1
+                compteur[1] -= entree["engagement"]
+                if compteur[0] <= 0:
+                    del self._compteurs[dim][entree[dim]]
+            if nouvelle[dim] is not None:
+                compteur = self._compteurs[dim].setdefault(nouvelle[dim], [0, 0.0])
+                compteur[0] += 1
+                compteur[1] += nouvelle["engagement"]
+        self._posts[position] = nouvelle
+
+    def synchroniser(self, df: pd.DataFrame, version: Any):
+        """Reconstruit les compteurs depuis df si le stockage a été modifié
+        par un autre processus depuis la dernière construction
+
+        Args:
+            version: post_store.version_externe() (None : inconnue, reconstruction)
+        """
+        with self._lock:
+            if self._construit and version is not None and version == self.version:
+                return
+            self._reinitialiser()
+            colonnes = [col for col in DIMENSIONS + [COLONNE_ENGAGEMENT] + COLONNES_CLES if col in df.columns]
+            for post in df[colonnes].to_dict(orient="records"):
+                self._indexer(post)
+            self._construit = True
+            self._construit_a = time.time()
+            self.version = version
+            self.reconstructions += 1
+
+    def ajouter_post(self, post: Dict[str, Any]):
+        """Prend en compte un post sauvegardé par ce processus"""
+        with self._lock:
+            self._indexer(post)
+
+    def mettre_a_jour_post(self, index: int, updates: Dict[str, Any]):
+        """Prend en compte la mise à jour du post à la position index (0 = premier post)"""
+        with self._lock:
+            self._appliquer(int(index), updates)
+
+    def mettre_a_jour_post_par_cle(self, cle: str, updates: Dict[str, Any]):
+        """Prend en compte la mise à jour d'un post désigné par id_post ou post_id"""
+        with self._lock:
+            self._appliquer(self._positions.get(str(cle)), updates)
+
+    def invalider(self):
+        """Force la reconstruction au prochain synchroniser (posts supprimés)"""
+        with self._lock:
+            self._construit = False
+
+    def compter_posts(self) -> int:
+        return len(self._posts)
+
+    def compteurs(self, dimension: str) -> Dict[str, Dict[str, float]]:
+        """{valeur: {"posts": n, "engagement": somme}} pour une dimension"""
+        with self._lock:
+            return {valeur: {"posts": n, "engagement": somme}
+                    for valeur, (n, somme) in self._compteurs[dimension].items()}
+
+    def plus_frequent(self, dimension: str) -> Optional[str]:
+        """Valeur la plus fréquente (égalité : la plus petite, comme groupby().idxmax())"""
+        with self._lock:
+            compteurs = self._compteurs[dimension]
+            return max(sorted(compteurs), key=lambda valeur: compteurs[valeur][0]) if compteurs else None
+
+    def engagement_recent(self, dimension: str, nb_posts: int) -> Dict[str, float]:
+        """Somme de l'engagement par valeur sur les nb_posts derniers posts"""
+        with self._lock:
+            recents = self._posts[-nb_posts:] if nb_posts > 0 else []
+        sommes: Dict[str, float] = {}
+        for entree in recents:
+            if entree[dimension] is not None:
+                sommes[entree[dimension]] = sommes.get(entree[dimension], 0.0) + entree["engagement"]
+        return sommes
+
+    def tirer(self, dimension: str, candidats: Iterable[str] = (), restreindre: bool = False) -> Optional[str]:
+        """Tirage pondéré (bandit) parmi les candidats et les valeurs déjà observées
+
+        Poids = engagement moyen (lissé vers la moyenne globale) relatif à la
+        moyenne globale + bonus d'exploration décroissant avec le nombre de posts.
+
+        Args:
+            candidats: valeurs possibles, y compris jamais essayées
+            restreindre: True pour ignorer les valeurs observées hors candidats
+        """
+        candidats = list(candidats)
+        with self._lock:
+            compteurs = {valeur: tuple(c) for valeur, c in self._compteurs[dimension].items()}
+
+        valeurs = list(dict.fromkeys(candidats if restreindre else candidats + list(compteurs)))
+        if not valeurs:
+            return None
+
+        total_posts = sum(n for n, _ in compteurs.values())
+        moyenne_globale = sum(s for _, s in compteurs.values()) / total_posts if total_posts else 0.0
+
+        poids = []
+        for valeur in valeurs:
+            n, somme = compteurs.get(valeur, (0, 0.0))
+            moyenne = (somme + moyenne_globale) / (n + 1)
+            relative = moyenne / moyenne_globale if moyenne_globale > 0 else 1.0
+            bonus = self.exploration * math.sqrt(math.log(total_posts + 1) / (n + 1))
+            poids.append(max(relative, 0.0) + bonus + 1e-6)
+        return random.choices(valeurs, weights=poids)[0]
+
+    def get_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "posts": len(self._posts),
+                "valeurs": {dim: len(self._compteurs[dim]) for dim in DIMENSIONS},
+                "reconstructions": self.reconstructions,
+                "age_secondes": round(time.time() - self._construit_a) if self._construit_a else None,
+                "version": str(self.version) if self.version is not None else None,
+                "bandit": SELECTION_BANDIT
+            }
+
+# Instance globale
+statistiques_selection = StatistiquesSelection()
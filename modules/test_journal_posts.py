@@ -0,0 +1,116 @@
+# test_journal_posts.py - Écritures concurrentes dans le journal des posts
+"""
+Plusieurs processus (comme les workers gunicorn) écrivent le même journal.
+
+- Import initial de l'Excel : tous les processus démarrent en même temps sur
+  un journal absent ; sans verrou, chacun importe et remplace le journal des
+  autres, leurs ajouts et mises à jour sont perdus
+- Mises à jour des posts partagés (importés) par position et par clé, en plus
+  des ajouts propres à chaque processus
+
+Lancement : python -m pytest modules/test_journal_posts.py
+ou python -m modules.test_journal_posts [--sans-verrou] (démontre l'échec sans verrou)
+"""
+
+import os
+import sys
+import json
+import tempfile
+import time
+import multiprocessing
+import pandas as pd
+
+from modules import journal_posts
+from modules.journal_posts import JournalPosts
+
+NB_PROCESSUS = 6
+POSTS_PARTAGES = 20
+POSTS_EXCEL = 300      # lecture de l'Excel de quelques dizaines de ms
+DECALAGE = 0.005       # départs échelonnés à l'intérieur de la lecture
+POSTS_PAR_PROCESSUS = 30
+
+def _ecrivain(chemin: str, excel: str, numero: int, barriere, verrou: bool):
+    if not verrou:
+        journal_posts.FCNTL_AVAILABLE = False
+    journal = JournalPosts(chemin, excel=excel)
+    barriere.wait()
+    # Chaque processus voit le journal absent pendant que les précédents
+    # importent déjà, puis écrivent
+    time.sleep(numero * DECALAGE)
+
+    for i in range(POSTS_PAR_PROCESSUS):
+        journal.ajouter_post({"titre": f"p{numero}-{i}", "id_post": f"{numero}-{i}"})
+        if i % 5 == 0:
+            journal.mettre_a_jour_post_par_cle(f"{numero}-{i}", {"publication_effective": "oui"})
+
+    # Posts partagés : chaque processus écrit sa propre colonne sur chacun d'eux
+    for position in range(POSTS_PARTAGES):
+        journal.mettre_a_jour_post(position, {f"position_{numero}": f"p{position}"})
+        journal.mettre_a_jour_post_par_cle(f"s{position}", {f"cle_{numero}": "oui"})
+
+def verifier_ecritures_concurrentes(verrou: bool = True, nb_processus: int = NB_PROCESSUS) -> dict:
+    """Lance les écrivains sur un journal neuf et un Excel existant, puis
+    vérifie qu'aucun post ni aucune mise à jour n'est perdu ou mal appliqué"""
+    contexte = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "journal.jsonl")
+        excel = os.path.join(dossier, "historique.xlsx")
+        pd.DataFrame({
+            "titre": [f"partagé {i}" for i in range(POSTS_EXCEL)],
+            "id_post": [f"s{i}" for i in range(POSTS_EXCEL)],
+        }).to_excel(excel, index=False)
+
+        barriere = contexte.Barrier(nb_processus)
+        processus = [
+            contexte.Process(target=_ecrivain, args=(chemin, excel, n, barriere, verrou))
+            for n in range(nb_processus)
+        ]
+        for p in processus:
+            p.start()
+        for p in processus:
+            p.join()
+
+        # Rejeu complet du journal par un lecteur neuf
+        df = JournalPosts(chemin, excel=excel).lire()
+
+    attendus = POSTS_EXCEL + nb_processus * POSTS_PAR_PROCESSUS
+    resultat = {
+        "posts_attendus": attendus,
+        "posts_lus": len(df),
+        "posts_uniques": int(df["id_post"].nunique()) if not df.empty else 0,
+        "mises_a_jour_attendues": nb_processus * len(range(0, POSTS_PAR_PROCESSUS, 5)),
+        "mises_a_jour_lues": int((df.get("publication_effective", pd.Series(dtype=str)) == "oui").sum()),
+        "mises_a_jour_partagees_attendues": 2 * nb_processus * POSTS_PARTAGES,
+        "mises_a_jour_partagees_lues": 0,
+    }
+
+    partages = df[df["id_post"].astype(str).str.startswith("s")] if not df.empty else df
+    for _, post in partages.iterrows():
+        position = int(str(post["id_post"])[1:])
+        if position >= POSTS_PARTAGES:
+            continue
+        for n in range(nb_processus):
+            # Mise à jour par position appliquée au bon post
+            if post.get(f"position_{n}") == f"p{position}":
+                resultat["mises_a_jour_partagees_lues"] += 1
+            if post.get(f"cle_{n}") == "oui":
+                resultat["mises_a_jour_partagees_lues"] += 1
+
+    resultat["ok"] = (
+        resultat["posts_lus"] == resultat["posts_uniques"] == attendus
+        and resultat["mises_a_jour_lues"] == resultat["mises_a_jour_attendues"]
+        and resultat["mises_a_jour_partagees_lues"] == resultat["mises_a_jour_partagees_attendues"]
+        and all(p.exitcode == 0 for p in processus)
+    )
+    return resultat
+
+def test_ecritures_concurrentes_avec_import_excel():
+    resultat = verifier_ecritures_concurrentes(verrou=True)
+    assert resultat["ok"], resultat
+
+if __name__ == "__main__":
+    verrou = "--sans-verrou" not in sys.argv
+    resultat = verifier_ecritures_concurrentes(verrou=verrou)
+    print(f"🔒 Verrou fichier: {'oui' if verrou else 'non'}")
+    print(json.dumps(resultat, indent=2))
+    sys.exit(0 if resultat["ok"] else 1)